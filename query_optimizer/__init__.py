@@ -1,10 +1,22 @@
 # Import all converters at the top to make sure they are registered first
 from .converters import *  # noqa: F403, I001
 
-from .compiler import optimize, optimize_single
+from .compiler import (
+    aoptimize,
+    aoptimize_instances,
+    aoptimize_many,
+    aoptimize_single,
+    optimize,
+    optimize_instances,
+    optimize_many,
+    optimize_single,
+)
 from .fields import (
+    AsyncDjangoConnectionField,
+    AsyncDjangoListField,
     DjangoConnectionField,
     DjangoListField,
+    DjangoNodesField,
     RelatedField,
     AnnotatedField,
     MultiField,
@@ -14,12 +26,21 @@
 
 __all__ = [
     "AnnotatedField",
+    "AsyncDjangoConnectionField",
+    "AsyncDjangoListField",
     "DjangoConnectionField",
     "DjangoListField",
+    "DjangoNodesField",
     "DjangoObjectType",
     "ManuallyOptimizedField",
     "MultiField",
     "RelatedField",
+    "aoptimize",
+    "aoptimize_instances",
+    "aoptimize_many",
+    "aoptimize_single",
     "optimize",
+    "optimize_instances",
+    "optimize_many",
     "optimize_single",
 ]
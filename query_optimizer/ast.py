@@ -2,10 +2,11 @@
 
 import contextlib
 from contextlib import suppress
+from weakref import WeakKeyDictionary
 
 from django.core.exceptions import FieldDoesNotExist
 from django.db.models import Field, ForeignKey, Model
-from graphene import Connection, ObjectType, PageInfo
+from graphene import Connection, ObjectType, PageInfo, Schema
 from graphene.relay.node import AbstractNode
 from graphene.types.definitions import GrapheneObjectType, GrapheneUnionType
 from graphene.utils.str_converters import to_snake_case
@@ -16,17 +17,37 @@
     FragmentSpreadNode,
     GraphQLField,
     GraphQLOutputType,
+    GraphQLSchema,
     InlineFragmentNode,
+    NameNode,
     SelectionNode,
 )
 from graphql.execution.execute import get_field_def
 
 from .errors import OptimizerError
 from .settings import optimizer_settings
-from .typing import GRAPHQL_BUILTIN, GQLInfo, ModelField, Optional, ToManyField, ToOneField, TypeGuard, Union, overload
+from .typing import (
+    GRAPHQL_BUILTIN,
+    GQLInfo,
+    Iterable,
+    Literal,
+    ModelField,
+    NamedTuple,
+    Optional,
+    ToManyField,
+    ToOneField,
+    TypeGuard,
+    Union,
+    overload,
+)
 
 __all__ = [
+    "FieldDescriptor",
     "GraphQLASTWalker",
+    "ModelFieldDescriptor",
+    "SchemaIndex",
+    "get_schema_index",
+    "warm_up_schema_index",
 ]
 
 
@@ -34,6 +55,144 @@
 Selections = tuple[SelectionNode, ...]
 
 
+class ModelFieldDescriptor(NamedTuple):
+    """Precomputed information about a model field selected through a DjangoObjectType."""
+
+    kind: Literal["custom", "normal", "to_one", "to_many"]
+    field: Optional[ModelField]
+    related_model: Optional[type[Model]]
+    cache_name: Optional[str]
+    attname: Optional[str]
+
+
+class FieldDescriptor(NamedTuple):
+    """Precomputed information about a field on a GraphQL object type."""
+
+    kind: Literal["connection", "edge", "page_info", "graphql_builtin", "model_field", "plain_object_type"]
+    name: str
+    graphql_field: GraphQLField
+    graphene_type: GrapheneType
+    model_field: Optional[ModelFieldDescriptor]
+
+
+class SchemaIndex:
+    """
+    Index of the fields in a GraphQL schema, so that the information needed
+    for walking the query AST doesn't need to be recomputed for every node on every request.
+    Fields are indexed lazily when they are first encountered, or eagerly using `warm_up_schema_index`.
+    """
+
+    def __init__(self) -> None:
+        # The index should not reference the schema, since it is stored in a weak cache keyed by the schema.
+        self.fields: dict[tuple[str, str], FieldDescriptor] = {}
+        self.model_fields: dict[tuple[type[Model], str], ModelFieldDescriptor] = {}
+
+    def get_field(
+        self, schema: GraphQLSchema, field_type: GrapheneObjectType, field_node: FieldNode
+    ) -> FieldDescriptor:
+        key = (field_type.name, field_node.name.value)
+        descriptor = self.fields.get(key)
+        if descriptor is None:
+            descriptor = self.fields[key] = self.build_field(schema, field_type, field_node)
+        return descriptor
+
+    def get_model_field(self, model: type[Model], field_name: str) -> ModelFieldDescriptor:
+        key = (model, field_name)
+        descriptor = self.model_fields.get(key)
+        if descriptor is None:
+            descriptor = self.model_fields[key] = self.build_model_field(model, field_name)
+        return descriptor
+
+    def build_field(
+        self, schema: GraphQLSchema, field_type: GrapheneObjectType, field_node: FieldNode
+    ) -> FieldDescriptor:
+        graphene_type: type[ObjectType] = field_type.graphene_type
+        graphql_field = get_field_def(schema, field_type, field_node)
+        field_name = to_snake_case(field_node.name.value)
+        model_field: Optional[ModelFieldDescriptor] = None
+
+        if issubclass(graphene_type, Connection):
+            kind = "connection"
+        elif is_edge(field_type):
+            kind = "edge"
+        elif issubclass(graphene_type, PageInfo):
+            kind = "page_info"
+        elif issubclass(graphene_type, ObjectType):
+            if is_graphql_builtin(field_name):
+                kind = "graphql_builtin"
+            elif issubclass(graphene_type, DjangoObjectType):
+                kind = "model_field"
+                model_field = self.get_model_field(graphene_type._meta.model, field_name)
+            else:
+                kind = "plain_object_type"
+        else:  # pragma: no cover
+            msg = f"Unhandled graphene type: '{graphene_type}'"
+            raise OptimizerError(msg)
+
+        return FieldDescriptor(
+            kind=kind,
+            name=field_name,
+            graphql_field=graphql_field,
+            graphene_type=get_underlying_type(graphql_field.type),
+            model_field=model_field,
+        )
+
+    def build_model_field(self, model: type[Model], field_name: str) -> ModelFieldDescriptor:
+        field = get_model_field(model, field_name)
+
+        if field is None:
+            return ModelFieldDescriptor(kind="custom", field=None, related_model=None, cache_name=None, attname=None)
+
+        if not field.is_relation or is_foreign_key_id(field, field_name):
+            return ModelFieldDescriptor(
+                kind="normal",
+                field=field,
+                related_model=None,
+                cache_name=None,
+                attname=field.get_attname(),
+            )
+
+        if is_to_one(field) or is_to_many(field):
+            return ModelFieldDescriptor(
+                kind="to_one" if is_to_one(field) else "to_many",
+                field=field,
+                related_model=get_related_model(field, model),
+                cache_name=field.get_cache_name() or field.name,
+                attname=getattr(field, "attname", None),
+            )
+
+        msg = f"Unhandled field: '{field.name}'"  # pragma: no cover
+        raise OptimizerError(msg)  # pragma: no cover
+
+
+_SCHEMA_INDEXES: WeakKeyDictionary[GraphQLSchema, SchemaIndex] = WeakKeyDictionary()
+
+
+def get_schema_index(schema: GraphQLSchema) -> SchemaIndex:
+    """Get the field index for the given schema. Created on first use."""
+    index = _SCHEMA_INDEXES.get(schema)
+    if index is None:
+        index = _SCHEMA_INDEXES.setdefault(schema, SchemaIndex())
+    return index
+
+
+def warm_up_schema_index(schema: Union[GraphQLSchema, Schema]) -> SchemaIndex:
+    """
+    Index all fields in the given schema up front, e.g., right after the schema has been constructed,
+    so that the first requests using each field don't need to pay the cost of indexing it.
+
+    :param schema: Graphene schema or the GraphQL schema it wraps.
+    """
+    graphql_schema: GraphQLSchema = getattr(schema, "graphql_schema", schema)
+    index = get_schema_index(graphql_schema)
+    for field_type in graphql_schema.type_map.values():
+        if not isinstance(field_type, GrapheneObjectType):
+            continue
+        for field_name in field_type.fields:
+            index.get_field(graphql_schema, field_type, FieldNode(name=NameNode(value=field_name)))
+    return index
+
+
 class GraphQLASTWalker:
     """Class for walking the GraphQL AST and handling the different nodes."""
 
@@ -41,6 +200,8 @@ def __init__(self, info: GQLInfo, model: Optional[type[Model]] = None) -> None:
         self.info = info
         self.complexity: int = 0
         self.model: type[Model] = model
+        self.model_field: Optional[ModelFieldDescriptor] = None
+        self.index = get_schema_index(info.schema)
 
     def increase_complexity(self) -> None:
         self.complexity += 1
@@ -66,25 +227,21 @@ def handle_selections(self, field_type: GrapheneType, selections: Selections) ->
                 raise OptimizerError(msg)
 
     def handle_field_node(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
-        graphene_type: type[ObjectType] = field_type.graphene_type
-
         if self.info.parent_type == field_type:
             return self.handle_query_class(field_type, field_node)
 
-        if issubclass(graphene_type, Connection):
+        descriptor = self.get_field_descriptor(field_type, field_node)
+
+        if descriptor.kind == "connection":
             return self.handle_connection(field_type, field_node)
 
-        if is_edge(field_type):
+        if descriptor.kind == "edge":
             return self.handle_edge(field_type, field_node)
 
-        if issubclass(graphene_type, PageInfo):  # pragma: no cover
+        if descriptor.kind == "page_info":
             return self.handle_page_info(field_type, field_node)
 
-        if issubclass(graphene_type, ObjectType):
-            return self.handle_object_type(field_type, field_node)
-
-        msg = f"Unhandled graphene type: '{graphene_type}'"  # pragma: no cover
-        raise OptimizerError(msg)  # pragma: no cover
+        return self.handle_object_type(field_type, field_node)
 
     def handle_query_class(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
         graphene_type = self.get_graphene_type(field_type, field_node)
@@ -92,14 +249,12 @@ def handle_query_class(self, field_type: GrapheneObjectType, field_node: FieldNo
         return self.handle_selections(graphene_type, selections)
 
     def handle_object_type(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
-        field_name = to_snake_case(field_node.name.value)
-        if is_graphql_builtin(field_name):
+        descriptor = self.get_field_descriptor(field_type, field_node)
+        if descriptor.kind == "graphql_builtin":
             return self.handle_graphql_builtin(field_type, field_node)
 
-        graphene_type: type[ObjectType] = field_type.graphene_type
-
-        if issubclass(graphene_type, DjangoObjectType):
-            return self.handle_model_field(field_type, field_node, field_name)
+        if descriptor.kind == "model_field":
+            return self.handle_model_field(field_type, field_node, descriptor.name)
         return self.handle_plain_object_type(field_type, field_node)
 
     def handle_graphql_builtin(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None: ...
@@ -108,28 +263,23 @@ def handle_plain_object_type(self, field_type: GrapheneObjectType, field_node: F
 
     def handle_model_field(self, field_type: GrapheneObjectType, field_node: FieldNode, field_name: str) -> None:
         model: type[Model] = field_type.graphene_type._meta.model
-        field = get_model_field(model, field_name)
+        descriptor = self.index.get_model_field(model, field_name)
+        field = descriptor.field
 
-        if field is None:
-            with self.use_model(model):
+        if descriptor.kind == "custom":
+            with self.use_model(model), self.use_model_field(descriptor):
                 return self.handle_custom_field(field_type, field_node)
 
-        if not field.is_relation or is_foreign_key_id(field, field_node):
-            with self.use_model(model):
+        if descriptor.kind == "normal":
+            with self.use_model(model), self.use_model_field(descriptor):
                 return self.handle_normal_field(field_type, field_node, field)
 
-        if is_to_one(field):
-            related_model = get_related_model(field, model)
-            with self.use_model(field.model):
-                return self.handle_to_one_field(field_type, field_node, field, related_model)
+        if descriptor.kind == "to_one":
+            with self.use_model(field.model), self.use_model_field(descriptor):
+                return self.handle_to_one_field(field_type, field_node, field, descriptor.related_model)
 
-        if is_to_many(field):
-            related_model = get_related_model(field, model)
-            with self.use_model(model):
-                return self.handle_to_many_field(field_type, field_node, field, related_model)
-
-        msg = f"Unhandled field: '{field.name}'"  # pragma: no cover
-        raise OptimizerError(msg)  # pragma: no cover
+        with self.use_model(model), self.use_model_field(descriptor):
+            return self.handle_to_many_field(field_type, field_node, field, descriptor.related_model)
 
     def handle_custom_field(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None: ...
 
@@ -192,8 +342,10 @@ def handle_inline_fragment(self, field_type: GrapheneUnionType, inline_fragment:
         return self.handle_selections(fragment_type, selections)
 
     def get_graphene_type(self, field_type: GrapheneObjectType, field_node: FieldNode) -> GrapheneType:
-        graphql_field = get_field_def(self.info.schema, field_type, field_node)
-        return get_underlying_type(graphql_field.type)
+        return self.get_field_descriptor(field_type, field_node).graphene_type
+
+    def get_field_descriptor(self, field_type: GrapheneObjectType, field_node: FieldNode) -> FieldDescriptor:
+        return self.index.get_field(self.info.schema, field_type, field_node)
 
     def get_field_name(self, field_node: FieldNode) -> str:
         alias = getattr(field_node.alias, "value", None)
@@ -208,6 +360,15 @@ def use_model(self, model: type[Model]) -> GraphQLASTWalker:
         finally:
             self.model = orig_model
 
+    @contextlib.contextmanager
+    def use_model_field(self, model_field: ModelFieldDescriptor) -> GraphQLASTWalker:
+        orig_model_field = self.model_field
+        try:
+            self.model_field = model_field
+            yield
+        finally:
+            self.model_field = orig_model_field
+
 
 @overload
 def get_underlying_type(
@@ -249,8 +410,27 @@ def is_graphql_builtin(field_name: str) -> bool:
     return field_name.lower() in GRAPHQL_BUILTIN
 
 
-def is_foreign_key_id(field: Field, field_node: FieldNode) -> bool:
-    return isinstance(field, ForeignKey) and field.get_attname() == to_snake_case(field_node.name.value)
+def is_foreign_key_id(field: Field, field_name: str) -> bool:
+    return isinstance(field, ForeignKey) and field.get_attname() == field_name
+
+
+def is_pk_only_selection(field_nodes: Iterable[FieldNode], object_type: type[DjangoObjectType]) -> bool:
+    """
+    Do the given field nodes only select the primary key of the given object type's model?
+    If so, the related object can be created from the value of the foreign key pointing to it.
+    """
+    pk_names = {"pk", object_type._meta.model._meta.pk.name}
+    if any(issubclass(interface, AbstractNode) for interface in object_type._meta.interfaces):
+        pk_names.add("id")
+
+    for field_node in field_nodes:
+        for selection in get_selections(field_node):
+            if not isinstance(selection, FieldNode):
+                return False
+            field_name = selection.name.value
+            if field_name != "__typename" and field_name not in pk_names:
+                return False
+    return True
 
 
 def is_to_many(field: Field) -> TypeGuard[ToManyField]:
@@ -273,6 +453,17 @@ def get_fragment_type(field_type: GrapheneUnionType, inline_fragment: InlineFrag
     return fragment_type
 
 
+def get_return_object_type(info: GQLInfo) -> Optional[type[DjangoObjectType]]:
+    """Get the DjangoObjectType the field returns, or the node type if the field returns a connection."""
+    field_type = get_underlying_type(info.return_type)
+    graphene_type = getattr(field_type, "graphene_type", None)
+    if is_connection(field_type):
+        graphene_type = graphene_type._meta.node
+    if isinstance(graphene_type, type) and issubclass(graphene_type, DjangoObjectType):
+        return graphene_type
+    return None
+
+
 def get_related_model(related_field: Union[ToOneField, ToManyField], model: type[Model]) -> type[Model] | None:
     """
     Get the related model for a field.
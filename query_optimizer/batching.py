@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from graphene.relay.node import AbstractNode
+from graphql import FieldNode, print_ast
+from graphql.execution.values import get_argument_values
+
+from .ast import is_node
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Hashable
+
+    from .types import DjangoObjectType
+    from .typing import PK, Any, Callable, GQLInfo, Optional, TModel
+
+
+__all__ = [
+    "aload_batched_node",
+    "get_sibling_node_pks",
+    "load_batched_node",
+]
+
+
+def get_sibling_node_pks(info: GQLInfo, graphene_type: type[DjangoObjectType]) -> Optional[list[str]]:
+    """
+    Find the primary keys for all the relay node fields at the root of the operation that
+    would be resolved the same way as the current one, i.e., node fields with the same field name
+    and selections (but different aliases) that are given global IDs of the same object type.
+
+    :return: The primary keys from the global IDs, or None if the current field cannot be batched.
+    """
+    # Only root fields are known before they are resolved.
+    if info.path.prev is not None:
+        return None
+
+    field_definition = info.parent_type.fields[info.field_name]
+    if not is_node(field_definition):
+        return None
+
+    node_interface = next((item for item in graphene_type._meta.interfaces if issubclass(item, AbstractNode)), None)
+    if node_interface is None:  # pragma: no cover
+        return None
+
+    selections = _print_selections(info.field_nodes[0])
+    pks: list[str] = []
+    for selection in info.operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value != info.field_name:
+            continue
+        if _print_selections(selection) != selections:
+            continue
+
+        global_id = get_argument_values(field_definition, selection, info.variable_values).get("id")
+        try:
+            type_name, pk = node_interface.resolve_global_id(info, global_id)
+        except Exception:  # noqa: BLE001, S112
+            continue
+
+        if type_name == graphene_type._meta.name and pk not in pks:
+            pks.append(pk)
+
+    return pks
+
+
+def load_batched_node(
+    info: GQLInfo,
+    graphene_type: type[DjangoObjectType],
+    pk: PK,
+    load: Callable[[list[str]], list[TModel]],
+) -> tuple[bool, Optional[TModel]]:
+    """
+    Load a relay node instance for the current field, loading the instances for all sibling node fields
+    of the same type with the same selections at the same time (see `get_sibling_node_pks`).
+    Loaded instances are stored in the request context, so that the sibling fields can use them.
+
+    :param info: The GraphQLResolveInfo for the current node field.
+    :param graphene_type: The object type of the node.
+    :param pk: Primary key of the node to load.
+    :param load: Function that loads the instances for the given primary keys.
+    :return: Whether the node could be loaded in a batch, and the loaded instance (or None if it doesn't exist).
+    """
+    key = _get_batch_key(info, graphene_type)
+    batches: dict[Hashable, dict[str, TModel]] = _get_batches(info)
+    if key not in batches:
+        pks = get_sibling_node_pks(info, graphene_type)
+        if pks is None or str(pk) not in pks:
+            return False, None
+        batches[key] = {str(instance.pk): instance for instance in load(pks)}
+
+    return True, batches[key].get(str(pk))
+
+
+async def aload_batched_node(
+    info: GQLInfo,
+    graphene_type: type[DjangoObjectType],
+    pk: PK,
+    load: Callable[[list[str]], Awaitable[list[TModel]]],
+) -> tuple[bool, Optional[TModel]]:
+    """
+    Async version of `load_batched_node`. The sibling fields are resolved concurrently,
+    so the first one to start loading the batch stores it as a task, which the others wait for.
+    """
+    key = _get_batch_key(info, graphene_type)
+    batches: dict[Hashable, asyncio.Future[dict[str, TModel]]] = _get_batches(info)
+    if key not in batches:
+        pks = get_sibling_node_pks(info, graphene_type)
+        if pks is None or str(pk) not in pks:
+            return False, None
+
+        async def load_batch() -> dict[str, TModel]:
+            return {str(instance.pk): instance for instance in await load(pks)}
+
+        batches[key] = asyncio.ensure_future(load_batch())
+
+    return True, (await batches[key]).get(str(pk))
+
+
+def _get_batch_key(info: GQLInfo, graphene_type: type[DjangoObjectType]) -> Hashable:
+    return info.field_name, _print_selections(info.field_nodes[0]), graphene_type._meta.name
+
+
+def _get_batches(info: GQLInfo) -> dict[Hashable, Any]:
+    # Batches are only used for the operation they were loaded for. The same context can be used
+    # for multiple operations, e.g., in batched requests, and data might have changed in between.
+    operation, batches = getattr(info.context, "optimizer_node_batches", (None, None))
+    if operation is not info.operation:
+        batches = {}
+        info.context.optimizer_node_batches = (info.operation, batches)
+    return batches
+
+
+def _print_selections(field_node: FieldNode) -> str:
+    return print_ast(field_node.selection_set) if field_node.selection_set is not None else ""
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from django.dispatch import receiver
+from django.test.signals import setting_changed  # type: ignore[attr-defined]
+
+from .settings import SETTING_NAME, optimizer_settings
+from .typing import Generic, Hashable, NamedTuple, TypeVar
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+
+    from .optimizer import QueryOptimizer
+    from .typing import Any, GQLInfo, Optional, Union
+
+
+__all__ = [
+    "CacheInfo",
+    "LRUCache",
+    "get_operation_plan",
+    "get_plan_cache",
+    "get_plan_cache_key",
+    "set_operation_plan",
+]
+
+
+TKey = TypeVar("TKey", bound=Hashable)
+TValue = TypeVar("TValue")
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_size: int
+    current_size: int
+
+
+class LRUCache(Generic[TKey, TValue]):
+    """Thread-safe, size-bounded least-recently-used cache with optional time-to-live for its entries."""
+
+    def __init__(self, *, max_size: int, ttl: Optional[float] = None) -> None:
+        """
+        Initialize the cache.
+
+        :param max_size: Maximum number of entries in the cache. Least recently used entries are evicted first.
+        :param ttl: Number of seconds an entry is valid for. None means that entries never expire.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self._data: OrderedDict[TKey, tuple[float, TValue]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: TKey) -> Optional[TValue]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: TKey, value: TValue) -> None:
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: TKey) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(hits=self.hits, misses=self.misses, max_size=self.max_size, current_size=len(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: TKey) -> bool:
+        return key in self._data
+
+
+_PLAN_CACHE: Optional[LRUCache[Hashable, QueryOptimizer]] = None
+
+
+def get_plan_cache() -> LRUCache[Hashable, QueryOptimizer]:
+    """Get the cache for compiled optimization plans. Created lazily based on the optimizer settings."""
+    global _PLAN_CACHE  # noqa: PLW0603
+    if _PLAN_CACHE is None:
+        _PLAN_CACHE = LRUCache(max_size=optimizer_settings.PLAN_CACHE_MAX_SIZE, ttl=optimizer_settings.PLAN_CACHE_TTL)
+    return _PLAN_CACHE
+
+
+def get_plan_cache_key(info: GQLInfo, model: type[Model], max_complexity: int) -> Optional[Hashable]:
+    """
+    Get the key for caching a compiled optimization plan for the given field.
+
+    A plan is determined by the operation document, the position of the field in it,
+    the model that is being optimized, and the values of the operation's variables,
+    which end up in the filtering information of the plan.
+
+    :return: The cache key, or None if the plan for the field cannot be cached.
+    """
+    if optimizer_settings.PLAN_CACHE_MAX_SIZE <= 0:
+        return None
+
+    # Operations parsed without location information don't have the document source available.
+    if info.operation.loc is None:  # pragma: no cover
+        return None
+
+    try:
+        variables = freeze(info.variable_values)
+    except TypeError:  # pragma: no cover
+        return None
+
+    document = hashlib.sha256(info.operation.loc.source.body.encode()).hexdigest()
+    operation = getattr(info.operation.name, "value", None)
+    # List indices are not relevant, since all items in a list use the same plan.
+    path = tuple(key for key in info.path.as_list() if isinstance(key, str))
+    return info.schema, document, operation, path, model, max_complexity, variables
+
+
+def set_operation_plan(info: GQLInfo, max_complexity: int, optimizer: QueryOptimizer) -> None:
+    """
+    Store an optimization plan compiled for the given field before the operation was executed
+    to the request context, so that the field's resolver doesn't need to compile it again.
+    """
+    # Plans are only used for the operation they were compiled for. The same context can be used
+    # for multiple operations, e.g., in batched requests, and a field might not get a plan in all of them.
+    operation, plans = getattr(info.context, "optimizer_plans", (None, None))
+    if operation is not info.operation:
+        plans = {}
+        info.context.optimizer_plans = (info.operation, plans)
+    path = tuple(info.path.as_list())
+    plans[path] = (optimizer.model, max_complexity, optimizer)
+
+
+def get_operation_plan(info: GQLInfo, model: type[Model], max_complexity: int) -> Optional[QueryOptimizer]:
+    """
+    Get the optimization plan compiled for the given field before the operation was executed.
+
+    :return: The compiled optimizer, or None if one doesn't exist, or if it was compiled
+             for a different model or maximum complexity than the ones requested.
+    """
+    plans: Optional[dict[tuple[Union[str, int], ...], tuple[type[Model], int, QueryOptimizer]]]
+    operation, plans = getattr(info.context, "optimizer_plans", (None, None))
+    # Plans are only compiled for root fields.
+    if operation is not info.operation or not plans or info.path.prev is not None:
+        return None
+
+    plan = plans.pop(tuple(info.path.as_list()), None)
+    if plan is None:
+        return None
+
+    plan_model, plan_max_complexity, optimizer = plan
+    if plan_model != model or plan_max_complexity != max_complexity:
+        return None
+    return optimizer
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Convert the given value to a hashable equivalent.
+
+    :raises TypeError: Value cannot be made hashable.
+    """
+    if isinstance(value, dict):
+        return tuple((key, freeze(item)) for key, item in sorted(value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    hash(value)
+    return value
+
+
+@receiver(setting_changed)
+def clear_plan_cache(**kwargs: Any) -> None:
+    """Compiled plans should not be reused after the optimizer settings have changed."""
+    global _PLAN_CACHE  # noqa: PLW0603
+    if kwargs["setting"] == SETTING_NAME:
+        _PLAN_CACHE = None
@@ -1,32 +1,43 @@
 from __future__ import annotations
 
 import contextlib
+from functools import partial
 from typing import TYPE_CHECKING
 
+import graphene
+from asgiref.sync import sync_to_async
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.db.models import ForeignKey, Manager, ManyToOneRel, Model, QuerySet
-from graphene.utils.str_converters import to_snake_case
 from graphene_django.utils import maybe_queryset
 
-from .ast import GraphQLASTWalker
+from .ast import GraphQLASTWalker, get_selections, is_pk_only_selection
+from .cache import get_operation_plan, get_plan_cache, get_plan_cache_key
 from .errors import OptimizerError
+from .filter_info import compile_field_filter_info, prune_filter_info
+from .identity import get_identity_map
 from .optimizer import QueryOptimizer
-from .prefetch_hack import fetch_in_context
+from .prefetch_hack import afetch_in_context, fetch_in_context, prefetch_hack_scope
 from .settings import optimizer_settings
-from .utils import is_optimized, optimizer_logger, swappable_by_subclassing
+from .utils import is_optimized, mark_optimized, optimizer_logger, swappable_by_subclassing
 
 if TYPE_CHECKING:
-    import graphene
     from django.db import models
     from graphene.types.definitions import GrapheneObjectType
     from graphql import FieldNode
 
-    from .typing import PK, GQLInfo, Optional, TModel, ToManyField, ToOneField, Union
+    from .ast import GrapheneType, Selections
+    from .typing import PK, GQLInfo, GraphQLFilterInfo, Iterable, Optional, TModel, ToManyField, ToOneField, Union
 
 
 __all__ = [
     "OptimizationCompiler",
+    "aoptimize",
+    "aoptimize_instances",
+    "aoptimize_many",
+    "aoptimize_single",
     "optimize",
+    "optimize_instances",
+    "optimize_many",
     "optimize_single",
 ]
 
@@ -38,14 +49,52 @@ def optimize(
     max_complexity: Optional[int] = None,
 ) -> QuerySet[TModel]:
     """Optimize the given queryset according to the field selections received in the GraphQLResolveInfo."""
+    # Nested fields are usually already optimized by their parent's optimizer.
+    if is_optimized(maybe_queryset(queryset)):
+        return queryset
+
     optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
-    if optimizer is not None:
+    if optimizer is None:
+        return queryset
+
+    # Optimizing an evaluated queryset would fetch it again, so fetch what's missing for its results instead.
+    if getattr(queryset, "_result_cache", None) is not None:
+        with prefetch_hack_scope():
+            optimizer.prefetch_instances(queryset._result_cache)
+        add_to_identity_map(info, queryset._result_cache)
+        mark_optimized(queryset)
+        return queryset
+
+    with prefetch_hack_scope():
         queryset = optimizer.optimize_queryset(queryset)
-        fetch_in_context(queryset)
-
+        add_to_identity_map(info, fetch_in_context(queryset))
     return queryset
 
 
+def optimize_instances(
+    instances: list[TModel],
+    info: GQLInfo,
+    *,
+    max_complexity: Optional[int] = None,
+) -> list[TModel]:
+    """
+    Optimize model instances that have already been fetched, e.g., by a custom resolver that returned a list,
+    according to the field selections received in the GraphQLResolveInfo. The related objects needed
+    by the selections are fetched for all the instances at once, instead of separately for each instance.
+    """
+    if not instances:
+        return instances
+
+    queryset = type(instances[0])._default_manager.all()
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is not None:
+        with prefetch_hack_scope():
+            optimizer.prefetch_instances(instances)
+        add_to_identity_map(info, instances)
+
+    return instances
+
+
 def optimize_single(
     queryset: QuerySet[TModel],
     info: GQLInfo,
@@ -58,8 +107,13 @@ def optimize_single(
     if optimizer is None:  # pragma: no cover
         return queryset.filter(pk=pk).first()
 
-    queryset = optimizer.optimize_queryset(queryset.filter(pk=pk))
-    fetch_in_context(queryset)
+    loaded, _ = get_loaded_instances(info, optimizer, [pk])
+    if loaded:
+        return loaded[0]
+
+    with prefetch_hack_scope():
+        queryset = optimizer.optimize_queryset(queryset.filter(pk=pk))
+        add_to_identity_map(info, fetch_in_context(queryset))
 
     # Shouldn't use .first(), as it can apply additional ordering, which would cancel the optimization.
     # The queryset should have the right model instance, since we started by filtering by its pk,
@@ -67,9 +121,144 @@ def optimize_single(
     return next(iter(queryset), None)
 
 
+def optimize_many(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    pks: Iterable[PK],
+    max_complexity: Optional[int] = None,
+) -> list[TModel]:
+    """
+    Optimize the given queryset for multiple model instances by their primary keys.
+    Instances are fetched in a single query, in no particular order.
+    """
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is None:  # pragma: no cover
+        return list(queryset.filter(pk__in=pks))
+
+    loaded, pks = get_loaded_instances(info, optimizer, pks)
+    if not pks:
+        return loaded
+
+    with prefetch_hack_scope():
+        queryset = optimizer.optimize_queryset(queryset.filter(pk__in=pks))
+        instances = fetch_in_context(queryset)
+    add_to_identity_map(info, instances)
+    return loaded + instances
+
+
+async def aoptimize(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    max_complexity: Optional[int] = None,
+) -> QuerySet[TModel]:
+    """
+    Optimize the given queryset according to the field selections received in the GraphQLResolveInfo,
+    and fetch it asynchronously. Returned queryset is always evaluated, so that it can be resolved
+    without database access in an async context.
+    """
+    queryset = maybe_queryset(queryset)
+    # Nested fields are usually already optimized and fetched by their parent's optimizer.
+    if is_optimized(queryset):
+        return queryset
+
+    # See `optimize` for evaluated querysets.
+    if queryset._result_cache is not None:
+        return await sync_to_async(optimize)(queryset, info, max_complexity=max_complexity)
+
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    with prefetch_hack_scope():
+        if optimizer is not None:
+            queryset = optimizer.optimize_queryset(queryset)
+        add_to_identity_map(info, await afetch_in_context(queryset))
+    return queryset
+
+
+async def aoptimize_instances(
+    instances: list[TModel],
+    info: GQLInfo,
+    *,
+    max_complexity: Optional[int] = None,
+) -> list[TModel]:
+    """Async version of `optimize_instances`."""
+    return await sync_to_async(optimize_instances)(instances, info, max_complexity=max_complexity)
+
+
+async def aoptimize_single(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    pk: PK,
+    max_complexity: Optional[int] = None,
+) -> Optional[TModel]:
+    """Optimize the given queryset for a single model instance by its primary key, and fetch it asynchronously."""
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is None:  # pragma: no cover
+        return await queryset.filter(pk=pk).afirst()
+
+    loaded, _ = get_loaded_instances(info, optimizer, [pk])
+    if loaded:
+        return loaded[0]
+
+    # See `optimize_single` why `.afirst()` is not used here.
+    with prefetch_hack_scope():
+        queryset = optimizer.optimize_queryset(queryset.filter(pk=pk))
+        instances = await afetch_in_context(queryset)
+    add_to_identity_map(info, instances)
+    return next(iter(instances), None)
+
+
+async def aoptimize_many(
+    queryset: QuerySet[TModel],
+    info: GQLInfo,
+    *,
+    pks: Iterable[PK],
+    max_complexity: Optional[int] = None,
+) -> list[TModel]:
+    """Async version of `optimize_many`."""
+    optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+    if optimizer is None:  # pragma: no cover
+        return [instance async for instance in queryset.filter(pk__in=pks)]
+
+    loaded, pks = get_loaded_instances(info, optimizer, pks)
+    if not pks:
+        return loaded
+
+    with prefetch_hack_scope():
+        queryset = optimizer.optimize_queryset(queryset.filter(pk__in=pks))
+        instances = await afetch_in_context(queryset)
+    add_to_identity_map(info, instances)
+    return loaded + instances
+
+
+def add_to_identity_map(info: GQLInfo, instances: Iterable[Model]) -> None:
+    """Add the fetched instances to the operation's identity map, if it's enabled."""
+    identity_map = get_identity_map(info)
+    if identity_map is not None:
+        identity_map.add(instances)
+
+
+def get_loaded_instances(info: GQLInfo, optimizer: QueryOptimizer, pks: Iterable[PK]) -> tuple[list[Model], list[PK]]:
+    """
+    Find instances for the given primary keys from the operation's identity map, if it's enabled.
+
+    :return: The instances that have already been fetched, and the primary keys that still need to be fetched.
+    """
+    identity_map = get_identity_map(info)
+    if identity_map is None:
+        return [], list(pks)
+    return identity_map.find_loaded(optimizer, pks)
+
+
 @swappable_by_subclassing
 class OptimizationCompiler(GraphQLASTWalker):
-    """Class for compiling SQL optimizations based on the given query."""
+    """
+    Class for compiling SQL optimizations based on the given query.
+
+    Filter information and field selections for the query are compiled during
+    the same walk, so that the query AST only needs to be walked once.
+    """
 
     def __init__(self, info: GQLInfo, max_complexity: Optional[int] = None) -> None:
         """
@@ -82,6 +271,7 @@ def __init__(self, info: GQLInfo, max_complexity: Optional[int] = None) -> None:
         self.max_complexity = max_complexity or optimizer_settings.MAX_COMPLEXITY
         self.optimizer: QueryOptimizer = None  # type: ignore[assignment]
         self.to_attr: Optional[str] = None
+        self.filter_info: dict[str, GraphQLFilterInfo] = {}
         super().__init__(info)
 
     def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> Optional[QueryOptimizer]:
@@ -97,6 +287,18 @@ def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> Optional[Q
         if is_optimized(queryset):
             return None
 
+        # Use the plan compiled for the field when the operation started executing, if one exists.
+        optimizer = get_operation_plan(self.info, queryset.model, self.max_complexity)
+        if optimizer is not None:
+            return optimizer
+
+        # Reuse a plan compiled for a previous request for the same operation, if one exists.
+        cache_key = get_plan_cache_key(self.info, queryset.model, self.max_complexity)
+        if cache_key is not None:
+            optimizer = get_plan_cache().get(cache_key)
+            if optimizer is not None:
+                return optimizer.bind(self.info)
+
         # Setup initial state.
         self.model = queryset.model
         self.optimizer = QueryOptimizer(model=queryset.model, info=self.info)
@@ -116,6 +318,13 @@ def compile(self, queryset: Union[QuerySet, Manager, list[Model]]) -> Optional[Q
                 raise
             return None
 
+        # Root filter info is stored on the root optimizer.
+        self.optimizer.filter_info = self.filter_info.get(self.get_field_name(self.info.field_nodes[0]), {})
+
+        if cache_key is not None:
+            # Cached copy is not bound to any request, so that the request is not kept alive by the cache.
+            get_plan_cache().set(cache_key, self.optimizer.bind(info=None))
+
         return self.optimizer
 
     def increase_complexity(self) -> None:
@@ -124,8 +333,17 @@ def increase_complexity(self) -> None:
             msg = f"Query complexity exceeds the maximum allowed of {self.max_complexity}"
             raise OptimizerError(msg)
 
+    def handle_selections(self, field_type: GrapheneType, selections: Selections) -> None:
+        super().handle_selections(field_type, selections)
+        prune_filter_info(self.filter_info)
+
+    def handle_query_class(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        self.add_filter_info(field_type, field_node)
+        with self.child_filter_info(field_node):
+            return super().handle_query_class(field_type, field_node)
+
     def handle_normal_field(self, field_type: GrapheneObjectType, field_node: FieldNode, field: models.Field) -> None:
-        self.optimizer.only_fields.append(field.get_attname())
+        self.optimizer.only_fields.append(self.model_field.attname)
 
     def handle_to_one_field(
         self,
@@ -134,13 +352,25 @@ def handle_to_one_field(
         related_field: ToOneField,
         related_model: type[Model] | None,
     ) -> None:
-        name = related_field.get_cache_name() or related_field.name
+        name = self.model_field.cache_name
         optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
 
+        if self.can_use_pk_stub(field_type, field_node, related_field):
+            # The related object is created from the foreign key value by `RelatedField`,
+            # so it doesn't need to be joined. The optimizer is only used for walking its selections.
+            self.optimizer.related_fields.append(related_field.attname)
+            graphene_type = self.get_graphene_type(field_type, field_node)
+            with self.use_optimizer(optimizer):
+                self.handle_selections(graphene_type, get_selections(field_node))
+            return
+
         if isinstance(related_field, GenericForeignKey):
             optimizer = self.optimizer.prefetch_related.setdefault(name, optimizer)
         else:
+            # Joined relations might still be prefetched based on their fetch strategy, see `QueryOptimizer.process`.
             optimizer = self.optimizer.select_related.setdefault(name, optimizer)
+            field = field_type.graphene_type._meta.fields.get(self.get_field_descriptor(field_type, field_node).name)
+            optimizer.fetch_strategy = getattr(field, "fetch_strategy", None)
 
         if isinstance(related_field, ForeignKey):
             self.optimizer.related_fields.append(related_field.attname)
@@ -149,9 +379,25 @@ def handle_to_one_field(
             self.optimizer.related_fields.append(related_field.ct_field)
             self.optimizer.related_fields.append(related_field.fk_field)
 
-        with self.use_optimizer(optimizer):
+        self.add_filter_info(field_type, field_node)
+        with self.use_optimizer(optimizer), self.child_filter_info(field_node):
             super().handle_to_one_field(field_type, field_node, related_field, related_model)
 
+    def can_use_pk_stub(self, field_type: GrapheneObjectType, field_node: FieldNode, related_field: ToOneField) -> bool:
+        """Can the related object be created from the foreign key value instead of joining it?"""
+        from .fields import RelatedField
+
+        if not isinstance(related_field, ForeignKey) or not related_field.target_field.primary_key:
+            return False
+
+        # Custom resolvers might need other fields from the related object.
+        descriptor = self.get_field_descriptor(field_type, field_node)
+        if getattr(descriptor.graphql_field.resolve, "__func__", None) is not RelatedField.related_resolver:
+            return False
+
+        object_type = getattr(descriptor.graphene_type, "graphene_type", None)
+        return isinstance(object_type, type) and is_pk_only_selection([field_node], object_type)
+
     def handle_to_many_field(
         self,
         field_type: GrapheneObjectType,
@@ -159,7 +405,7 @@ def handle_to_many_field(
         related_field: ToManyField,
         related_model: type[Model] | None,
     ) -> None:
-        name = related_field.get_cache_name() or related_field.name
+        name = self.model_field.cache_name
         alias = getattr(field_node.alias, "value", None)
         key = self.to_attr if self.to_attr is not None else alias if alias is not None else name
         self.to_attr = None
@@ -167,6 +413,10 @@ def handle_to_many_field(
         optimizer = QueryOptimizer(model=related_model, info=self.info, name=name, parent=self.optimizer)
         optimizer = self.optimizer.prefetch_related.setdefault(key, optimizer)
 
+        # Connection fields resolve their related objects with the resolver they wrap.
+        field = getattr(self.get_field_descriptor(field_type, field_node).graphql_field.resolve, "__self__", None)
+        optimizer.uses_default_resolver = isinstance(getattr(field, "resolver", None), partial)
+
         if isinstance(related_field, ManyToOneRel):
             optimizer.related_fields.append(related_field.field.attname)
 
@@ -174,14 +424,25 @@ def handle_to_many_field(
             optimizer.related_fields.append(related_field.object_id_field_name)
             optimizer.related_fields.append(related_field.content_type_field_name)
 
-        with self.use_optimizer(optimizer):
+        self.add_filter_info(field_type, field_node)
+        with self.use_optimizer(optimizer), self.child_filter_info(field_node):
             super().handle_to_many_field(field_type, field_node, related_field, related_model)
 
+    def handle_connection(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        self.optimizer.connection_fields.add(field_node.name.value)
+        return super().handle_connection(field_type, field_node)
+
     def handle_total_count(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
         self.optimizer.total_count = True
 
+    def handle_page_info(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        self.optimizer.page_info_fields.add(field_node.name.value)
+
     def handle_custom_field(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
-        field_name = to_snake_case(field_node.name.value)
+        field_name = self.get_field_descriptor(field_type, field_node).name
+        if isinstance(getattr(field_type.graphene_type, field_name, None), graphene.Field):
+            self.add_filter_info(field_type, field_node)
+
         field: Optional[graphene.Field] = field_type.graphene_type._meta.fields.get(field_name)
         if field is None:  # pragma: no cover
             msg = (
@@ -204,6 +465,10 @@ def handle_custom_field(self, field_type: GrapheneObjectType, field_node: FieldN
 
         return None  # pragma: no cover
 
+    def add_filter_info(self, parent_type: GrapheneObjectType, field_node: FieldNode) -> None:
+        field_name = self.get_field_name(field_node)
+        self.filter_info[field_name] = compile_field_filter_info(self.info, parent_type, field_node)
+
     @contextlib.contextmanager
     def use_optimizer(self, optimizer: QueryOptimizer) -> None:
         orig_optimizer = self.optimizer
@@ -212,3 +477,16 @@ def use_optimizer(self, optimizer: QueryOptimizer) -> None:
             yield
         finally:
             self.optimizer = orig_optimizer
+
+    @contextlib.contextmanager
+    def child_filter_info(self, field_node: FieldNode) -> None:
+        field_name = self.get_field_name(field_node)
+        arguments: dict[str, GraphQLFilterInfo] = {}
+        orig_arguments = self.filter_info
+        try:
+            self.filter_info = arguments
+            yield
+        finally:
+            self.filter_info = orig_arguments
+            if arguments:
+                self.filter_info[field_name]["children"] = arguments
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
+
+from django.db import close_old_connections, connections, models
+from django.db.models import Prefetch, prefetch_related_objects
+from django.dispatch import receiver
+from django.test.signals import setting_changed  # type: ignore[attr-defined]
+
+from .settings import SETTING_NAME, optimizer_settings
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .typing import Any, Callable, Optional, ParamSpec, TModel, TypeVar, Union
+
+    T = TypeVar("T")
+    P = ParamSpec("P")
+
+
+__all__ = [
+    "can_run_concurrently",
+    "fetch_with_concurrent_prefetch",
+    "get_executor",
+    "submit",
+]
+
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+_WORKER_STATE = threading.local()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the thread pool for running database queries concurrently. Created lazily based on the settings."""
+    global _EXECUTOR  # noqa: PLW0603
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=optimizer_settings.CONCURRENCY_MAX_WORKERS,
+                thread_name_prefix="query_optimizer",
+            )
+        return _EXECUTOR
+
+
+def submit(func: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs) -> Future[T]:
+    """
+    Run the given function in the optimizer's thread pool. The function is run in a copy
+    of the current context, so that context variables (e.g. for the prefetch hack) are available.
+    The worker thread uses its own database connections, which are closed afterwards
+    if they shouldn't be persisted according to the `CONN_MAX_AGE` database setting.
+    """
+    context = contextvars.copy_context()
+
+    def run() -> T:
+        _WORKER_STATE.active = True
+        try:
+            return context.run(func, *args, **kwargs)
+        finally:
+            _WORKER_STATE.active = False
+            close_old_connections()
+
+    return get_executor().submit(run)
+
+
+def can_run_concurrently(using: str) -> bool:
+    """
+    Can queries to the given database be run concurrently on other connections?
+    Not possible inside a transaction, since other connections cannot see its uncommitted changes.
+    Also not done from the thread pool's own threads, since waiting there for other tasks
+    in the same bounded pool could deadlock if all threads are waiting.
+    """
+    return (
+        optimizer_settings.CONCURRENCY_MAX_WORKERS > 0
+        and not connections[using].in_atomic_block
+        and not getattr(_WORKER_STATE, "active", False)
+    )
+
+
+def fetch_with_concurrent_prefetch(queryset: models.QuerySet[TModel]) -> list[TModel]:
+    """
+    Evaluate the given queryset, running its prefetch lookups concurrently in the optimizer's thread pool.
+
+    Lookups are grouped by the relation they start from, since lookups through the same relation
+    need to be prefetched in order. The groups don't depend on each other once the instances
+    of the queryset have been fetched, and they set different attributes on the instances.
+    """
+    groups: dict[str, list[Union[str, Prefetch]]] = {}
+    for lookup in queryset._prefetch_related_lookups:
+        path = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        groups.setdefault(path.split("__", maxsplit=1)[0], []).append(lookup)
+
+    if (
+        not optimizer_settings.CONCURRENT_PREFETCH
+        or len(groups) <= 1
+        or queryset._result_cache is not None
+        or not can_run_concurrently(queryset.db)
+    ):
+        return list(queryset)
+
+    # Skip Django's own sequential prefetching when the queryset is evaluated.
+    queryset._prefetch_done = True
+    instances = list(queryset)
+    if not instances:
+        return instances
+
+    # Create the prefetch caches beforehand, since threads creating them at the same time
+    # could overwrite each other's caches.
+    for instance in instances:
+        if not hasattr(instance, "_prefetched_objects_cache"):
+            instance._prefetched_objects_cache = {}
+
+    futures = [submit(prefetch_related_objects, instances, *lookups) for lookups in groups.values()]
+    wait(futures)
+    for future in futures:
+        future.result()
+    return instances
+
+
+@receiver(setting_changed)
+def clear_executor(**kwargs: Any) -> None:
+    """Thread pool should be recreated with the new number of workers after the optimizer settings have changed."""
+    global _EXECUTOR  # noqa: PLW0603
+    if kwargs["setting"] == SETTING_NAME:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is not None:
+                _EXECUTOR.shutdown(wait=False)
+            _EXECUTOR = None
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from asyncio import gather
+from typing import TYPE_CHECKING
+
+from django.db import router
+from django.db.models import QuerySet
+from graphql import ExecutionContext, GraphQLError, located_error
+from graphql.execution.collect_fields import collect_fields
+from graphql.execution.execute import get_field_def
+from graphql.execution.values import get_argument_values
+from graphql.pyutils import Path, Undefined
+
+from .ast import get_return_object_type
+from .cache import set_operation_plan
+from .compiler import OptimizationCompiler
+from .concurrency import can_run_concurrently, submit
+from .errors import OptimizerError
+from .routing import get_read_database
+from .utils import optimizer_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from concurrent.futures import Future
+
+    from graphql import FieldNode, GraphQLObjectType, GraphQLOutputType, OperationDefinitionNode
+    from graphql.pyutils import AwaitableOrValue
+
+    from .typing import Any, GQLInfo, Optional
+
+
+__all__ = [
+    "ConcurrentExecutionContext",
+    "OptimizationExecutionContext",
+    "compile_operation",
+]
+
+
+class OptimizationExecutionContext(ExecutionContext):
+    """
+    Execution context that compiles the optimizations for all root fields in the operation
+    that return DjangoObjectTypes (or connections of them) before any of them are resolved.
+    The field resolvers then use the compiled optimizations instead of compiling their own.
+
+    Use by setting it as the `execution_context_class` for `GraphQLView` or `graphene.Schema.execute`.
+    """
+
+    def execute_operation(self, operation: OperationDefinitionNode, root_value: Any) -> AwaitableOrValue[Any]:
+        compile_operation(self, operation)
+        return super().execute_operation(operation, root_value)
+
+
+class ConcurrentExecutionContext(OptimizationExecutionContext):
+    """
+    Execution context that compiles the optimizations for the root fields up front like
+    `OptimizationExecutionContext`, and then resolves the root fields of queries that have
+    compiled optimizations concurrently in the optimizer's thread pool. Each field is resolved
+    and its queryset evaluated in its own thread, using the thread's own database connection.
+    The results are then completed in the current thread, in the order of the fields,
+    so that errors and nested fields are handled on the execution context one at a time.
+
+    Root fields are executed in the current thread inside transactions (e.g. with `ATOMIC_REQUESTS`),
+    since other database connections cannot see the transaction's uncommitted changes.
+    Mutations are always executed serially.
+    """
+
+    def execute_fields(
+        self,
+        parent_type: GraphQLObjectType,
+        source_value: Any,
+        path: Optional[Path],
+        fields: dict[str, list[FieldNode]],
+    ) -> AwaitableOrValue[dict[str, Any]]:
+        # Only root fields have their optimizations compiled before they are executed.
+        if path is not None:
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        paths = {name: Path(None, name, parent_type.name) for name in fields}
+        concurrent = [name for name in fields if self.can_execute_concurrently(parent_type, fields[name], paths[name])]
+        if len(concurrent) <= 1:
+            return super().execute_fields(parent_type, source_value, path, fields)
+
+        futures: dict[str, Future[Any]] = {
+            name: submit(self.resolve_field, parent_type, source_value, fields[name], paths[name])
+            for name in concurrent
+        }
+
+        # Results are completed in the order of the fields in the operation. Fields that
+        # cannot be resolved concurrently are executed while the others are being fetched.
+        results: dict[str, Any] = {}
+        for name, field_nodes in fields.items():
+            if name in futures:
+                result = self.complete_field(parent_type, field_nodes, paths[name], futures[name])
+            else:
+                result = self.execute_field(parent_type, source_value, field_nodes, paths[name])
+            if result is not Undefined:
+                results[name] = result
+
+        awaitable_fields = [name for name, result in results.items() if self.is_awaitable(result)]
+        if not awaitable_fields:
+            return results
+
+        async def get_results() -> dict[str, Any]:  # pragma: no cover
+            results.update(zip(awaitable_fields, await gather(*(results[name] for name in awaitable_fields))))
+            return results
+
+        return get_results()
+
+    def can_execute_concurrently(
+        self,
+        parent_type: GraphQLObjectType,
+        field_nodes: list[FieldNode],
+        path: Path,
+    ) -> bool:
+        """Can the given root field be resolved in the optimizer's thread pool?"""
+        operation, plans = getattr(self.context_value, "optimizer_plans", (None, None))
+        if operation is not self.operation:
+            return False
+
+        plan = plans.get((path.key,))
+        if plan is None:
+            return False
+
+        field_def = get_field_def(self.schema, parent_type, field_nodes[0])
+        if field_def is None:  # pragma: no cover
+            return False
+
+        model = plan[0]
+        info = self.build_resolve_info(field_def, field_nodes, parent_type, path)
+        return can_run_concurrently(get_read_database(model, info) or router.db_for_read(model))
+
+    def resolve_field(
+        self,
+        parent_type: GraphQLObjectType,
+        source_value: Any,
+        field_nodes: list[FieldNode],
+        path: Path,
+    ) -> Any:
+        """
+        Resolve the given root field, without completing its value. Run in the thread pool,
+        so returned querysets are evaluated here, instead of when the value is completed.
+        Errors are raised to the thread completing the value.
+        """
+        field_def = get_field_def(self.schema, parent_type, field_nodes[0])
+        resolve_fn = field_def.resolve or self.field_resolver
+        if self.middleware_manager:
+            resolve_fn = self.middleware_manager.get_field_resolver(resolve_fn)
+
+        info = self.build_resolve_info(field_def, field_nodes, parent_type, path)
+        args = get_argument_values(field_def, field_nodes[0], self.variable_values)
+        result = resolve_fn(source_value, info, **args)
+        if isinstance(result, QuerySet):
+            result._fetch_all()
+        return result
+
+    def complete_field(
+        self,
+        parent_type: GraphQLObjectType,
+        field_nodes: list[FieldNode],
+        path: Path,
+        future: Future[Any],
+    ) -> AwaitableOrValue[Any]:
+        """Complete the value of a root field resolved in the thread pool, like `execute_field` would."""
+        field_def = get_field_def(self.schema, parent_type, field_nodes[0])
+        info = self.build_resolve_info(field_def, field_nodes, parent_type, path)
+        try:
+            result = future.result()
+            if self.is_awaitable(result):  # pragma: no cover
+                return self.complete_awaitable(field_def.type, field_nodes, info, result)
+
+            completed = self.complete_value(field_def.type, field_nodes, info, path, result)
+            if self.is_awaitable(completed):  # pragma: no cover
+                return self.complete_awaitable(field_def.type, field_nodes, info, completed, completed=True)
+        except Exception as raw_error:  # noqa: BLE001
+            error = located_error(raw_error, field_nodes, path.as_list())
+            self.handle_field_error(error, field_def.type, path)
+            return None
+        return completed
+
+    async def complete_awaitable(  # pragma: no cover
+        self,
+        return_type: GraphQLOutputType,
+        field_nodes: list[FieldNode],
+        info: GQLInfo,
+        value: Awaitable[Any],
+        *,
+        completed: bool = False,
+    ) -> Any:
+        """Await the value of a root field, and complete it if it hasn't been completed yet."""
+        try:
+            result = await value
+            if completed:
+                return result
+            result = self.complete_value(return_type, field_nodes, info, info.path, result)
+            return await result if self.is_awaitable(result) else result
+        except Exception as raw_error:  # noqa: BLE001
+            error = located_error(raw_error, field_nodes, info.path.as_list())
+            self.handle_field_error(error, return_type, info.path)
+            return None
+
+
+def compile_operation(context: ExecutionContext, operation: OperationDefinitionNode) -> None:
+    """
+    Compile optimizations for all root fields in the given operation that return DjangoObjectTypes,
+    and store them in the request context for the field resolvers to use.
+
+    :param context: Execution context for the operation.
+    :param operation: The operation being executed.
+    """
+    # Compiled plans are stored in the request context, so there needs to be one.
+    if context.context_value is None:
+        return
+
+    root_type = context.schema.get_root_type(operation.operation)
+    if root_type is None:  # pragma: no cover
+        return
+
+    root_fields = collect_fields(
+        context.schema,
+        context.fragments,
+        context.variable_values,
+        root_type,
+        operation.selection_set,
+    )
+
+    for response_key, field_nodes in root_fields.items():
+        field_def = get_field_def(context.schema, root_type, field_nodes[0])
+        if field_def is None:  # pragma: no cover
+            continue
+
+        path = Path(None, response_key, root_type.name)
+        info = context.build_resolve_info(field_def, field_nodes, root_type, path)
+        object_type = get_return_object_type(info)
+        if object_type is None:
+            continue
+
+        max_complexity = getattr(object_type._meta, "max_complexity", None)
+        compiler = OptimizationCompiler(info, max_complexity=max_complexity)
+        # If the optimizations cannot be compiled because of an expected error, e.g., the query is too complex,
+        # the resolver will raise the error again, so that it's reported for the field instead of the whole operation.
+        try:
+            optimizer = compiler.compile(object_type._meta.model._default_manager.all())
+        except (OptimizerError, GraphQLError) as error:
+            optimizer_logger.debug("Could not compile optimizations for %r up front: %s", response_key, error)
+            continue
+
+        if optimizer is not None:
+            set_operation_plan(info, compiler.max_complexity, optimizer)
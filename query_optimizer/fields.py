@@ -1,30 +1,45 @@
 # ruff: noqa: UP006
 from __future__ import annotations
 
+import sys
 import warnings
 from functools import cached_property, partial
 from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 
 import graphene
+from asgiref.sync import sync_to_async
+from django.db import models
 from graphene.relay.connection import connection_adapter, page_info_adapter
+from graphene.relay.node import AbstractNode
 from graphene.types.argument import to_arguments
 from graphene.utils.str_converters import to_camel_case, to_snake_case
 from graphene_django.settings import graphene_settings
 from graphene_django.utils.utils import DJANGO_FILTER_INSTALLED, maybe_queryset
 from graphql_relay.connection.array_connection import offset_to_cursor
 
-from .ast import get_underlying_type
-from .compiler import OptimizationCompiler, optimize
-from .prefetch_hack import fetch_in_context
+from .ast import get_model_field, get_underlying_type, is_pk_only_selection
+from .compiler import (
+    OptimizationCompiler,
+    add_to_identity_map,
+    aoptimize,
+    aoptimize_instances,
+    optimize,
+    optimize_instances,
+)
+from .concurrency import can_run_concurrently, submit
+from .keyset import annotate_keyset_values, get_keyset_ordering, get_keyset_values, keyset_filter, keyset_to_cursor
+from .prefetch_hack import fetch_in_context, prefetch_hack_scope
+from .result_cache import cached_count
 from .settings import optimizer_settings
-from .utils import calculate_queryset_slice, is_optimized
-from .validators import validate_pagination_args
+from .utils import calculate_queryset_slice, can_use_window_count, is_optimized
+from .validators import validate_keyset_pagination_args, validate_pagination_args
 
 if TYPE_CHECKING:
-    from django.db import models
     from django.db.models import Model, QuerySet
     from django.db.models.manager import Manager
     from graphene.relay.connection import Connection
+    from graphql import FieldNode
     from graphql_relay import EdgeType
     from graphql_relay.connection.connection import ConnectionType
 
@@ -38,6 +53,7 @@
         ExpressionKind,
         GQLInfo,
         Iterable,
+        Literal,
         ManualOptimizerMethod,
         ModelResolver,
         ObjectTypeInput,
@@ -47,11 +63,15 @@
         Union,
         UnmountedTypeInput,
     )
+    from .validators import KeysetPaginationArgs, PaginationArgs
 
 __all__ = [
     "AnnotatedField",
+    "AsyncDjangoConnectionField",
+    "AsyncDjangoListField",
     "DjangoConnectionField",
     "DjangoListField",
+    "DjangoNodesField",
     "ManuallyOptimizedField",
     "MultiField",
     "RelatedField",
@@ -67,6 +87,7 @@ def __init__(
         /,
         *,
         field_name: Optional[str] = None,
+        fetch_strategy: Optional[Literal["select_related", "prefetch", "auto"]] = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -78,6 +99,9 @@ def __init__(
         :param field_name: The name of the model field or related accessor this related field is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param fetch_strategy: How the related object is fetched: joined with "select_related",
+                               fetched with a separate "prefetch" query, or chosen by the planner ("auto").
+                               Uses the `TO_ONE_FETCH_STRATEGY` setting if not given.
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
         if kwargs.pop("reverse", None) is not None:  # pragma: no cover
@@ -88,6 +112,9 @@ def __init__(
             warnings.warn(msg, category=DeprecationWarning, stacklevel=1)
 
         self.field_name = field_name
+        self.fetch_strategy = fetch_strategy
+        # Whether only the primary key is selected for each field node this field is resolved for.
+        self.pk_only_selections: WeakKeyDictionary[FieldNode, bool] = WeakKeyDictionary()
         super().__init__(type_, **kwargs)
 
     def wrap_resolve(self, parent_resolver: ModelResolver) -> ModelResolver:
@@ -98,13 +125,47 @@ def wrap_resolve(self, parent_resolver: ModelResolver) -> ModelResolver:
 
     def related_resolver(self, root: models.Model, info: GQLInfo) -> Optional[models.Model]:
         field_name = self.field_name or to_snake_case(info.field_name)
-        # Related object should be optimized to the root model.
-        related_instance: Optional[models.Model] = getattr(root, field_name, None)
+        related_instance = self.get_pk_stub(root, field_name, info)
+        if related_instance is None:
+            # Related object should be optimized to the root model.
+            related_instance: Optional[models.Model] = getattr(root, field_name, None)
         if related_instance is None:  # pragma: no cover
             return None
         self.underlying_type.run_instance_checks(related_instance, info)
         return related_instance
 
+    def get_pk_stub(self, root: models.Model, field_name: str, info: GQLInfo) -> Optional[models.Model]:
+        """
+        If only the primary key of the related object is selected, and the related object
+        hasn't been fetched already, create it from the value of the foreign key pointing to it.
+        """
+        field = get_model_field(type(root), field_name)
+        if not isinstance(field, models.ForeignKey) or not field.target_field.primary_key or field.is_cached(root):
+            return None
+        if field.attname in root.get_deferred_fields() or not self.is_pk_only_selection(info):
+            return None
+
+        value = getattr(root, field.attname)
+        if value is None:
+            return None
+
+        related_model: type[models.Model] = field.related_model
+        related_instance = related_model.from_db(root._state.db, [related_model._meta.pk.attname], [value])
+        field.set_cached_value(root, related_instance)
+        return related_instance
+
+    def is_pk_only_selection(self, info: GQLInfo) -> bool:
+        """
+        Is only the primary key selected from the related object? Checked once for each field node,
+        since the same field nodes are used to resolve this field for every row.
+        """
+        field_node = info.field_nodes[0]
+        pk_only = self.pk_only_selections.get(field_node)
+        if pk_only is None:
+            pk_only = is_pk_only_selection(info.field_nodes, self.underlying_type)
+            self.pk_only_selections[field_node] = pk_only
+        return pk_only
+
     @cached_property
     def underlying_type(self) -> type[DjangoObjectType]:
         return get_underlying_type(self.type)
@@ -149,6 +210,7 @@ def __init__(
         *,
         no_filters: bool = False,
         field_name: Optional[str] = None,
+        prefetch_strategy: Literal["prefetch", "json"] = "prefetch",
         **kwargs: Any,
     ) -> None:
         """
@@ -161,10 +223,15 @@ def __init__(
         :param field_name: The name of the model field or related accessor this list field is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param prefetch_strategy: How the items are fetched when this field is nested in another field.
+                                  "prefetch" fetches them with a separate prefetch query.
+                                  "json" aggregates them into a JSON array in the parent's query,
+                                  along with any nested list fields that also use "json".
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
         self.no_filters = no_filters
         self.field_name = field_name
+        self.prefetch_strategy = prefetch_strategy
         if isinstance(type_, graphene.NonNull):  # pragma: no cover
             type_ = type_.of_type
         super().__init__(graphene.List(graphene.NonNull(type_)), **kwargs)
@@ -174,23 +241,24 @@ def wrap_resolve(self, parent_resolver: QuerySetResolver) -> QuerySetResolver:
         return self.list_resolver
 
     def list_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> models.QuerySet:
+        queryset = self.resolve_queryset(root, info, **kwargs)
+        max_complexity: Optional[int] = getattr(self.underlying_type._meta, "max_complexity", None)
+        if self.is_unoptimized_list(queryset, root, info):
+            return optimize_instances(queryset, info, max_complexity=max_complexity)
+        return optimize(queryset, info, max_complexity=max_complexity)
+
+    def resolve_queryset(self, root: Any, info: GQLInfo, **kwargs: Any) -> models.QuerySet:
+        """Resolve the unoptimized queryset for this field."""
         # If field is aliased, a prefetch should have been done to that alias.
         # If not, call the ObjectType's "resolve_{field_name}" method, if it exists.
         # Otherwise, call the default resolver (usually `dict_or_attr_resolver`).
-        alias = getattr(info.field_nodes[0].alias, "value", None)
-        result = (
-            getattr(root, alias)
-            # Aliases don't matter at the root level, since we don't need to
-            # distinguish them from a parent model prefetches.
-            if root != info.root_value and alias is not None
-            else self.resolver(root, info, **kwargs)
-        )
+        if self.is_prefetched_to_alias(root, info):
+            result = getattr(root, info.field_nodes[0].alias.value)
+        else:
+            result = self.resolver(root, info, **kwargs)
 
         queryset = self.to_queryset(result)
-        queryset = self.underlying_type.get_queryset(queryset, info)
-
-        max_complexity: Optional[int] = getattr(self.underlying_type._meta, "max_complexity", None)
-        return optimize(queryset, info, max_complexity=max_complexity)
+        return self.underlying_type.get_queryset(queryset, info)
 
     def to_queryset(self, iterable: Union[models.QuerySet, Manager, None]) -> models.QuerySet:
         # Default resolver can return a Manager-instance or None.
@@ -198,6 +266,19 @@ def to_queryset(self, iterable: Union[models.QuerySet, Manager, None]) -> models
             iterable = self.model._default_manager
         return maybe_queryset(iterable)
 
+    def is_prefetched_to_alias(self, root: Any, info: GQLInfo) -> bool:
+        """Has the parent's optimizer prefetched the items for this field to the field's alias?"""
+        # Aliases don't matter at the root level, since we don't need to
+        # distinguish them from a parent model prefetches.
+        return root != info.root_value and info.field_nodes[0].alias is not None
+
+    def is_unoptimized_list(self, result: Union[models.QuerySet, list[models.Model]], root: Any, info: GQLInfo) -> bool:
+        """
+        Is the result a list of model instances the optimizer hasn't seen, e.g., from a custom resolver?
+        Their related objects can still be fetched for all of them at once with `optimize_instances`.
+        """
+        return isinstance(result, list) and not self.is_prefetched_to_alias(root, info)
+
     @cached_property
     def underlying_type(self) -> type[DjangoObjectType]:
         return get_underlying_type(self.type)
@@ -218,6 +299,9 @@ def __init__(
         max_limit: Optional[int] = ...,
         no_filters: bool = False,
         field_name: Optional[str] = None,
+        keyset: bool = False,
+        pagination_strategy: Optional[Literal["window", "lateral"]] = None,
+        count_mode: Literal["exact", "cached", "approximate"] = "exact",
         **kwargs: Any,
     ) -> None:
         """
@@ -232,6 +316,17 @@ def __init__(
         :param field_name: The name of the model field or related accessor this connection is for.
                            Only needed if the field name on the ObjectType this field is
                            defined on is different from the field name on the model.
+        :param keyset: Use keyset pagination for this connection. Cursors contain the values of the
+                       ordering keys of the node instead of its offset, so that pages are fetched
+                       by filtering on the ordering keys instead of skipping rows with an offset.
+        :param pagination_strategy: How this connection is limited when it's nested in another field.
+                                    See `NESTED_PAGINATION_STRATEGY` setting for the options.
+                                    Uses the setting's value by default.
+        :param count_mode: How the total count of this connection is determined when it's not nested.
+                           "exact" counts the items on every request. "cached" stores the count
+                           in the result cache until the tables used in the query are modified.
+                           "approximate" is like "cached", but uses the planner's row estimate
+                           for unfiltered querysets on PostgreSQL instead of counting them.
         :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
         """
         # Maximum number of items that can be requested in a single query for this connection.
@@ -239,6 +334,9 @@ def __init__(
         self.max_limit = max_limit if max_limit is not ... else graphene_settings.RELAY_CONNECTION_MAX_LIMIT
         self.no_filters = no_filters
         self.field_name = field_name
+        self.keyset = keyset
+        self.pagination_strategy = pagination_strategy
+        self.count_mode = count_mode
 
         # Default inputs for a connection field
         kwargs.setdefault("first", graphene.Int())
@@ -254,7 +352,72 @@ def wrap_resolve(self, parent_resolver: QuerySetResolver) -> ConnectionResolver:
         return self.connection_resolver
 
     def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> ConnectionType:
+        connection = self.resolve_from_annotations(root, info, **kwargs)
+        if connection is not None:
+            return connection
+
+        with prefetch_hack_scope():
+            queryset, pagination_args, optimizer, already_optimized = self.prepare_connection(root, info, **kwargs)
+            connection = self.resolve_connection(
+                queryset,
+                pagination_args,
+                optimizer=optimizer,
+                already_optimized=already_optimized,
+            )
+        # Nested connections are added to the identity map with their parent.
+        if not already_optimized:
+            add_to_identity_map(info, (edge.node for edge in connection.edges))
+        return connection
+
+    def resolve_from_annotations(self, root: Any, info: GQLInfo, **kwargs: Any) -> Optional[ConnectionType]:
+        """
+        Resolve a nested connection that only selects its total count or page info from the annotations
+        the optimizer added to its parent model instance, so that the related objects don't need to be fetched.
+
+        :return: The connection, or None if the parent hasn't been annotated for this connection.
+        """
+        if self.keyset or not isinstance(root, models.Model) or not isinstance(self.resolver, partial):
+            return None
+
+        name = getattr(info.field_nodes[0].alias, "value", None) or to_snake_case(info.field_name)
+        count_key = f"{optimizer_settings.PREFETCH_COUNT_KEY}_{name}"
+        has_next_key = f"{optimizer_settings.PREFETCH_HAS_NEXT_KEY}_{name}"
+        if count_key not in root.__dict__ and has_next_key not in root.__dict__:
+            return None
+
         pagination_args = validate_pagination_args(
+            first=kwargs.get("first"),
+            last=kwargs.get("last"),
+            offset=kwargs.get("offset"),
+            after=kwargs.get("after"),
+            before=kwargs.get("before"),
+            max_limit=self.max_limit,
+        )
+        queryset = self.model._default_manager.none()
+
+        if count_key in root.__dict__:
+            pagination_args["size"] = count = root.__dict__[count_key]
+            cut = calculate_queryset_slice(**pagination_args)
+            return self.build_connection(queryset, [], count, cut.start > 0, cut.stop < count)
+
+        cut = calculate_queryset_slice(**{**pagination_args, "size": sys.maxsize})
+        return self.build_connection(queryset, [], None, cut.start > 0, root.__dict__[has_next_key])
+
+    def prepare_connection(
+        self,
+        root: Any,
+        info: GQLInfo,
+        **kwargs: Any,
+    ) -> tuple[models.QuerySet, Union[PaginationArgs, KeysetPaginationArgs], Optional[QueryOptimizer], bool]:
+        """
+        Validate the pagination arguments, and resolve and optimize the queryset for this connection.
+        Doesn't access the database, unless the field's resolver does so.
+
+        :return: The optimized queryset, the pagination arguments, the optimizer used (if any),
+                 and whether the queryset had already been optimized, e.g., by the parent field.
+        """
+        validate = validate_keyset_pagination_args if self.keyset else validate_pagination_args
+        pagination_args = validate(
             first=kwargs.pop("first", None),
             last=kwargs.pop("last", None),
             offset=kwargs.pop("offset", None),
@@ -290,52 +453,303 @@ def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> Connec
         # Note if the queryset has already been optimized.
         already_optimized = is_optimized(queryset)
 
-        optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
-        if optimizer is not None:
-            queryset = optimizer.optimize_queryset(queryset)
+        optimizer: Optional[QueryOptimizer] = None
+        if not already_optimized:
+            optimizer = OptimizationCompiler(info, max_complexity=max_complexity).compile(queryset)
+            if optimizer is not None:
+                queryset = optimizer.optimize_queryset(queryset)
+
+        return queryset, pagination_args, optimizer, already_optimized
+
+    def resolve_connection(
+        self,
+        queryset: models.QuerySet,
+        pagination_args: Union[PaginationArgs, KeysetPaginationArgs],
+        *,
+        optimizer: Optional[QueryOptimizer],
+        already_optimized: bool,
+    ) -> ConnectionType:
+        """Fetch the page requested with the pagination arguments from the queryset, and build the connection."""
+        if self.keyset:
+            queryset, results, count, has_previous_page, has_next_page = self.paginate_with_keyset(
+                queryset,
+                pagination_args,
+                optimizer=optimizer,
+                already_optimized=already_optimized,
+            )
+            edges: list[EdgeType] = [
+                self.connection_type.Edge(node=value, cursor=keyset_to_cursor(get_keyset_values(value)))
+                for value in results
+            ]
+            return self.build_connection(queryset, edges, count, has_previous_page, has_next_page)
 
         # Queryset optimization contains filtering, so we count after optimization.
-        pagination_args["size"] = count = (
-            queryset.count()
-            if not already_optimized
-            # Prefetch(..., to_attr=...) will return a list of models.
-            # TODO: This might be wrong.
-            else len(queryset)
-            if isinstance(queryset, list)
-            # If this is a nested connection field, prefetch queryset models should have been
-            # annotated with the queryset count (pick it from the first one).
-            else getattr(
-                next(iter(getattr(queryset, "_result_cache", []) or []), None),
-                optimizer_settings.PREFETCH_COUNT_KEY,
-                0,  # QuerySet result cache is empty -> count is 0.
+        if already_optimized:
+            pagination_args["size"] = count = (
+                # Prefetch(..., to_attr=...) will return a list of models.
+                # TODO: This might be wrong.
+                len(queryset)
+                if isinstance(queryset, list)
+                # If this is a nested connection field, prefetch queryset models should have been
+                # annotated with the queryset count (pick it from the first one).
+                else getattr(
+                    next(iter(getattr(queryset, "_result_cache", []) or []), None),
+                    optimizer_settings.PREFETCH_COUNT_KEY,
+                    0,  # QuerySet result cache is empty -> count is 0.
+                )
+            )
+            # Prefetch queryset has already been sliced.
+            cut = calculate_queryset_slice(**pagination_args)
+            results = fetch_in_context(queryset)
+            has_next_page = cut.stop < count
+
+        elif not self.needs_total_count(optimizer, pagination_args):
+            queryset, results, cut, count, has_next_page = self.paginate_without_count(
+                queryset,
+                pagination_args,
+                page_info_fields=optimizer.page_info_fields,
             )
-        )
-        cut = calculate_queryset_slice(**pagination_args)
 
-        # Prefetch queryset has already been sliced.
-        if not already_optimized:
+        elif (
+            self.count_mode == "exact"
+            and optimizer_settings.WINDOW_TOTAL_COUNT
+            and can_use_window_count(queryset, last=pagination_args["last"])
+        ):
+            queryset, cut, count = self.paginate_with_window_count(queryset, pagination_args)
+            results = fetch_in_context(queryset)
+            has_next_page = cut.stop < count
+
+        elif (
+            self.count_mode == "exact"
+            and optimizer_settings.CONCURRENT_COUNT
+            and pagination_args["last"] is None
+            and can_run_concurrently(queryset.db)
+        ):
+            queryset, results, cut, count = self.paginate_with_concurrent_count(queryset, pagination_args)
+            has_next_page = cut.stop < count
+
+        else:
+            pagination_args["size"] = count = self.count_queryset(queryset)
+            cut = calculate_queryset_slice(**pagination_args)
             queryset = queryset[cut]
+            results = fetch_in_context(queryset)
+            has_next_page = cut.stop < count
 
-        edges: list[EdgeType] = [
+        edges = [
             # Create a connection from the sliced queryset.
             self.connection_type.Edge(node=value, cursor=offset_to_cursor(cut.start + index))
-            for index, value in enumerate(fetch_in_context(queryset))
+            for index, value in enumerate(results)
         ]
+        return self.build_connection(queryset, edges, count, cut.start > 0, has_next_page)
 
+    def build_connection(
+        self,
+        queryset: models.QuerySet,
+        edges: list[EdgeType],
+        count: Optional[int],
+        has_previous_page: bool,  # noqa: FBT001
+        has_next_page: bool,  # noqa: FBT001
+    ) -> ConnectionType:
         connection = connection_adapter(
             cls=self.connection_type,
             edges=edges,
             pageInfo=page_info_adapter(
                 startCursor=edges[0].cursor if edges else None,
                 endCursor=edges[-1].cursor if edges else None,
-                hasPreviousPage=cut.start > 0,
-                hasNextPage=cut.stop < count,
+                hasPreviousPage=has_previous_page,
+                hasNextPage=has_next_page,
             ),
         )
         connection.iterable = queryset
         connection.length = count
         return connection
 
+    def needs_total_count(self, optimizer: Optional[QueryOptimizer], pagination_args: PaginationArgs) -> bool:
+        """
+        Is the total count of the connection needed for resolving the connection?
+        The count is not needed if only the edges and the page info are selected,
+        since the page info can be determined from the page itself.
+        """
+        if optimizer is None:
+            return True
+        # With offset cursors, the total count is needed to determine the page from the end.
+        if not self.keyset and pagination_args["last"] is not None:
+            return True
+        # Other fields on the connection (e.g. total count) might need the connection length.
+        return not optimizer.connection_fields.issubset({"edges", "pageInfo", "__typename"})
+
+    def paginate_without_count(
+        self,
+        queryset: models.QuerySet,
+        pagination_args: PaginationArgs,
+        *,
+        page_info_fields: set[str],
+    ) -> tuple[models.QuerySet, list[models.Model], slice, Optional[int], bool]:
+        """
+        Fetch a page from the given queryset without counting the total number of items in it.
+        If `hasNextPage` is requested, one extra item is fetched to determine whether there is a next page.
+        Should only be used if `needs_total_count` is false for the connection.
+
+        :return: The sliced and evaluated queryset, the items on the page, the slice used,
+                 the total count (if it had to be counted), and whether there is a next page.
+        """
+        # Without `last`, the slice can be calculated as if the queryset didn't have an end,
+        # since the database will simply return fewer rows if the slice goes past it.
+        cut = calculate_queryset_slice(**{**pagination_args, "size": sys.maxsize})
+        has_stop = cut.stop != sys.maxsize
+        fetch_next = has_stop and "hasNextPage" in page_info_fields
+
+        page = queryset[cut.start : cut.stop + 1 if fetch_next else cut.stop if has_stop else None]
+        results = fetch_in_context(page)
+        has_next_page = fetch_next and len(results) > cut.stop - cut.start
+
+        # If the page is empty, there is no way to know if there are items before the slice start.
+        if not results and cut.start > 0 and "hasPreviousPage" in page_info_fields:
+            pagination_args["size"] = count = queryset.count()
+            return page, results, calculate_queryset_slice(**pagination_args), count, False
+
+        return page, results[: cut.stop - cut.start], cut, None, has_next_page
+
+    def paginate_with_window_count(
+        self,
+        queryset: models.QuerySet,
+        pagination_args: PaginationArgs,
+    ) -> tuple[models.QuerySet, slice, int]:
+        """
+        Fetch a page from the given queryset, annotating the total count of the queryset
+        to the fetched rows with a window function, so that a separate count query is not needed.
+        Should only be used if `can_use_window_count` is true for the queryset.
+
+        :return: The sliced and evaluated queryset, the slice used, and the total count.
+        """
+        # Without `last`, the slice can be calculated as if the queryset didn't have an end,
+        # since the database will simply return fewer rows if the slice goes past it.
+        cut = calculate_queryset_slice(**{**pagination_args, "size": sys.maxsize})
+        stop = cut.stop if cut.stop != sys.maxsize else None
+
+        count_key = optimizer_settings.PREFETCH_COUNT_KEY
+        page = queryset.annotate(**{count_key: models.Window(models.Count("*"))})[cut.start : stop]
+        results = fetch_in_context(page)
+
+        # If the page is empty, the window function value is not available, so count separately.
+        pagination_args["size"] = count = getattr(results[0], count_key) if results else queryset.count()
+        return page, calculate_queryset_slice(**pagination_args), count
+
+    def paginate_with_concurrent_count(
+        self,
+        queryset: models.QuerySet,
+        pagination_args: PaginationArgs,
+    ) -> tuple[models.QuerySet, list[models.Model], slice, int]:
+        """
+        Fetch a page from the given queryset, while counting the total number of items in it
+        concurrently in the optimizer's thread pool. Should only be used if `last` is not given,
+        since otherwise the page cannot be determined without the total count.
+
+        :return: The sliced and evaluated queryset, the items on the page, the slice used, and the total count.
+        """
+        count_future = submit(queryset.count)
+
+        # Without `last`, the slice can be calculated as if the queryset didn't have an end,
+        # since the database will simply return fewer rows if the slice goes past it.
+        cut = calculate_queryset_slice(**{**pagination_args, "size": sys.maxsize})
+        page = queryset[cut.start : cut.stop if cut.stop != sys.maxsize else None]
+        results = fetch_in_context(page)
+
+        pagination_args["size"] = count = count_future.result()
+        # The fetched page is correct either way, but if the total count is smaller than the end
+        # of the requested window, the slice used for the cursors and page info changes.
+        if count < cut.stop:
+            cut = calculate_queryset_slice(**pagination_args)
+        return page, results, cut, count
+
+    def start_count(self, queryset: models.QuerySet) -> Callable[[], int]:
+        """
+        Start counting the total number of items in the given queryset. If `CONCURRENT_COUNT` is enabled,
+        the count is made in the optimizer's thread pool, so that other queries can be made meanwhile.
+
+        :return: Function that returns the total count, waiting for it to finish if necessary.
+        """
+        if self.count_mode == "exact" and optimizer_settings.CONCURRENT_COUNT and can_run_concurrently(queryset.db):
+            return submit(queryset.count).result
+        count = self.count_queryset(queryset)
+        return lambda: count
+
+    def count_queryset(self, queryset: models.QuerySet) -> int:
+        """Count the total number of items in the given queryset based on the `count_mode` of this connection."""
+        if self.count_mode == "exact":
+            return queryset.count()
+        return cached_count(queryset, approximate=self.count_mode == "approximate")
+
+    def paginate_with_keyset(
+        self,
+        queryset: models.QuerySet,
+        pagination_args: KeysetPaginationArgs,
+        *,
+        optimizer: Optional[QueryOptimizer],
+        already_optimized: bool,
+    ) -> tuple[models.QuerySet, list[models.Model], Optional[int], bool, bool]:
+        """
+        Fetch a page from the given queryset by filtering it with the ordering key values from
+        the keyset cursors. One extra item is fetched past the end of the page (or before the start
+        of the page, if only `last` is given) to determine whether there are more items in that direction.
+
+        :return: The sliced queryset, the items on the page, the total count (if it had to be counted),
+                 and whether there are previous or next pages.
+        """
+        first = pagination_args["first"]
+        last = pagination_args["last"]
+        offset = pagination_args["offset"]
+
+        if already_optimized:
+            # Nested connections have already been filtered and limited in the prefetch queryset.
+            results = fetch_in_context(queryset)
+            count = getattr(next(iter(results), None), optimizer_settings.PREFETCH_COUNT_KEY, 0)
+
+        else:
+            # Total count doesn't depend on the page, so it can be counted at the same time.
+            get_count = self.start_count(queryset) if self.needs_total_count(optimizer, pagination_args) else None
+
+            query = queryset.query
+            ordering = get_keyset_ordering(
+                query.order_by or (queryset.model._meta.ordering if query.default_ordering else []),
+                queryset.model,
+            )
+            queryset = annotate_keyset_values(queryset, ordering).order_by(*ordering)
+            if pagination_args["after"] is not None:
+                queryset = queryset.filter(
+                    keyset_filter(ordering, pagination_args["after"], model=queryset.model, using=queryset.db)
+                )
+            if pagination_args["before"] is not None:
+                queryset = queryset.filter(
+                    keyset_filter(
+                        ordering, pagination_args["before"], model=queryset.model, using=queryset.db, before=True
+                    )
+                )
+
+            if first is not None:
+                queryset = queryset[offset : offset + first + 1]
+                results = fetch_in_context(queryset)
+            elif last is not None:
+                # Fetch the page from the end of the ordering, and then restore the order.
+                queryset = queryset.reverse()[: last + 1]
+                results = fetch_in_context(queryset)[::-1]
+            else:
+                queryset = queryset[offset:]
+                results = fetch_in_context(queryset)
+
+            count = get_count() if get_count is not None else None
+
+        has_previous_page = pagination_args["after"] is not None or offset > 0
+        has_next_page = pagination_args["before"] is not None
+        if first is not None:
+            has_next_page = has_next_page or len(results) > first
+            results = results[:first]
+        if last is not None:
+            has_previous_page = has_previous_page or len(results) > last
+            results = results[-last:]
+
+        return queryset, results, count, has_previous_page, has_next_page
+
     def to_queryset(self, iterable: Union[models.QuerySet, Manager, None]) -> models.QuerySet:
         # Default resolver can return a Manager-instance or None.
         if iterable is None:
@@ -374,6 +788,86 @@ def model(self) -> Type[models.Model]:
         return self.underlying_type._meta.model
 
 
+class DjangoNodesField(graphene.Field):
+    """Field for fetching multiple relay nodes of the given type by their global IDs in a single query."""
+
+    def __init__(self, type_: ObjectTypeInput, /, **kwargs: Any) -> None:
+        """
+        Initialize a nodes field for the given type.
+
+        :param type_: DjangoObjectType the nodes field is for. Should implement the relay Node interface.
+                      This can also be a dot import path to the object type,
+                      or a callable that returns the object type.
+        :param kwargs: Extra arguments passed to `graphene.types.field.Field`.
+        """
+        kwargs.setdefault("ids", graphene.List(graphene.NonNull(graphene.ID), required=True))
+        super().__init__(graphene.List(type_), **kwargs)
+
+    def wrap_resolve(self, parent_resolver: ModelResolver) -> Callable[..., list[Optional[models.Model]]]:
+        return self.nodes_resolver
+
+    def nodes_resolver(self, root: Any, info: GQLInfo, ids: list[str], **kwargs: Any) -> list[Optional[models.Model]]:
+        type_name = self.underlying_type._meta.name
+        node_interface = next(item for item in self.underlying_type._meta.interfaces if issubclass(item, AbstractNode))
+
+        pks: list[str] = []
+        for global_id in ids:
+            node_type_name, pk = node_interface.resolve_global_id(info, global_id)
+            if node_type_name != type_name:
+                msg = f"Must receive a {type_name} id."
+                raise ValueError(msg)
+            pks.append(pk)
+
+        return self.underlying_type.get_nodes(info, pks)
+
+    @cached_property
+    def underlying_type(self) -> type[DjangoObjectType]:
+        return get_underlying_type(self.type)
+
+
+class AsyncDjangoListField(DjangoListField):
+    """DjangoListField that fetches its queryset asynchronously. For use with async execution."""
+
+    async def list_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> models.QuerySet:
+        queryset = self.resolve_queryset(root, info, **kwargs)
+        max_complexity: Optional[int] = getattr(self.underlying_type._meta, "max_complexity", None)
+        if self.is_unoptimized_list(queryset, root, info):
+            return await aoptimize_instances(queryset, info, max_complexity=max_complexity)
+        return await aoptimize(queryset, info, max_complexity=max_complexity)
+
+
+class AsyncDjangoConnectionField(DjangoConnectionField):
+    """DjangoConnectionField that fetches its queryset asynchronously. For use with async execution."""
+
+    async def connection_resolver(self, root: Any, info: GQLInfo, **kwargs: Any) -> ConnectionType:
+        connection = self.resolve_from_annotations(root, info, **kwargs)
+        if connection is not None:
+            return connection
+
+        with prefetch_hack_scope():
+            queryset, pagination_args, optimizer, already_optimized = self.prepare_connection(root, info, **kwargs)
+
+            # Nested connections have already been fetched by their parent's optimizer.
+            if already_optimized:
+                return self.resolve_connection(
+                    queryset,
+                    pagination_args,
+                    optimizer=optimizer,
+                    already_optimized=already_optimized,
+                )
+
+            # Counting and fetching the page depend on each other, so they are done
+            # together in a single call to the thread where the database is accessed.
+            connection = await sync_to_async(self.resolve_connection)(
+                queryset,
+                pagination_args,
+                optimizer=optimizer,
+                already_optimized=already_optimized,
+            )
+        add_to_identity_map(info, (edge.node for edge in connection.edges))
+        return connection
+
+
 class AnnotatedField(graphene.Field):
     """Field for resolving Django ORM expressions that the optimizer will annotate to the queryset."""
 
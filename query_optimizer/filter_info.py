@@ -8,9 +8,8 @@
 from graphene_django.settings import graphene_settings
 from graphene_django.utils import DJANGO_FILTER_INSTALLED
 from graphql import FieldNode, get_argument_values
-from graphql.execution.execute import get_field_def
 
-from .ast import GrapheneType, GraphQLASTWalker, Selections, get_underlying_type, is_connection, is_node
+from .ast import GrapheneType, GraphQLASTWalker, Selections, get_schema_index, is_connection, is_node
 from .typing import GQLInfo, GraphQLFilterInfo, ToManyField, ToOneField
 from .utils import swappable_by_subclassing
 
@@ -22,7 +21,9 @@
 
 
 __all__ = [
+    "compile_field_filter_info",
     "get_filter_info",
+    "prune_filter_info",
 ]
 
 
@@ -35,6 +36,68 @@ def get_filter_info(info: GQLInfo, model: type[Model]) -> GraphQLFilterInfo:
     return compiler.filter_info.get(name, {})
 
 
+def compile_field_filter_info(
+    info: GQLInfo,
+    parent_type: GrapheneObjectType,
+    field_node: FieldNode,
+) -> GraphQLFilterInfo:
+    """
+    Compile filter info for a single field.
+
+    :param info: The GraphQLResolveInfo containing the query AST.
+    :param parent_type: Parent object type.
+    :param field_node: FieldNode for the relation.
+    """
+    descriptor = get_schema_index(info.schema).get_field(info.schema, parent_type, field_node)
+    graphql_field = descriptor.graphql_field
+    graphene_type = descriptor.graphene_type
+
+    orig_field_name = descriptor.name
+    filters = get_argument_values(graphql_field, field_node, info.variable_values)
+
+    is_node_ = is_node(graphql_field)
+    is_connection_ = is_connection(graphene_type)
+
+    field = getattr(parent_type.graphene_type, orig_field_name, None)
+    # Find the field-specific limit, or use the default limit.
+    max_limit: Optional[int] = getattr(field, "max_limit", graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+
+    filter_info = GraphQLFilterInfo(
+        name=graphene_type.name,
+        # If the field is a relay node field, its `id` field should not be counted as a filter.
+        filters={} if is_node_ else filters,
+        children={},
+        filterset_class=None,
+        is_connection=is_connection_,
+        is_node=is_node_,
+        max_limit=max_limit,
+        keyset=getattr(field, "keyset", False),
+        pagination_strategy=getattr(field, "pagination_strategy", None),
+        prefetch_strategy=getattr(field, "prefetch_strategy", "prefetch"),
+    )
+
+    if DJANGO_FILTER_INSTALLED and hasattr(graphene_type, "graphene_type"):
+        object_type = graphene_type.graphene_type
+        if is_connection_:
+            object_type = object_type._meta.node
+
+        filter_info["filterset_class"] = getattr(object_type._meta, "filterset_class", None)
+
+    return filter_info
+
+
+def prune_filter_info(filter_info: dict[str, GraphQLFilterInfo]) -> None:
+    """
+    Remove filter info that do not have filters or children.
+    Preserve filter info for connections so that default nested limiting can be applied,
+    and for fields that aggregate their items into JSON, so that the aggregation can be done.
+    """
+    for name in list(filter_info):
+        info = filter_info[name]
+        if not (info["filters"] or info["children"] or info["is_connection"] or info["prefetch_strategy"] == "json"):
+            del filter_info[name]
+
+
 @swappable_by_subclassing
 class FilterInfoCompiler(GraphQLASTWalker):
     """Class for compiling filtering information from a GraphQL query."""
@@ -51,49 +114,12 @@ def add_filter_info(self, parent_type: GrapheneObjectType, field_node: FieldNode
         :param parent_type: Parent object type.
         :param field_node: FieldNode for the relation.
         """
-        graphql_field = get_field_def(self.info.schema, parent_type, field_node)
-        graphene_type = get_underlying_type(graphql_field.type)
-
         field_name = self.get_field_name(field_node)
-        orig_field_name = to_snake_case(field_node.name.value)
-        filters = get_argument_values(graphql_field, field_node, self.info.variable_values)
-
-        is_node_ = is_node(graphql_field)
-        is_connection_ = is_connection(graphene_type)
-
-        # Find the field-specific limit, or use the default limit.
-        max_limit: Optional[int] = getattr(
-            getattr(parent_type.graphene_type, orig_field_name, None),
-            "max_limit",
-            graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
-        )
-
-        self.filter_info[field_name] = GraphQLFilterInfo(
-            name=graphene_type.name,
-            # If the field is a relay node field, its `id` field should not be counted as a filter.
-            filters={} if is_node_ else filters,
-            children={},
-            filterset_class=None,
-            is_connection=is_connection_,
-            is_node=is_node_,
-            max_limit=max_limit,
-        )
-
-        if DJANGO_FILTER_INSTALLED and hasattr(graphene_type, "graphene_type"):
-            object_type = graphene_type.graphene_type
-            if is_connection_:
-                object_type = object_type._meta.node
-
-            self.filter_info[field_name]["filterset_class"] = getattr(object_type._meta, "filterset_class", None)
+        self.filter_info[field_name] = compile_field_filter_info(self.info, parent_type, field_node)
 
     def handle_selections(self, field_type: GrapheneType, selections: Selections) -> None:
         super().handle_selections(field_type, selections)
-        # Remove filter info that do not have filters or children.
-        # Preserve filter info for connections so that default nested limiting can be applied.
-        for name in list(self.filter_info):
-            info = self.filter_info[name]
-            if not (info["filters"] or info["children"] or info["is_connection"]):
-                del self.filter_info[name]
+        prune_filter_info(self.filter_info)
 
     def handle_query_class(self, field_type: GrapheneObjectType, field_node: FieldNode) -> None:
         self.add_filter_info(field_type, field_node)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, QuerySet
+from graphene_django.registry import get_global_registry
+
+from .settings import optimizer_settings
+
+if TYPE_CHECKING:
+    from .optimizer import QueryOptimizer
+    from .typing import PK, Any, GQLInfo, Iterable, Optional, TModel
+
+
+__all__ = [
+    "IdentityMap",
+    "get_identity_map",
+]
+
+
+# Identity maps can be created by root fields resolved concurrently in the optimizer's thread pool.
+_IDENTITY_MAP_LOCK = threading.Lock()
+
+
+class IdentityMap:
+    """Model instances fetched during an operation by their model and primary key."""
+
+    def __init__(self) -> None:
+        self.instances: dict[tuple[type[Model], Any], Model] = {}
+        self.lock = threading.Lock()
+
+    def add(self, instances: Iterable[Model]) -> None:
+        """
+        Add the given model instances to the identity map, along with any related instances
+        that have been fetched with them using `select_related` or `prefetch_related`.
+        If an instance of the same row already exists, the one with more fields loaded is kept.
+        """
+        seen: set[int] = set()
+        stack: list[Model] = list(instances)
+        while stack:
+            instance = stack.pop()
+            # Related instances can refer back to the instances they were fetched with.
+            if id(instance) in seen:
+                continue
+            seen.add(id(instance))
+
+            key = (type(instance), instance.pk)
+            with self.lock:
+                existing = self.instances.get(key)
+                if existing is None or len(existing.get_deferred_fields()) > len(instance.get_deferred_fields()):
+                    self.instances[key] = instance
+
+            stack.extend(item for item in instance._state.fields_cache.values() if isinstance(item, Model))
+            for related in getattr(instance, "_prefetched_objects_cache", {}).values():
+                stack.extend(related._result_cache or [] if isinstance(related, QuerySet) else related)
+
+    def get(self, model: type[TModel], pk: Any) -> Optional[TModel]:
+        return self.instances.get((model, pk))  # type: ignore[return-value]
+
+    def find_loaded(self, optimizer: QueryOptimizer, pks: Iterable[PK]) -> tuple[list[Model], list[PK]]:
+        """
+        Find the instances for the given primary keys that have already been fetched
+        with all the fields the given optimizer needs.
+
+        :return: The instances that have already been fetched, and the primary keys
+                 for the instances that still need to be fetched.
+        """
+        if not can_reuse_instances(optimizer):
+            return [], list(pks)
+
+        model: type[Model] = optimizer.model
+        names = [*optimizer.only_fields, *optimizer.related_fields]
+        try:
+            needed = {model._meta.get_field(name).attname for name in names}
+        except FieldDoesNotExist:  # pragma: no cover
+            return [], list(pks)
+
+        loaded: list[Model] = []
+        missing: list[PK] = []
+        for pk in pks:
+            instance = self.get(model, model._meta.pk.to_python(pk))
+            if instance is not None and not needed.intersection(instance.get_deferred_fields()):
+                loaded.append(instance)
+            else:
+                missing.append(pk)
+        return loaded, missing
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+
+def get_identity_map(info: GQLInfo) -> Optional[IdentityMap]:
+    """Get the identity map for the current operation, or None if the identity map is not enabled."""
+    if not optimizer_settings.IDENTITY_MAP:
+        return None
+    with _IDENTITY_MAP_LOCK:
+        if not hasattr(info.context, "optimizer_identity_map"):
+            info.context.optimizer_identity_map = IdentityMap()
+    return info.context.optimizer_identity_map
+
+
+def can_reuse_instances(optimizer: QueryOptimizer) -> bool:
+    """
+    Can instances fetched elsewhere in the operation be used instead of fetching them with the given optimizer?
+    Only if the optimizer doesn't need to fetch anything other than the model's own fields,
+    and the object type doesn't limit the rows that can be fetched for it.
+    """
+    if (
+        optimizer.select_related
+        or optimizer.prefetch_related
+        or optimizer.annotations
+        or optimizer.aliases
+        or optimizer.manual_optimizers
+    ):
+        return False
+
+    from .types import DjangoObjectType
+
+    object_type = get_global_registry().get_type_for_model(optimizer.model)
+    if object_type is None or not issubclass(object_type, DjangoObjectType):  # pragma: no cover
+        return False
+
+    # Instances might have been fetched from places where the object type's filtering was not applied.
+    return (
+        object_type.filter_queryset.__func__ is DjangoObjectType.filter_queryset.__func__
+        and object_type.pre_optimization_hook.__func__ is DjangoObjectType.pre_optimization_hook.__func__
+    )
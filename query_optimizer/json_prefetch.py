@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import datetime
+import json
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import connections, models
+from django.db.models import F, JSONField, OuterRef, Subquery, Window
+from django.db.models.functions import JSONObject, RowNumber
+from django.db.models.query import ModelIterable
+from django.utils import timezone
+
+from .ast import get_model_field
+from .result_cache import CachedModelIterable, should_cache_results
+from .utils import get_related_lookup
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.models import Model, Prefetch, QuerySet
+    from django.db.models.expressions import OrderBy
+    from django.db.models.sql.compiler import SQLCompiler
+
+    from .typing import Any, Optional, ToManyField
+
+
+__all__ = [
+    "JSONAggregate",
+    "JSONPrefetchIterable",
+    "aggregate_prefetch",
+    "aggregate_through_table",
+]
+
+
+JSON_PREFETCH_PREFIX = "_json_"
+INDEX_KEY = "_index"
+
+
+class JSONAggregate(Subquery):
+    """
+    Subquery that aggregates the related objects of a to-many relation into a JSON array,
+    so that they can be fetched in the same query as the objects they are related to.
+    Each object in the array contains the fetched fields of the related object, the JSON arrays
+    for its own to-many relations, and its index in the ordering of the related objects.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        *,
+        prefetch: Prefetch,
+        field_names: list[str],
+        nested: list[JSONAggregate],
+    ) -> None:
+        """
+        Create a JSON aggregate for a prefetch.
+
+        :param queryset: Queryset that selects the JSON object for each related object.
+        :param prefetch: The prefetch this aggregate replaces. Used if the aggregate cannot be used.
+        :param field_names: Attnames of the fields of the related model in the JSON objects.
+        :param nested: JSON aggregates for the to-many relations of the related objects.
+        """
+        super().__init__(queryset, output_field=JSONField())
+        self.prefetch = prefetch
+        self.model: type[Model] = prefetch.queryset.model
+        self.field_names = field_names
+        self.nested = nested
+
+    @property
+    def annotation_name(self) -> str:
+        return f"{JSON_PREFETCH_PREFIX}{self.prefetch.to_attr or self.prefetch.prefetch_to}"
+
+    def as_sql(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper, **extra_context: Any) -> Any:
+        extra_context["item"] = connection.ops.quote_name("item")
+        return super().as_sql(compiler, connection, **extra_context)
+
+    def as_postgresql(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper, **extra_context: Any) -> Any:
+        template = "(SELECT COALESCE(JSONB_AGG(_items.%(item)s), '[]'::jsonb) FROM (%(subquery)s) _items)"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+    def as_mysql(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper, **extra_context: Any) -> Any:
+        template = "(SELECT COALESCE(JSON_ARRAYAGG(_items.%(item)s), JSON_ARRAY()) FROM (%(subquery)s) _items)"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+    def as_sqlite(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper, **extra_context: Any) -> Any:
+        # JSON values lose their JSON subtype when they are returned from a subquery,
+        # so they need to be converted back to JSON to be nested in other JSON values.
+        template = "JSON((SELECT COALESCE(JSON_GROUP_ARRAY(JSON(_items.%(item)s)), '[]') FROM (%(subquery)s) _items))"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+
+def supports_json_aggregation(using: str) -> bool:
+    """Can prefetches be aggregated into JSON arrays in the given database?"""
+    return connections[using].vendor in {"postgresql", "mysql", "sqlite"}
+
+
+def aggregate_prefetch(model: type[Model], prefetch: Prefetch, *, using: str) -> Optional[JSONAggregate]:
+    """
+    Create a JSON aggregate for fetching the objects of the given prefetch in the same query
+    as the instances of the given model they are prefetched for.
+
+    :param model: The model the objects are prefetched for.
+    :param prefetch: The prefetch to aggregate.
+    :param using: The database the instances are fetched from.
+    :return: The aggregate, or None if the prefetch cannot be aggregated, e.g., because its queryset
+             has other annotations or related lookups than nested aggregates, or is paginated.
+    """
+    queryset: Optional[QuerySet] = prefetch.queryset
+    if queryset is None or not supports_json_aggregation(using):
+        return None
+
+    query = queryset.query
+    if query.select_related or query.is_sliced or query.distinct or queryset._prefetch_related_lookups:
+        return None
+
+    nested = [item for item in query.annotations.values() if isinstance(item, JSONAggregate)]
+    if len(nested) != len(query.annotations):
+        return None
+
+    field: Optional[ToManyField] = get_model_field(model, prefetch.prefetch_through)
+    related_lookup = get_related_lookup(field)
+    if related_lookup is None:  # Generic relations
+        return None
+
+    field_names = get_fetched_field_names(queryset)
+    ordering = list(query.order_by or queryset.model._meta.ordering or ["pk"])
+    item = JSONObject(
+        **{name: F(name) for name in field_names},
+        **{aggregate.annotation_name: F(aggregate.annotation_name) for aggregate in nested},
+        **{INDEX_KEY: Window(RowNumber(), order_by=ordering)},
+    )
+    queryset = queryset.filter(**related_lookup).order_by().values(item=item)
+    return JSONAggregate(queryset, prefetch=prefetch, field_names=field_names, nested=nested)
+
+
+def aggregate_through_table(model: type[Model], prefetch: Prefetch, *, using: str) -> Optional[JSONAggregate]:
+    """
+    Create a JSON aggregate for fetching the primary keys of the objects of the given many-to-many prefetch
+    from the relation's through table, without joining the related table, if only their primary keys are needed.
+
+    :param model: The model the objects are prefetched for.
+    :param prefetch: The prefetch to aggregate.
+    :param using: The database the instances are fetched from.
+    :return: The aggregate, or None if the prefetch needs more than the primary keys of the related objects,
+             e.g., because its queryset is filtered, or ordered by fields other than the primary key.
+    """
+    queryset: Optional[QuerySet] = prefetch.queryset
+    if queryset is None or not supports_json_aggregation(using):
+        return None
+
+    field: Optional[ToManyField] = get_model_field(model, prefetch.prefetch_through)
+    if isinstance(field, models.ManyToManyField):
+        through: type[Model] = field.remote_field.through
+        source_name, target_name = field.m2m_field_name(), field.m2m_reverse_field_name()
+    elif isinstance(field, models.ManyToManyRel):
+        through = field.through
+        source_name, target_name = field.field.m2m_reverse_field_name(), field.field.m2m_field_name()
+    else:
+        return None
+
+    if not is_pk_only_queryset(queryset):
+        return None
+
+    source_fk: models.ForeignKey = through._meta.get_field(source_name)
+    target_fk: models.ForeignKey = through._meta.get_field(target_name)
+    ordering = get_through_table_ordering(queryset, target_fk)
+    if ordering is None:
+        return None
+
+    pk_name = queryset.model._meta.pk.attname
+    item = JSONObject(
+        **{pk_name: F(target_fk.attname)},
+        **{INDEX_KEY: Window(RowNumber(), order_by=ordering)},
+    )
+    related_lookup = {source_fk.name: OuterRef(source_fk.target_field.attname)}
+    through_queryset = through._default_manager.filter(**related_lookup).order_by().values(item=item)
+    return JSONAggregate(through_queryset, prefetch=prefetch, field_names=[pk_name], nested=[])
+
+
+def is_pk_only_queryset(queryset: QuerySet) -> bool:
+    """Does the given queryset only fetch the primary keys of its model, without filtering or limiting them?"""
+    query = queryset.query
+    if query.where or query.annotations or query.select_related or query.distinct or query.is_sliced:
+        return False
+    pk_name = queryset.model._meta.pk.attname
+    return not queryset._prefetch_related_lookups and get_fetched_field_names(queryset) == [pk_name]
+
+
+def get_through_table_ordering(queryset: QuerySet, target_fk: models.ForeignKey) -> Optional[list[OrderBy]]:
+    """
+    Translate the ordering of the given queryset to an ordering by the given foreign key
+    from a through table to the queryset's model, if the queryset is only ordered by its primary key.
+    """
+    if not target_fk.target_field.primary_key:
+        return None
+
+    pk = queryset.model._meta.pk
+    ordering: list[OrderBy] = []
+    for item in queryset.query.order_by or queryset.model._meta.ordering:
+        if not isinstance(item, str) or item.removeprefix("-") not in {"pk", pk.name, pk.attname}:
+            return None
+        column = F(target_fk.attname)
+        ordering.append(column.desc() if item.startswith("-") else column.asc())
+    return ordering or [F(target_fk.attname).asc()]
+
+
+def get_fetched_field_names(queryset: QuerySet) -> list[str]:
+    """Get the attnames of the concrete fields fetched by the given queryset, in the model's field order."""
+    names, defer = queryset.query.deferred_loading
+    opts = queryset.model._meta
+    selected = {opts.get_field(name).attname for name in names}
+    return [
+        field.attname
+        for field in opts.concrete_fields
+        if field.primary_key or (field.attname not in selected if defer else field.attname in selected)
+    ]
+
+
+class JSONPrefetchIterable(ModelIterable):
+    """Iterable that creates the objects aggregated into JSON arrays for the fetched model instances."""
+
+    def __iter__(self) -> Iterator[Model]:
+        iterable_class = CachedModelIterable if should_cache_results(self.queryset.model) else ModelIterable
+        aggregates = [item for item in self.queryset.query.annotations.values() if isinstance(item, JSONAggregate)]
+        for instance in iterable_class(self.queryset, self.chunked_fetch, self.chunk_size):
+            for aggregate in aggregates:
+                value = instance.__dict__.pop(aggregate.annotation_name, None)
+                set_prefetched_objects(instance, aggregate, value)
+            yield instance
+
+
+def set_prefetched_objects(instance: Model, aggregate: JSONAggregate, value: Any) -> None:
+    """
+    Create the related objects from the JSON array fetched with the given aggregate,
+    and add them to the given instance like they would have been prefetched.
+    """
+    if isinstance(value, str):
+        value = json.loads(value)
+
+    items: list[dict[str, Any]] = sorted(value or [], key=lambda item: item[INDEX_KEY])
+    objects = [create_instance(aggregate, item, instance._state.db) for item in items]
+
+    prefetch = aggregate.prefetch
+    if prefetch.to_attr is not None:
+        setattr(instance, prefetch.to_attr, objects)
+        return
+
+    manager = getattr(instance, prefetch.prefetch_through)
+    if hasattr(manager, "prefetch_cache_name"):
+        cache_name = manager.prefetch_cache_name
+    else:
+        cache_name = manager.field.remote_field.get_cache_name()
+        # Reverse foreign keys can be followed back to the instance without a query.
+        for obj in objects:
+            manager.field.set_cached_value(obj, instance)
+
+    queryset = manager.get_queryset()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    if not hasattr(instance, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[cache_name] = queryset
+
+
+def create_instance(aggregate: JSONAggregate, item: dict[str, Any], using: Optional[str]) -> Model:
+    """Create a model instance from a JSON object fetched with the given aggregate."""
+    opts = aggregate.model._meta
+    values = [to_python(opts.get_field(name), item[name]) for name in aggregate.field_names]
+    instance = aggregate.model.from_db(using, aggregate.field_names, values)
+    for nested in aggregate.nested:
+        set_prefetched_objects(instance, nested, item.get(nested.annotation_name))
+    return instance
+
+
+def to_python(field: models.Field, value: Any) -> Any:
+    """Convert a value decoded from JSON to the Python value of the given model field."""
+    if value is None:
+        return None
+
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField) and isinstance(value, Decimal):
+        return value.quantize(Decimal(1).scaleb(-field.decimal_places))
+    if isinstance(field, models.DateTimeField) and settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value, datetime.timezone.utc)
+    return value
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import datetime
+import json
+import uuid
+from decimal import Decimal
+from itertools import count
+from typing import TYPE_CHECKING
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.dateparse import parse_duration
+from django.utils.duration import duration_iso_string
+from graphql_relay.utils import base64, unbase64
+
+from .ast import get_model_field
+from .settings import optimizer_settings
+
+if TYPE_CHECKING:
+    from .typing import Any, Callable, Iterable, Optional
+
+
+__all__ = [
+    "annotate_keyset_values",
+    "cursor_to_keyset",
+    "get_keyset_ordering",
+    "get_keyset_values",
+    "keyset_filter",
+    "keyset_to_cursor",
+    "reverse_ordering",
+]
+
+
+KEYSET_CURSOR_PREFIX = "keyset:"
+TYPE_KEY = "$type"
+VALUE_KEY = "value"
+
+# Values that don't have a JSON representation are encoded as objects tagged with their type,
+# so that they can be decoded back to the exact same value. Subclasses must come before their bases.
+ENCODERS: dict[str, tuple[type, Callable[[Any], str]]] = {
+    "datetime": (datetime.datetime, datetime.datetime.isoformat),
+    "date": (datetime.date, datetime.date.isoformat),
+    "time": (datetime.time, datetime.time.isoformat),
+    "duration": (datetime.timedelta, duration_iso_string),
+    "decimal": (Decimal, str),
+    "uuid": (uuid.UUID, str),
+}
+DECODERS: dict[str, Callable[[str], Any]] = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "duration": parse_duration,
+    "decimal": Decimal,
+    "uuid": uuid.UUID,
+}
+
+
+class KeysetEncoder(json.JSONEncoder):
+    """
+    Encoder for ordering key values, which encodes them without losing precision,
+    e.g., unlike `DjangoJSONEncoder`, which truncates datetimes and times to milliseconds.
+    """
+
+    def default(self, o: Any) -> Any:
+        for name, (type_, encode) in ENCODERS.items():
+            if isinstance(o, type_):
+                return {TYPE_KEY: name, VALUE_KEY: encode(o)}
+        return super().default(o)
+
+
+def decode_keyset_value(obj: dict[str, Any]) -> Any:
+    """Decode a value encoded with `KeysetEncoder`."""
+    decode = DECODERS.get(obj.get(TYPE_KEY))  # type: ignore[arg-type]
+    if decode is None or set(obj) != {TYPE_KEY, VALUE_KEY}:
+        return obj
+    value = decode(obj[VALUE_KEY])
+    if value is None:  # pragma: no cover
+        msg = f"Invalid {obj[TYPE_KEY]} value in cursor."
+        raise ValueError(msg)
+    return value
+
+
+def keyset_to_cursor(values: list[Any]) -> str:
+    """Create a cursor from the ordering key values of a row."""
+    return base64(KEYSET_CURSOR_PREFIX + json.dumps(values, cls=KeysetEncoder, separators=(",", ":")))
+
+
+def cursor_to_keyset(cursor: str) -> Optional[list[Any]]:
+    """
+    Extract the ordering key values of a row from a keyset cursor.
+
+    :return: The ordering key values, or None if the cursor is not a valid keyset cursor.
+    """
+    try:
+        value = unbase64(cursor)
+    except Exception:  # noqa: BLE001  # pragma: no cover
+        return None
+
+    if not value.startswith(KEYSET_CURSOR_PREFIX):
+        return None
+
+    try:
+        values = json.loads(value[len(KEYSET_CURSOR_PREFIX) :], object_hook=decode_keyset_value)
+    except (TypeError, ValueError):  # pragma: no cover
+        return None
+
+    return values if isinstance(values, list) else None
+
+
+def get_keyset_ordering(ordering: Iterable[Any], model: type[models.Model]) -> list[str]:
+    """
+    Get the ordering for keyset pagination from the given ordering.
+    Primary key is added as the last ordering key, so that the ordering is unique.
+
+    :param ordering: Ordering of the paginated queryset, e.g., from `queryset.query.order_by`.
+    :param model: The model of the paginated queryset.
+    :raises ValueError: The ordering contains something other than model field lookups.
+    """
+    keyset_ordering: list[str] = []
+    for item in ordering:
+        if not isinstance(item, str) or item == "?":
+            msg = f"Keyset pagination requires ordering by model fields, got {item!r}."
+            raise ValueError(msg)
+        keyset_ordering.append(item)
+
+    names = {item.removeprefix("-") for item in keyset_ordering}
+    if not names.intersection({"pk", model._meta.pk.name, model._meta.pk.attname}):
+        keyset_ordering.append("pk")
+    return keyset_ordering
+
+
+def reverse_ordering(ordering: list[str]) -> list[str]:
+    """Reverse the direction of the given keyset ordering."""
+    return [item.removeprefix("-") if item.startswith("-") else f"-{item}" for item in ordering]
+
+
+def annotate_keyset_values(queryset: models.QuerySet, ordering: list[str]) -> models.QuerySet:
+    """Annotate the values of the given keyset ordering keys to the rows of the queryset."""
+    key = optimizer_settings.KEYSET_VALUE_KEY
+    query = queryset.query.chain()
+    annotations: dict[str, models.Expression] = {}
+    for index, item in enumerate(ordering):
+        name = item.removeprefix("-")
+        # Wrap the column so that it's selected separately from the model's own columns,
+        # which would otherwise be confused with it when filtering on a window function.
+        output_field = query.resolve_ref(name).output_field
+        annotations[f"{key}_{index}"] = models.ExpressionWrapper(models.F(name), output_field=output_field)
+    return queryset.annotate(**annotations)
+
+
+def get_keyset_values(instance: models.Model) -> list[Any]:
+    """Get the ordering key values annotated to the given model instance with `annotate_keyset_values`."""
+    key = optimizer_settings.KEYSET_VALUE_KEY
+    values: list[Any] = []
+    for index in count():
+        name = f"{key}_{index}"
+        if not hasattr(instance, name):
+            return values
+        values.append(getattr(instance, name))
+    return values  # pragma: no cover
+
+
+def keyset_filter(
+    ordering: list[str],
+    values: list[Any],
+    *,
+    model: type[models.Model],
+    using: str = DEFAULT_DB_ALIAS,
+    before: bool = False,
+) -> models.Q:
+    """
+    Create a filter for the rows that come after (or before) the row with
+    the given ordering key values, i.e., a seek predicate for the ordering.
+
+    For ordering `(a, b)` this is `a > x OR (a = x AND b > y)`, with the comparison
+    flipped for descending ordering keys, and for rows before the given values.
+    Null values cannot be compared, so for nullable ordering keys, null and non-null
+    rows are included according to where the database sorts nulls in the ordering.
+
+    :param ordering: Keyset ordering of the queryset, see `get_keyset_ordering`.
+    :param values: Ordering key values of the row from the cursor.
+    :param model: The model of the paginated queryset.
+    :param using: The database the queryset is fetched from.
+    :param before: Filter rows before the given values instead of after.
+    :raises ValueError: The values don't match the ordering.
+    """
+    if len(values) != len(ordering):
+        msg = "The cursor is not valid for the ordering of this connection."
+        raise ValueError(msg)
+
+    nulls_largest: bool = connections[using].features.nulls_order_largest
+
+    seek = models.Q()
+    equal = models.Q()
+    for item, value in zip(ordering, values):
+        name = item.removeprefix("-")
+        larger_after = item.startswith("-") == before
+        nulls_after = is_nullable_lookup(model, name) and nulls_largest == larger_after
+
+        if value is None:
+            if not nulls_after:
+                seek |= equal & models.Q(**{f"{name}__isnull": False})
+            equal &= models.Q(**{f"{name}__isnull": True})
+            continue
+
+        after = models.Q(**{f"{name}__{'gt' if larger_after else 'lt'}": value})
+        if nulls_after:
+            after |= models.Q(**{f"{name}__isnull": True})
+        seek |= equal & after
+        equal &= models.Q(**{name: value})
+
+    return seek
+
+
+def is_nullable_lookup(model: type[models.Model], lookup: str) -> bool:
+    """
+    Can the given lookup from the given model be null? Lookups through nullable or reverse relations can be,
+    and so can lookups that are not fields of the model, e.g., annotations.
+    """
+    for part in lookup.split(LOOKUP_SEP):
+        field = get_model_field(model, part)
+        if field is None or field.null or (field.is_relation and not field.concrete):
+            return True
+        if not field.is_relation:
+            return False
+        model = field.related_model
+    return False
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import dataclasses
+import sys
 from copy import copy
 from typing import TYPE_CHECKING
 
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Model, Prefetch, QuerySet
+from django.db import connections, models
+from django.db.models import Model, Prefetch, QuerySet, prefetch_related_objects
 from django.db.models.constants import LOOKUP_SEP
 from django.db.models.functions import RowNumber
 from graphene_django.registry import get_global_registry
@@ -14,7 +15,13 @@
 
 from .ast import get_model_field
 from .filter_info import get_filter_info
-from .prefetch_hack import _register_for_prefetch_hack
+from .json_prefetch import JSONPrefetchIterable, aggregate_prefetch, aggregate_through_table
+from .keyset import annotate_keyset_values, get_keyset_ordering, keyset_filter, reverse_ordering
+from .planner import should_prefetch_related
+from .prefetch_hack import _register_for_lateral_pagination, _register_for_prefetch_hack, fetch_context
+from .related_annotations import RelatedAnnotationIterable, RelatedAnnotations, annotate_related, can_join_annotations
+from .result_cache import cache_results, should_cache_results
+from .routing import get_read_database, use_database, use_database_for_lookups
 from .settings import optimizer_settings
 from .typing import Generic, TModel
 from .utils import (
@@ -22,13 +29,16 @@
     add_slice_to_queryset,
     calculate_queryset_slice,
     calculate_slice_for_queryset,
+    get_related_lookup,
     mark_optimized,
     optimizer_logger,
+    supports_lateral_join,
     swappable_by_subclassing,
 )
-from .validators import validate_pagination_args
+from .validators import validate_keyset_pagination_args, validate_pagination_args
 
 if TYPE_CHECKING:
+    from .json_prefetch import JSONAggregate
     from .types import DjangoObjectType
     from .typing import (
         Any,
@@ -40,12 +50,26 @@
         QuerySetResolver,
         ToManyField,
     )
+    from .validators import PaginationArgs
 
 __all__ = [
     "QueryOptimizer",
 ]
 
 
+@dataclasses.dataclass
+class ConnectionCount:
+    """
+    Annotation for a nested connection that only selects its total count or page info,
+    so that the connection can be resolved from its parent without fetching the related objects.
+    """
+
+    annotation_name: str
+    expression: ExpressionKind
+    prefetch: Prefetch
+    """The prefetch used for the connection if the annotation cannot be added to the parent."""
+
+
 @dataclasses.dataclass
 class OptimizationResults(Generic[TModel]):
     name: str | None = None
@@ -54,6 +78,9 @@ class OptimizationResults(Generic[TModel]):
     related_fields: list[str] = dataclasses.field(default_factory=list)
     select_related: list[str] = dataclasses.field(default_factory=list)
     prefetch_related: list[Prefetch | str] = dataclasses.field(default_factory=list)
+    json_prefetches: list[JSONAggregate] = dataclasses.field(default_factory=list)
+    connection_counts: list[ConnectionCount] = dataclasses.field(default_factory=list)
+    related_annotations: list[RelatedAnnotations] = dataclasses.field(default_factory=list)
 
     def __add__(self, other: OptimizationResults) -> OptimizationResults:
         """Adding two compilation results together means extending the lookups to the other model."""
@@ -69,6 +96,18 @@ def __add__(self, other: OptimizationResults) -> OptimizationResults:
                 prefetch.add_prefix(other.name)
                 self.prefetch_related.append(prefetch)
 
+        # JSON aggregates can only be added to the model they are for, so prefetch the related objects instead.
+        for aggregate in other.json_prefetches:
+            aggregate.prefetch.add_prefix(other.name)
+            self.prefetch_related.append(aggregate.prefetch)
+
+        for count in other.connection_counts:
+            count.prefetch.add_prefix(other.name)
+            self.prefetch_related.append(count.prefetch)
+
+        for related in other.related_annotations:
+            self.related_annotations.append(dataclasses.replace(related, path=(other.name, *related.path)))
+
         return self
 
 
@@ -93,6 +132,11 @@ def __init__(
         self.prefetch_related: dict[str, QueryOptimizer] = {}
         self.manual_optimizers: dict[str, QuerySetResolver] = {}
         self.total_count: bool = False
+        self.connection_fields: set[str] = set()
+        self.page_info_fields: set[str] = set()
+        self.uses_default_resolver: bool = False
+        self.fetch_strategy: Optional[Literal["select_related", "prefetch", "auto"]] = None
+        self.filter_info: Optional[GraphQLFilterInfo] = None
         self.name = name
         self.parent: QueryOptimizer | None = parent
 
@@ -102,9 +146,118 @@ def optimize_queryset(self, queryset: QuerySet[TModel]) -> QuerySet[TModel]:
 
         :param queryset: QuerySet to optimize.
         """
-        filter_info = get_filter_info(self.info, queryset.model)
+        filter_info = self.filter_info if self.filter_info is not None else get_filter_info(self.info, queryset.model)
         results = self.process(queryset, filter_info)
-        return self.optimize(results, filter_info)
+        queryset = self.optimize(results, filter_info)
+        return self.route_queryset(queryset)
+
+    def route_queryset(self, queryset: QuerySet[TModel]) -> QuerySet[TModel]:
+        """
+        Read the optimized queryset, and the querysets prefetched with it, from the database
+        set in the `READ_DATABASE` settings, unless the queryset's database has already been chosen.
+        """
+        # Querysets from related managers are read from the same database as the instance they are for.
+        if queryset._db is not None or "instance" in queryset._hints:
+            return queryset
+
+        using = get_read_database(self.model, self.info)
+        if using is None:
+            return queryset
+        return use_database(queryset, using)
+
+    def get_database(self, queryset: QuerySet[TModel]) -> str:
+        """Get the database the given queryset is read from once it has been routed with `route_queryset`."""
+        if queryset._db is None and "instance" not in queryset._hints:
+            using = get_read_database(self.model, self.info)
+            if using is not None:
+                return using
+        return queryset.db
+
+    def prefetch_instances(self, instances: list[TModel]) -> None:
+        """
+        Fetch the related objects and annotations in this optimizer for model instances
+        that have already been fetched, e.g., by a custom resolver that returned a list.
+        Each relation is fetched for all the instances at once: to-one relations with
+        a single `pk__in` query, and to-many relations with a single query filtered by the instances.
+        Relations and annotations that have already been fetched to the instances are skipped.
+
+        Manual optimizations cannot be applied, since they need to modify the queryset the instances are from.
+
+        :param instances: Model instances to fetch the related objects for.
+        """
+        if not instances:
+            return
+
+        filter_info = self.filter_info if self.filter_info is not None else get_filter_info(self.info, self.model)
+        lookups: list[Prefetch | str] = []
+
+        for name, optimizer in self.select_related.items():
+            queryset = optimizer.model._default_manager.all()
+            nested_filter_info = filter_info.get("children", {}).get(name, {})
+            nested_results = optimizer.process(queryset, nested_filter_info)
+
+            # Reverse one-to-one relations are matched to the instances by the related model's foreign key.
+            field = get_model_field(self.model, optimizer.name)
+            if isinstance(field, models.OneToOneRel):
+                nested_results.related_fields.append(field.remote_field.attname)
+
+            lookups.append(optimizer.process_prefetch(name, nested_results, nested_filter_info))
+
+        for name, optimizer in self.prefetch_related.items():
+            if optimizer.model is None:
+                lookups.append(optimizer.name)
+                continue
+
+            queryset = optimizer.model._default_manager.all()
+            nested_filter_info = filter_info.get("children", {}).get(name, {})
+            nested_results = optimizer.process(queryset, nested_filter_info)
+            lookups.append(optimizer.process_prefetch(name, nested_results, nested_filter_info))
+
+        # Related objects are read from the same database as the instances.
+        using = instances[0]._state.db
+        if using is not None:
+            lookups = use_database_for_lookups(lookups, using)
+
+        self.annotate_instances(instances)
+        with fetch_context():
+            prefetch_related_objects(instances, *lookups)
+
+    def annotate_instances(self, instances: list[TModel]) -> None:
+        """Fetch the annotations in this optimizer for model instances that have already been fetched."""
+        names = [name for name in self.annotations if not hasattr(instances[0], name)]
+        if not names:
+            return
+
+        manager = self.model._default_manager.db_manager(instances[0]._state.db)
+        queryset = manager.filter(pk__in=[instance.pk for instance in instances])
+        if self.aliases:
+            queryset = queryset.alias(**self.aliases)
+        queryset = queryset.annotate(**{name: self.annotations[name] for name in names})
+
+        values = {row.pop("pk"): row for row in queryset.values("pk", *names)}
+        for instance in instances:
+            for name, value in values.get(instance.pk, {}).items():
+                setattr(instance, name, value)
+
+    def bind(self, info: Optional[GQLInfo], parent: QueryOptimizer | None = None) -> QueryOptimizer:
+        """
+        Create a copy of this optimizer tree for the given GraphQLResolveInfo.
+        Used to reuse a cached optimizer tree in a new request.
+
+        :param info: The GraphQLResolveInfo the copied optimizers should use.
+        :param parent: Parent optimizer for the copied optimizer.
+        """
+        optimizer = copy(self)
+        optimizer.info = info
+        optimizer.parent = parent
+        optimizer.only_fields = copy(self.only_fields)
+        optimizer.related_fields = copy(self.related_fields)
+        optimizer.aliases = copy(self.aliases)
+        optimizer.annotations = copy(self.annotations)
+        optimizer.manual_optimizers = copy(self.manual_optimizers)
+        optimizer.select_related = {name: opt.bind(info, optimizer) for name, opt in self.select_related.items()}
+        optimizer.prefetch_related = {name: opt.bind(info, optimizer) for name, opt in self.prefetch_related.items()}
+        return optimizer
 
     def pre_processing(self, queryset: QuerySet[TModel]) -> QuerySet[TModel]:
         """Run all pre-optimization hooks on the objct type mathcing the queryset's model."""
@@ -122,8 +275,9 @@ def process(self, queryset: QuerySet[TModel], filter_info: GraphQLFilterInfo) ->
         results = OptimizationResults(
             name=self.name,
             queryset=queryset,
-            only_fields=self.only_fields,
-            related_fields=self.related_fields,
+            # Copy the lists so that extending the results doesn't modify this optimizer.
+            only_fields=copy(self.only_fields),
+            related_fields=copy(self.related_fields),
         )
 
         for name, optimizer in self.select_related.items():
@@ -131,14 +285,18 @@ def process(self, queryset: QuerySet[TModel], filter_info: GraphQLFilterInfo) ->
             nested_filter_info = filter_info.get("children", {}).get(name, {})
             nested_results = optimizer.process(queryset, nested_filter_info)
 
-            # Promote `select_related` to `prefetch_related` if any annotations are needed.
-            if optimizer.annotations:
+            # Promote `select_related` to `prefetch_related` if the needed annotations cannot be joined,
+            # or if prefetching the related objects is estimated to be cheaper than joining them.
+            if optimizer.should_prefetch(results.queryset) or not optimizer.can_join_annotations():
                 prefetch = optimizer.process_prefetch(name, nested_results, nested_filter_info)
                 results.prefetch_related.append(prefetch)
                 continue
 
             # Otherwise extend lookups to this model.
             results += nested_results
+            if optimizer.annotations:
+                related = RelatedAnnotations(path=(name,), aliases=optimizer.aliases, annotations=optimizer.annotations)
+                results.related_annotations.append(related)
 
         for name, optimizer in self.prefetch_related.items():
             # For generic foreign keys, we don't know the model, so we can't optimize the queryset.
@@ -150,11 +308,47 @@ def process(self, queryset: QuerySet[TModel], filter_info: GraphQLFilterInfo) ->
             nested_filter_info = filter_info.get("children", {}).get(name, {})
             nested_results = optimizer.process(queryset, nested_filter_info)
 
+            if optimizer.is_count_only_connection(nested_filter_info):
+                count = optimizer.process_connection_count(name, nested_results, nested_filter_info)
+                results.connection_counts.append(count)
+                continue
+
             prefetch = optimizer.process_prefetch(name, nested_results, nested_filter_info)
+            aggregate = self.aggregate_prefetch(results.queryset, prefetch, nested_filter_info)
+            if aggregate is not None:
+                results.json_prefetches.append(aggregate)
+                continue
+
             results.prefetch_related.append(prefetch)
 
         return results
 
+    def aggregate_prefetch(
+        self,
+        queryset: QuerySet[TModel],
+        prefetch: Prefetch,
+        filter_info: GraphQLFilterInfo,
+    ) -> Optional[JSONAggregate]:
+        """
+        Aggregate the related objects of the given prefetch into a JSON array fetched with the instances
+        of this optimizer's model, if the field the prefetch is for uses the "json" prefetch strategy.
+        For many-to-many relations where only the related primary keys are needed, the primary keys
+        are aggregated from the through table. Nested connections are always prefetched,
+        since they are paginated separately.
+
+        :param queryset: QuerySet the aggregate is added to.
+        :param prefetch: Prefetch to aggregate.
+        :param filter_info: Filter information for the field the prefetch is for.
+        """
+        if filter_info.get("is_connection", False) or filter_info.get("prefetch_strategy") != "json":
+            return None
+        # The aggregate is fetched in the same query as the queryset, so it must be supported by its database.
+        using = self.get_database(queryset)
+        aggregate = aggregate_through_table(self.model, prefetch, using=using)
+        if aggregate is not None:
+            return aggregate
+        return aggregate_prefetch(self.model, prefetch, using=using)
+
     def optimize(self, results: OptimizationResults[TModel], filter_info: GraphQLFilterInfo) -> QuerySet[TModel]:
         """Optimize the given queryset based on the optimization results."""
         queryset = results.queryset
@@ -169,18 +363,115 @@ def optimize(self, results: OptimizationResults[TModel], filter_info: GraphQLFil
             queryset = queryset.alias(**self.aliases)
         if self.annotations:
             queryset = queryset.annotate(**self.annotations)
+        queryset = self.annotate_results(queryset, results)
 
         queryset = self.filter_queryset(queryset, filter_info)
+        if should_cache_results(self.model):
+            queryset = cache_results(queryset)
 
         mark_optimized(queryset)
         return queryset
 
+    def annotate_results(self, queryset: QuerySet[TModel], results: OptimizationResults[TModel]) -> QuerySet[TModel]:
+        """Add the annotations collected from related fields in the optimization results to the given queryset."""
+        if results.json_prefetches:
+            queryset = queryset.annotate(
+                **{aggregate.annotation_name: aggregate for aggregate in results.json_prefetches}
+            )
+            queryset._iterable_class = JSONPrefetchIterable
+        if results.related_annotations:
+            for related in results.related_annotations:
+                queryset = annotate_related(queryset, related)
+            queryset._iterable_class = RelatedAnnotationIterable
+        if results.connection_counts:
+            queryset = queryset.annotate(
+                **{count.annotation_name: count.expression for count in results.connection_counts}
+            )
+        return queryset
+
     def process_prefetch(self, to_attr: str, results: OptimizationResults, filter_info: GraphQLFilterInfo) -> Prefetch:
         """Process a prefetch, optimizing its queryset based on the given filter info."""
         queryset = self.optimize(results, filter_info)
         queryset = self.paginate_prefetch_queryset(queryset, filter_info)
         return Prefetch(self.name, queryset, to_attr=to_attr if to_attr != self.name else None)
 
+    def can_join_annotations(self) -> bool:
+        """Can the annotations of this to-one relation be calculated in the query the relation is joined to?"""
+        return can_join_annotations(self.model, {**self.aliases, **self.annotations})
+
+    def should_prefetch(self, queryset: QuerySet) -> bool:
+        """
+        Should the related objects of this to-one relation be prefetched instead of joined to the parent?
+
+        :param queryset: QuerySet of the parent the related objects are fetched for.
+        """
+        field = get_model_field(self.parent.model, self.name)
+        using = self.parent.get_database(queryset)
+        return should_prefetch_related(self.parent.model, field, self.only_fields, self.fetch_strategy, using=using)
+
+    def is_count_only_connection(self, filter_info: GraphQLFilterInfo) -> bool:
+        """
+        Is this optimizer for a nested connection that only selects its total count or page info?
+        The related objects of such connections don't need to be fetched, since the connection
+        can be resolved from a count or existence subquery annotated to the parent.
+        """
+        if not filter_info.get("is_connection", False) or filter_info.get("keyset", False):
+            return False
+        # Custom resolvers expect the related objects to have been prefetched.
+        if not self.uses_default_resolver:
+            return False
+        if not self.connection_fields.issubset({optimizer_settings.TOTAL_COUNT_FIELD, "pageInfo", "__typename"}):
+            return False
+        if not self.page_info_fields.issubset({"hasNextPage", "hasPreviousPage", "__typename"}):
+            return False
+        return get_related_lookup(get_model_field(self.parent.model, self.name)) is not None
+
+    def process_connection_count(
+        self,
+        to_attr: str,
+        results: OptimizationResults,
+        filter_info: GraphQLFilterInfo,
+    ) -> ConnectionCount:
+        """
+        Process the annotation for a nested connection that only selects its total count or page info.
+        If only `hasNextPage` is needed, check if there are related objects past the end of the page
+        with an `EXISTS` subquery. Otherwise, count the related objects with a subquery.
+        """
+        queryset = self.optimize(results, filter_info)
+        related_lookup = get_related_lookup(get_model_field(self.parent.model, self.name))
+        related = queryset.filter(**related_lookup).order_by()
+
+        pagination_args = self.get_pagination_args(filter_info)
+        # Without `last`, the end of the page doesn't depend on the total count.
+        cut = calculate_queryset_slice(**{**pagination_args, "size": sys.maxsize})
+
+        if (
+            not self.total_count
+            and pagination_args["last"] is None
+            and cut.stop != sys.maxsize
+            and self.page_info_fields.issubset({"hasNextPage", "__typename"})
+        ):
+            annotation_name = f"{optimizer_settings.PREFETCH_HAS_NEXT_KEY}_{to_attr}"
+            expression = models.Exists(related[cut.stop :])
+        else:
+            annotation_name = f"{optimizer_settings.PREFETCH_COUNT_KEY}_{to_attr}"
+            expression = SubqueryCount(related.values("pk"))
+
+        prefetch_queryset = self.paginate_prefetch_queryset(queryset, filter_info)
+        prefetch = Prefetch(self.name, prefetch_queryset, to_attr=to_attr if to_attr != self.name else None)
+        return ConnectionCount(annotation_name=annotation_name, expression=expression, prefetch=prefetch)
+
+    def get_pagination_args(self, filter_info: GraphQLFilterInfo) -> PaginationArgs:
+        """Validate the pagination arguments of a nested connection from the given filter info."""
+        return validate_pagination_args(
+            after=filter_info.get("filters", {}).get("after"),
+            before=filter_info.get("filters", {}).get("before"),
+            offset=filter_info.get("filters", {}).get("offset"),
+            first=filter_info.get("filters", {}).get("first"),
+            last=filter_info.get("filters", {}).get("last"),
+            max_limit=filter_info.get("max_limit", graphene_settings.RELAY_CONNECTION_MAX_LIMIT),
+        )
+
     def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFilterInfo) -> QuerySet:
         """Paginate prefetch queryset based on the given filter info after it has been filtered."""
         # Only paginate nested connection fields.
@@ -208,14 +499,18 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
             or []
         )
 
-        pagination_args = validate_pagination_args(
-            after=filter_info.get("filters", {}).get("after"),
-            before=filter_info.get("filters", {}).get("before"),
-            offset=filter_info.get("filters", {}).get("offset"),
-            first=filter_info.get("filters", {}).get("first"),
-            last=filter_info.get("filters", {}).get("last"),
-            max_limit=filter_info.get("max_limit", graphene_settings.RELAY_CONNECTION_MAX_LIMIT),
-        )
+        if filter_info.get("keyset", False):
+            return self.paginate_prefetch_queryset_with_keyset(queryset, filter_info, field, field_name, order_by)
+
+        pagination_args = self.get_pagination_args(filter_info)
+
+        # Lateral pagination can only be used if the page can be determined without the total count.
+        if (
+            pagination_args.get("last") is None
+            and pagination_args.get("size") is not None
+            and self.can_use_lateral_pagination(queryset, field, filter_info)
+        ):
+            return self.paginate_prefetch_queryset_with_lateral(queryset, field, field_name, pagination_args)
 
         if self.total_count or pagination_args.get("last") is not None or pagination_args.get("size") is None:
             # If the query asks for total count for a nested connection field,
@@ -223,14 +518,8 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
             # or the user has set the `max_size` for the field to None (=no limit),
             # annotate the models in the queryset with the total count for each partition.
             # This is optional, since there is a performance impact due to needing
-            # to use a subquery for each partition.
-            queryset = queryset.annotate(
-                **{
-                    optimizer_settings.PREFETCH_COUNT_KEY: SubqueryCount(
-                        queryset.filter(**{field_name: models.OuterRef(field_name)}),
-                    ),
-                },
-            )
+            # to count all rows in each partition.
+            queryset = self.annotate_partition_count(queryset, field_name)
 
         # Don't limit the queryset if no pagination arguments are given (and field `max_size=None`)
         if all(value is None for value in pagination_args.values()):  # pragma: no cover
@@ -242,7 +531,7 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
             cut = calculate_queryset_slice(**pagination_args)
             queryset = add_slice_to_queryset(queryset, start=models.Value(cut.start), stop=models.Value(cut.stop))
 
-        _register_for_prefetch_hack(self.info, field)
+        _register_for_prefetch_hack(field)
 
         return (
             queryset
@@ -271,6 +560,139 @@ def paginate_prefetch_queryset(self, queryset: QuerySet, filter_info: GraphQLFil
             )
         )
 
+    def can_use_lateral_pagination(
+        self, queryset: QuerySet, field: ToManyField, filter_info: GraphQLFilterInfo
+    ) -> bool:
+        """Should the nested connection for the given prefetch queryset be paginated with lateral subqueries?"""
+        strategy = filter_info.get("pagination_strategy") or optimizer_settings.NESTED_PAGINATION_STRATEGY
+        return (
+            strategy == "lateral"
+            and isinstance(field, (models.ManyToOneRel, models.ManyToManyField, models.ManyToManyRel))
+            and supports_lateral_join(queryset.db)
+        )
+
+    def paginate_prefetch_queryset_with_lateral(
+        self,
+        queryset: QuerySet,
+        field: ToManyField,
+        field_name: str,
+        pagination_args: PaginationArgs,
+    ) -> QuerySet:
+        """
+        Paginate prefetch queryset by slicing each partition in a lateral subquery,
+        so that only the rows on the requested page need to be read from each partition.
+        The slicing filter is added when the queryset is prefetched, see `_prefetch_hack`.
+        """
+        if self.total_count:
+            # Rows outside the page are not selected, so they cannot be counted with a window function.
+            queryset = self.annotate_partition_count(queryset, field_name, use_window=False)
+
+        # Alias the partition field so that the slicing filter uses the same join as the prefetch filter.
+        queryset = queryset.alias(**{optimizer_settings.PREFETCH_PARTITION_KEY: models.F(field_name)})
+
+        cut = calculate_queryset_slice(**pagination_args)
+        _register_for_prefetch_hack(field)
+        _register_for_lateral_pagination(
+            queryset,
+            # Reverse foreign keys can point to a field other than the primary key.
+            partition_value=(
+                field.remote_field.target_field.attname if isinstance(field, models.ManyToOneRel) else "pk"
+            ),
+            start=cut.start,
+            stop=cut.stop,
+        )
+        return queryset
+
+    def paginate_prefetch_queryset_with_keyset(
+        self,
+        queryset: QuerySet,
+        filter_info: GraphQLFilterInfo,
+        field: ToManyField,
+        field_name: str,
+        order_by: list[str],
+    ) -> QuerySet:
+        """
+        Paginate prefetch queryset for a keyset paginated connection field.
+        Rows before or after the cursors are removed with a seek predicate on the ordering keys,
+        so that each partition only needs to be limited by the number of items requested.
+        One extra item is fetched for each partition to determine whether there are more items.
+        """
+        pagination_args = validate_keyset_pagination_args(
+            after=filter_info.get("filters", {}).get("after"),
+            before=filter_info.get("filters", {}).get("before"),
+            offset=filter_info.get("filters", {}).get("offset"),
+            first=filter_info.get("filters", {}).get("first"),
+            last=filter_info.get("filters", {}).get("last"),
+            max_limit=filter_info.get("max_limit", graphene_settings.RELAY_CONNECTION_MAX_LIMIT),
+        )
+
+        ordering = get_keyset_ordering(order_by, queryset.model)
+        queryset = annotate_keyset_values(queryset, ordering).order_by(*ordering)
+
+        if self.total_count:
+            # The total count is for the whole connection, so it cannot be counted
+            # from the same rows as the page if they are filtered with the cursors.
+            has_cursor = pagination_args["after"] is not None or pagination_args["before"] is not None
+            queryset = self.annotate_partition_count(queryset, field_name, use_window=not has_cursor)
+
+        if pagination_args["after"] is not None:
+            queryset = queryset.filter(
+                keyset_filter(ordering, pagination_args["after"], model=queryset.model, using=queryset.db)
+            )
+        if pagination_args["before"] is not None:
+            queryset = queryset.filter(
+                keyset_filter(ordering, pagination_args["before"], model=queryset.model, using=queryset.db, before=True)
+            )
+
+        start = pagination_args["offset"]
+        stop: Optional[int] = None
+        if pagination_args["first"] is not None:
+            stop = start + pagination_args["first"] + 1
+        elif pagination_args["last"] is not None:
+            # Partition index is counted from the end, so that the last items of each partition are kept.
+            ordering = reverse_ordering(ordering)
+            stop = pagination_args["last"] + 1
+        elif start == 0:
+            return queryset
+
+        _register_for_prefetch_hack(field)
+
+        index = optimizer_settings.PREFETCH_PARTITION_INDEX
+        filters: dict[str, int] = {f"{index}__gte": start}
+        if stop is not None:
+            filters[f"{index}__lt"] = stop
+
+        return queryset.alias(
+            **{
+                index: (
+                    models.Window(
+                        expression=RowNumber(),
+                        partition_by=models.F(field_name),
+                        order_by=ordering,
+                    )
+                    - models.Value(1)  # Start from zero.
+                )
+            },
+        ).filter(**filters)
+
+    def annotate_partition_count(self, queryset: QuerySet, field_name: str, *, use_window: bool = True) -> QuerySet:
+        """
+        Annotate the models in the prefetch queryset with the total count of their partition.
+
+        The count is calculated with a window function over the partition, so that it's counted
+        in the same pass as the partition index. If the database doesn't support window functions,
+        or `use_window` is False, a correlated subquery is used instead.
+
+        :param queryset: The prefetch queryset to annotate.
+        :param field_name: Name of the field on the prefetched model the queryset is partitioned by.
+        :param use_window: Can the count be calculated from the rows selected by the queryset?
+        """
+        if use_window and connections[queryset.db].features.supports_over_clause:
+            count = models.Window(models.Count("*"), partition_by=models.F(field_name))
+        else:
+            count = SubqueryCount(queryset.filter(**{field_name: models.OuterRef(field_name)}))
+        return queryset.annotate(**{optimizer_settings.PREFETCH_COUNT_KEY: count})
+
     def filter_queryset(self, queryset: QuerySet, filter_info: GraphQLFilterInfo) -> QuerySet:
         """Run all filtering based on the object type matching the queryset's model."""
         # Run filtering hooks on object types if they exist.
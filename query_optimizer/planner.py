@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from django.db import models, router
+from django.dispatch import receiver
+from django.test.signals import setting_changed  # type: ignore[attr-defined]
+from graphene_django.registry import get_global_registry
+from graphene_django.settings import graphene_settings
+
+from .cache import LRUCache
+from .result_cache import estimate_count
+from .settings import SETTING_NAME, optimizer_settings
+
+if TYPE_CHECKING:
+    from .typing import Any, Iterable, Literal, Optional
+
+
+__all__ = [
+    "estimate_row_count",
+    "estimate_row_width",
+    "should_prefetch_related",
+]
+
+
+# Estimated number of bytes a value of a field of the given internal type takes in a result row.
+FIELD_WIDTHS: dict[str, int] = {
+    "AutoField": 4,
+    "BigAutoField": 8,
+    "BigIntegerField": 8,
+    "BinaryField": 256,
+    "BooleanField": 1,
+    "DateField": 4,
+    "DateTimeField": 8,
+    "DecimalField": 8,
+    "DurationField": 8,
+    "FloatField": 8,
+    "IntegerField": 4,
+    "JSONField": 256,
+    "PositiveBigIntegerField": 8,
+    "PositiveIntegerField": 4,
+    "PositiveSmallIntegerField": 2,
+    "SmallAutoField": 2,
+    "SmallIntegerField": 2,
+    "TextField": 256,
+    "TimeField": 8,
+    "UUIDField": 16,
+}
+DEFAULT_FIELD_WIDTH = 16
+# Strings are assumed to fill a quarter of their maximum length on average.
+MAX_STRING_WIDTH = 256
+
+# Estimates sampled from the database statistics, keyed by database alias and table name.
+# Tables without statistics are stored with a negative estimate, so that they are not looked up again.
+_ROW_COUNT_CACHE: Optional[LRUCache[tuple[str, str], int]] = None
+
+
+def get_row_count_cache() -> LRUCache[tuple[str, str], int]:
+    """Get the cache for row count estimates sampled from the database. Created lazily."""
+    global _ROW_COUNT_CACHE  # noqa: PLW0603
+    if _ROW_COUNT_CACHE is None:
+        _ROW_COUNT_CACHE = LRUCache(max_size=1000, ttl=optimizer_settings.PLANNER_STATISTICS_TTL)
+    return _ROW_COUNT_CACHE
+
+
+def should_prefetch_related(
+    model: type[models.Model],
+    related_field: models.Field,
+    field_names: Iterable[str],
+    strategy: Optional[Literal["select_related", "prefetch", "auto"]] = None,
+    using: Optional[str] = None,
+) -> bool:
+    """
+    Should the objects of the given to-one relation be prefetched with a separate query,
+    instead of joining them to the query for the given model with `select_related`?
+
+    With the "auto" strategy, the choice is made by comparing the estimated number of bytes each option
+    transfers. A join repeats the related columns on every row, while a prefetch fetches each
+    related object once, but costs an extra round trip to the database. Only foreign keys can point
+    to the same related object from multiple rows, so other relations are always joined.
+
+    :param model: The model the relation is on.
+    :param related_field: The to-one relation.
+    :param field_names: Names of the fields selected from the related model.
+    :param strategy: Strategy for the relation. Uses the `TO_ONE_FETCH_STRATEGY` setting if not given.
+    :param using: The database the model's instances are read from. Uses the Django router if not given.
+    """
+    strategy = strategy or optimizer_settings.TO_ONE_FETCH_STRATEGY
+    if strategy != "auto":
+        return strategy == "prefetch"
+
+    if not isinstance(related_field, models.ForeignKey) or related_field.one_to_one:
+        return False
+
+    # The related objects are read from the same database as the instances, whether they are joined or prefetched.
+    parent_rows = estimate_row_count(model, using=using)
+    related_rows = estimate_row_count(related_field.related_model, using=using)
+    if parent_rows is None or related_rows is None:
+        return False
+
+    # Unlimited lists are assumed to be fetched in pages of the default size, like connections.
+    fetched_rows = min(parent_rows, graphene_settings.RELAY_CONNECTION_MAX_LIMIT or parent_rows)
+    width = estimate_row_width(related_field.related_model, field_names)
+
+    join_cost = fetched_rows * width
+    prefetch_cost = min(related_rows, fetched_rows) * width + optimizer_settings.PLANNER_ROUND_TRIP_COST
+    return prefetch_cost < join_cost
+
+
+def estimate_row_count(model: type[models.Model], using: Optional[str] = None) -> Optional[int]:
+    """
+    Estimate the number of rows in the table of the given model. Uses the `row_count_hint` declared
+    on the model's object type if it has one. Otherwise, samples the database statistics for the table.
+
+    :param model: The model to estimate the row count for.
+    :param using: The database to sample. Uses the Django router if not given.
+    :return: The estimate, or None if it cannot be determined.
+    """
+    object_type = get_global_registry().get_type_for_model(model)
+    hint: Optional[int] = getattr(getattr(object_type, "_meta", None), "row_count_hint", None)
+    if hint is not None:
+        return hint
+
+    using = using or router.db_for_read(model)
+    key = (using, model._meta.db_table)
+    cache = get_row_count_cache()
+    estimate = cache.get(key)
+    if estimate is None:
+        # Database cannot be queried synchronously in an async context, so the estimate is left
+        # for a synchronous request to sample, instead of caching that it cannot be determined.
+        if in_event_loop():
+            return None
+        estimate = estimate_count(model._default_manager.using(using).all())
+        estimate = -1 if estimate is None else estimate
+        cache.set(key, estimate)
+
+    return estimate if estimate >= 0 else None
+
+
+def in_event_loop() -> bool:
+    """Is an event loop running in the current thread?"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def estimate_row_width(model: type[models.Model], field_names: Iterable[str]) -> int:
+    """
+    Estimate the number of bytes the given fields of the given model take in a result row.
+    If no field names are given, all concrete fields are assumed to be fetched.
+    """
+    names = set(field_names)
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not names or field.primary_key or field.name in names or field.attname in names
+    ]
+    return sum(estimate_field_width(field) for field in fields)
+
+
+def estimate_field_width(field: models.Field) -> int:
+    """Estimate the number of bytes a value of the given field takes in a result row."""
+    if isinstance(field, models.ForeignKey):
+        return estimate_field_width(field.target_field)
+
+    internal_type = field.get_internal_type()
+    if internal_type in FIELD_WIDTHS:
+        return FIELD_WIDTHS[internal_type]
+
+    max_length: Optional[int] = getattr(field, "max_length", None)
+    if max_length is not None:
+        return max(min(max_length, MAX_STRING_WIDTH * 4) // 4, 1)
+    return DEFAULT_FIELD_WIDTH
+
+
+@receiver(setting_changed)
+def clear_row_count_cache(**kwargs: Any) -> None:
+    """Sampled estimates should be sampled again after the optimizer settings have changed."""
+    global _ROW_COUNT_CACHE  # noqa: PLW0603
+    if kwargs["setting"] == SETTING_NAME:
+        _ROW_COUNT_CACHE = None
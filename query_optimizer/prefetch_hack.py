@@ -1,31 +1,44 @@
 from __future__ import annotations
 
 import contextlib
+import functools
 from collections import defaultdict
-from contextlib import nullcontext
+from contextvars import ContextVar
 from typing import TYPE_CHECKING
-from unittest.mock import patch
-from weakref import WeakKeyDictionary
 
+from asgiref.sync import sync_to_async
 from django.db import models
-from django.db.models.fields.related_descriptors import _filter_prefetch_queryset
+from django.db.models.fields import related_descriptors
 
-if TYPE_CHECKING:
-    from graphql import OperationDefinitionNode
+from .concurrency import fetch_with_concurrent_prefetch
+from .settings import optimizer_settings
+from .utils import LateralPartitionSlice
 
-    from .typing import ContextManager, GQLInfo, TModel, ToManyField, TypeAlias
+if TYPE_CHECKING:
+    from .typing import Callable, ContextManager, Optional, TModel, ToManyField, TypeAlias
 
 __all__ = [
+    "_register_for_lateral_pagination",
     "_register_for_prefetch_hack",
+    "afetch_in_context",
     "fetch_context",
+    "fetch_in_context",
+    "prefetch_hack_scope",
 ]
 
 
 _PrefetchCacheType: TypeAlias = defaultdict[str, defaultdict[str, set[str]]]
-_PREFETCH_HACK_CACHE: WeakKeyDictionary[OperationDefinitionNode, _PrefetchCacheType] = WeakKeyDictionary()
+_FilterPrefetchQueryset: TypeAlias = "Callable[[models.QuerySet, str, list[models.Model]], models.QuerySet]"
+
+# Through tables registered for the querysets that will be fetched next in the current context.
+_PREFETCH_HACK_CACHE: ContextVar[Optional[_PrefetchCacheType]] = ContextVar("_PREFETCH_HACK_CACHE", default=None)
+# Through tables registered for the querysets that are being fetched in the current context.
+_PREFETCH_HACK_ACTIVE: ContextVar[Optional[_PrefetchCacheType]] = ContextVar("_PREFETCH_HACK_ACTIVE", default=None)
+
+_LATERAL_HINT = "_optimizer_lateral_slice"
 
 
-def _register_for_prefetch_hack(info: GQLInfo, field: ToManyField) -> None:
+def _register_for_prefetch_hack(field: ToManyField) -> None:
     # Registers the through table of a many-to-many field for the prefetch hack.
     # See `_prefetch_hack` for more information.
     if not isinstance(field, (models.ManyToManyField, models.ManyToManyRel)):
@@ -36,12 +49,36 @@ def _register_for_prefetch_hack(info: GQLInfo, field: ToManyField) -> None:
     field_name = field.remote_field.name
     through = forward_field.m2m_db_table()
 
-    # Use the `info.operation` as the key to make sure the saved values are cleared after the request ends.
-    cache = _PREFETCH_HACK_CACHE.setdefault(info.operation, defaultdict(lambda: defaultdict(set)))
+    # State is stored in a context variable, so that it's only visible to the current thread or task.
+    # It's passed on to the prefetch hook by `fetch_context` when the optimized queryset is fetched.
+    cache = _PREFETCH_HACK_CACHE.get()
+    if cache is None:
+        cache = defaultdict(lambda: defaultdict(set))
+        _PREFETCH_HACK_CACHE.set(cache)
     cache[db_table][field_name].add(through)
 
 
-def _prefetch_hack(queryset: models.QuerySet, field_name: str, instances: list[models.Model]) -> models.QuerySet:
+def _register_for_lateral_pagination(
+    queryset: models.QuerySet,
+    *,
+    partition_value: str,
+    start: int,
+    stop: int,
+) -> None:
+    # Marks the prefetch queryset to be sliced for each partition with a lateral subquery.
+    # The partitions are only known when the queryset is filtered by `_filter_prefetch_queryset`,
+    # so the filter is added in `_prefetch_hack`. The queryset should have the partition field aliased
+    # to `PREFETCH_PARTITION_KEY`, and `partition_value` is the attribute of the parent model instances
+    # that contains the value of the partition field.
+    queryset._hints[_LATERAL_HINT] = (partition_value, start, stop)
+
+
+def _prefetch_hack(
+    filter_prefetch_queryset: _FilterPrefetchQueryset,
+    queryset: models.QuerySet,
+    field_name: str,
+    instances: list[models.Model],
+) -> models.QuerySet:
     """
     Patches the prefetch mechanism to not create duplicate joins in the SQL query.
     This is needed due to how filtering with many-to-many relations is implemented in Django,
@@ -54,42 +91,109 @@ def _prefetch_hack(queryset: models.QuerySet, field_name: str, instances: list[m
     from the parent model, an INNER join is added to the through table. This creates unnecessary duplicates
     in the SQL query, which messes up the window function's partitioning. Therefore, this hack is needed
     to prevent the INNER join from being added.
+
+    This is also where querysets registered with `_register_for_lateral_pagination`
+    are sliced for each partition, since this is where the partitions are known.
+
+    The hack is installed permanently in place of Django's `_filter_prefetch_queryset`
+    (given here as `filter_prefetch_queryset`), but it only changes the prefetch
+    queryset for the querysets being fetched with `fetch_context` in the current context.
     """
-    #
-    # `filter_is_sticky` is set here just to prevent the `used_aliases` from being cleared
-    # when the queryset is cloned for filtering in `_filter_prefetch_queryset`.
-    # See: `django.db.models.sql.query.Query.chain`.
-    queryset.query.filter_is_sticky = True
-    #
-    # Cache is stored per-operation, so there should only be one top-level value.
-    cache: _PrefetchCacheType = next(iter(_PREFETCH_HACK_CACHE.values()))
-    #
-    # Add the registered through tables for a given model and field to the Query's `used_aliases`.
-    # This is passed along during the filtering that happens as a part of `_filter_prefetch_queryset`,
-    # until `django.db.models.sql.query.Query.join`, which has access to it with its `reuse` argument.
-    # There, this should prevent the method from adding a duplicate join.
-    queryset.query.used_aliases = cache[queryset.model._meta.db_table][field_name]
-
-    return _filter_prefetch_queryset(queryset, field_name, instances)
-
-
-_HACK_CONTEXT = patch(
-    f"{_filter_prefetch_queryset.__module__}.{_filter_prefetch_queryset.__name__}",
-    side_effect=_prefetch_hack,
-)
+    cache = _PREFETCH_HACK_ACTIVE.get()
+    if cache is None and _LATERAL_HINT not in queryset._hints:
+        return filter_prefetch_queryset(queryset, field_name, instances)
+
+    lateral_slice: Optional[LateralPartitionSlice] = None
+    if _LATERAL_HINT in queryset._hints and instances:
+        partition_value, start, stop = queryset._hints[_LATERAL_HINT]
+        lateral_slice = LateralPartitionSlice(
+            queryset,
+            partition_by=optimizer_settings.PREFETCH_PARTITION_KEY,
+            partitions=[getattr(instance, partition_value) for instance in instances],
+            start=start,
+            stop=stop,
+        )
+    if cache is not None:
+        #
+        # `filter_is_sticky` is set here just to prevent the `used_aliases` from being cleared
+        # when the queryset is cloned for filtering in `_filter_prefetch_queryset`.
+        # See: `django.db.models.sql.query.Query.chain`.
+        queryset.query.filter_is_sticky = True
+        #
+        # Add the registered through tables for a given model and field to the Query's `used_aliases`.
+        # This is passed along during the filtering that happens as a part of `_filter_prefetch_queryset`,
+        # until `django.db.models.sql.query.Query.join`, which has access to it with its `reuse` argument.
+        # There, this should prevent the method from adding a duplicate join.
+        queryset.query.used_aliases = set(cache[queryset.model._meta.db_table][field_name])
+
+    queryset = filter_prefetch_queryset(queryset, field_name, instances)
+    if lateral_slice is not None:
+        queryset = queryset.filter(lateral_slice)
+    return queryset
+
+
+def _install_prefetch_hack() -> None:
+    """Replace Django's `_filter_prefetch_queryset` with `_prefetch_hack`. Safe to call multiple times."""
+    original = related_descriptors._filter_prefetch_queryset
+    if getattr(original, "__optimizer_hack__", False):
+        return
+
+    @functools.wraps(original)
+    def hook(queryset: models.QuerySet, field_name: str, instances: list[models.Model]) -> models.QuerySet:
+        return _prefetch_hack(original, queryset, field_name, instances)
+
+    hook.__optimizer_hack__ = True
+    related_descriptors._filter_prefetch_queryset = hook
+
+
+_install_prefetch_hack()
+
+
+@contextlib.contextmanager
+def prefetch_hack_scope() -> ContextManager:
+    """
+    Scope for optimizing querysets and fetching them. Registrations made for the prefetch hack
+    inside the scope that are not consumed by a fetch, e.g., because the optimized queryset
+    was never evaluated, are discarded on exit, so that later fetches in the same context don't use them.
+    Registrations made before entering are restored on exit.
+    """
+    token = _PREFETCH_HACK_CACHE.set(None)
+    try:
+        yield
+    finally:
+        _PREFETCH_HACK_CACHE.reset(token)
 
 
 @contextlib.contextmanager
 def fetch_context() -> ContextManager:
-    """Patches the prefetch mechanism if required."""
+    """
+    Applies the prefetch hack for the querysets registered in the current context.
+    Registrations made before entering are consumed, so that later fetches start with a clean state.
+    Can be nested, in which case the outer context's registrations are restored on exit.
+    """
+    cache = _PREFETCH_HACK_CACHE.get()
+    _PREFETCH_HACK_CACHE.set(None)
+    token = _PREFETCH_HACK_ACTIVE.set(cache)
     try:
-        with _HACK_CONTEXT if _PREFETCH_HACK_CACHE else nullcontext():
-            yield
+        yield
     finally:
-        _PREFETCH_HACK_CACHE.clear()
+        _PREFETCH_HACK_ACTIVE.reset(token)
 
 
 def fetch_in_context(queryset: models.QuerySet[TModel]) -> list[TModel]:
     """Evaluates the queryset with the prefetch hack applied."""
     with fetch_context():
-        return list(queryset)  # the database query is executed here
+        return _fetch(queryset)
+
+
+async def afetch_in_context(queryset: models.QuerySet[TModel]) -> list[TModel]:
+    """Evaluates the queryset asynchronously with the prefetch hack applied."""
+    with fetch_context():
+        # Context variables are copied to the thread where the database query is executed.
+        return await sync_to_async(_fetch)(queryset)
+
+
+def _fetch(queryset: models.QuerySet[TModel]) -> list[TModel]:
+    if isinstance(queryset, models.QuerySet):
+        return fetch_with_concurrent_prefetch(queryset)
+    return list(queryset)  # the database query is executed here
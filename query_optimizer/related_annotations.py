@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import dataclasses
+from copy import copy
+from typing import TYPE_CHECKING
+
+from django.db.models import Aggregate, F, OuterRef, Q, Subquery, Window
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import RawSQL, ResolvedOuterRef
+
+from .ast import get_model_field, is_to_many
+from .json_prefetch import JSONPrefetchIterable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from django.db.models import Model, QuerySet
+
+    from .typing import Any, ExpressionKind
+
+
+__all__ = [
+    "RelatedAnnotationIterable",
+    "RelatedAnnotations",
+    "annotate_related",
+    "can_join_annotations",
+]
+
+
+RELATED_ANNOTATION_PREFIX = "_optimizer_related"
+
+
+@dataclasses.dataclass
+class RelatedAnnotations:
+    """Aliases and annotations for a to-one related model that is joined to the model being optimized."""
+
+    path: tuple[str, ...]
+    """Names of the relations that lead from the optimized model to the related model."""
+
+    aliases: dict[str, ExpressionKind]
+    annotations: dict[str, ExpressionKind]
+
+
+def can_join_annotations(model: type[Model], expressions: dict[str, ExpressionKind]) -> bool:
+    """
+    Can the given annotations of the given model be added to a query the model is joined to?
+    Expressions that aggregate rows, use subqueries or window functions, or follow to-many relations
+    depend on the rows of the query they are in, so they must be calculated in a query of their own.
+    """
+    for expression in expressions.values():
+        for node in iter_expressions(expression):
+            if isinstance(node, (Aggregate, Subquery, Window, RawSQL, OuterRef, ResolvedOuterRef)):
+                return False
+            if isinstance(node, F) and follows_to_many(model, node.name, expressions):
+                return False
+            if isinstance(node, Q) and any(
+                follows_to_many(model, child[0], expressions) for child in node.children if isinstance(child, tuple)
+            ):
+                return False
+    return True
+
+
+def iter_expressions(expression: Any) -> Iterator[Any]:
+    """Iterate the given expression and all the expressions, F-objects and Q-objects it contains."""
+    yield expression
+    if isinstance(expression, Q):
+        for child in expression.children:
+            yield from iter_expressions(child[1] if isinstance(child, tuple) else child)
+    elif hasattr(expression, "get_source_expressions"):
+        for source in expression.get_source_expressions():
+            if source is not None:
+                yield from iter_expressions(source)
+
+
+def follows_to_many(model: type[Model], lookup: str, names: dict[str, ExpressionKind]) -> bool:
+    """Does the given lookup on the given model follow a to-many relation? Other aliases or annotations don't."""
+    parts = lookup.split(LOOKUP_SEP)
+    if parts[0] in names:
+        return False
+
+    for part in parts:
+        field = get_model_field(model, part)
+        if field is None:  # Transforms and lookups, e.g., `__year`.
+            return False
+        if is_to_many(field):
+            return True
+        if not field.is_relation:
+            return False
+        model = field.related_model
+    return False
+
+
+def annotate_related(queryset: QuerySet, related: RelatedAnnotations) -> QuerySet:
+    """
+    Add the aliases and annotations of a joined related model to the given queryset,
+    with their lookups rewritten to go through the relation, under names namespaced by the relation path.
+    """
+    prefix = LOOKUP_SEP.join(related.path)
+    names = {
+        name: LOOKUP_SEP.join((RELATED_ANNOTATION_PREFIX, *related.path, name))
+        for name in (*related.aliases, *related.annotations)
+    }
+    if related.aliases:
+        queryset = queryset.alias(
+            **{names[name]: relabel(expression, prefix, names) for name, expression in related.aliases.items()}
+        )
+    return queryset.annotate(
+        **{names[name]: relabel(expression, prefix, names) for name, expression in related.annotations.items()}
+    )
+
+
+def relabel(expression: Any, prefix: str, names: dict[str, str]) -> Any:
+    """
+    Rewrite the lookups in the given expression to start from a model the expression's model is joined to.
+
+    :param expression: Expression to rewrite.
+    :param prefix: Lookup from the joining model to the expression's model.
+    :param names: Names the aliases and annotations the expression can refer to are renamed to.
+    """
+    if isinstance(expression, F):
+        return F(relabel_lookup(expression.name, prefix, names))
+
+    if isinstance(expression, Q):
+        q = copy(expression)
+        q.children = [
+            (relabel_lookup(child[0], prefix, names), relabel(child[1], prefix, names))
+            if isinstance(child, tuple)
+            else relabel(child, prefix, names)
+            for child in expression.children
+        ]
+        return q
+
+    if hasattr(expression, "get_source_expressions"):
+        expression = expression.copy()
+        expression.set_source_expressions(
+            [relabel(source, prefix, names) for source in expression.get_source_expressions()]
+        )
+    return expression
+
+
+def relabel_lookup(lookup: str, prefix: str, names: dict[str, str]) -> str:
+    name, sep, rest = lookup.partition(LOOKUP_SEP)
+    if name in names:
+        return f"{names[name]}{sep}{rest}"
+    return f"{prefix}{LOOKUP_SEP}{lookup}"
+
+
+class RelatedAnnotationIterable(JSONPrefetchIterable):
+    """Iterable that moves the annotations for joined related objects from the fetched instances to the objects."""
+
+    def __iter__(self) -> Iterator[Model]:
+        names = [name for name in self.queryset.query.annotation_select if name.startswith(RELATED_ANNOTATION_PREFIX)]
+        for instance in super().__iter__():
+            for name in names:
+                value = instance.__dict__.pop(name, None)
+                *path, attr = name.split(LOOKUP_SEP)[1:]
+                related: Model | None = instance
+                for part in path:
+                    related = related._state.fields_cache.get(part)
+                    if related is None:
+                        break
+                if related is not None:
+                    setattr(related, attr, value)
+            yield instance
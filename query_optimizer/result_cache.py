@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import TYPE_CHECKING
+
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models.query import ModelIterable
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db.models.sql import Query
+from django.db.models.sql.constants import MULTI
+from django.dispatch import receiver
+from django.test.signals import setting_changed  # type: ignore[attr-defined]
+from django.utils.module_loading import import_string
+from graphene_django.registry import get_global_registry
+
+from .cache import LRUCache
+from .settings import SETTING_NAME, optimizer_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from django.db.models import Model, QuerySet
+    from django.db.models.sql.compiler import SQLCompiler
+
+    from .typing import Any, Callable, Iterable, Optional, TModel
+
+
+__all__ = [
+    "DjangoCacheResultCache",
+    "LocalResultCache",
+    "ResultCache",
+    "cache_results",
+    "cached_count",
+    "get_result_cache",
+    "should_cache_results",
+]
+
+
+class ResultCache(ABC):
+    """
+    Base class for result cache backends. Stores the rows fetched for SQL queries,
+    along with version numbers for database tables used to invalidate the rows.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[list[tuple[Any, ...]]]:
+        """Get the rows stored for the given key, or None if there are none."""
+
+    @abstractmethod
+    def set(self, key: str, rows: list[tuple[Any, ...]]) -> None:
+        """Store the rows for the given key."""
+
+    @abstractmethod
+    def get_versions(self, tables: Iterable[str]) -> list[int]:
+        """Get the current version numbers of the given database tables."""
+
+    @abstractmethod
+    def invalidate(self, table: str) -> None:
+        """Increase the version number of the given database table, so that rows cached from it are not used."""
+
+
+class LocalResultCache(ResultCache):
+    """Result cache stored in the current process. Size-bounded, evicts least recently used rows first."""
+
+    def __init__(self) -> None:
+        self.rows: LRUCache[str, list[tuple[Any, ...]]] = LRUCache(
+            max_size=optimizer_settings.RESULT_CACHE_MAX_SIZE,
+            ttl=optimizer_settings.RESULT_CACHE_TTL,
+        )
+        self.versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[list[tuple[Any, ...]]]:
+        return self.rows.get(key)
+
+    def set(self, key: str, rows: list[tuple[Any, ...]]) -> None:
+        self.rows.set(key, rows)
+
+    def get_versions(self, tables: Iterable[str]) -> list[int]:
+        return [self.versions.get(table, 0) for table in tables]
+
+    def invalidate(self, table: str) -> None:
+        with self._lock:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+
+class DjangoCacheResultCache(ResultCache):
+    """
+    Result cache stored in the Django cache set in the `RESULT_CACHE_ALIAS` setting.
+    Table versions are also stored in the cache, so that they are shared by all processes using it.
+    """
+
+    prefix = "query_optimizer:result"
+
+    def __init__(self) -> None:
+        self.cache = caches[optimizer_settings.RESULT_CACHE_ALIAS]
+
+    def get(self, key: str) -> Optional[list[tuple[Any, ...]]]:
+        return self.cache.get(f"{self.prefix}:{key}")
+
+    def set(self, key: str, rows: list[tuple[Any, ...]]) -> None:
+        self.cache.set(f"{self.prefix}:{key}", rows, timeout=optimizer_settings.RESULT_CACHE_TTL)
+
+    def get_versions(self, tables: Iterable[str]) -> list[int]:
+        keys = {table: f"{self.prefix}:table:{table}" for table in tables}
+        versions = self.cache.get_many(list(keys.values()))
+        return [versions.get(key, 0) for key in keys.values()]
+
+    def invalidate(self, table: str) -> None:
+        key = f"{self.prefix}:table:{table}"
+        # Versions never expire, so that rows cached before an invalidation cannot become valid again.
+        if self.cache.add(key, 1, timeout=None):
+            return
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # The version was removed from the cache, e.g., by eviction, after it was added.
+            self.cache.set(key, 1, timeout=None)
+
+
+_RESULT_CACHE: Optional[ResultCache] = None
+_RESULT_CACHE_LOCK = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the result cache backend. Created lazily based on the `RESULT_CACHE_BACKEND` setting."""
+    global _RESULT_CACHE  # noqa: PLW0603
+    with _RESULT_CACHE_LOCK:
+        if _RESULT_CACHE is None:
+            _RESULT_CACHE = import_string(optimizer_settings.RESULT_CACHE_BACKEND)()
+        return _RESULT_CACHE
+
+
+def should_cache_results(model: Optional[type[Model]]) -> bool:
+    """Should the rows fetched for the given model be cached, based on its object type's `cache_results` option?"""
+    if model is None:
+        return False
+    object_type = get_global_registry().get_type_for_model(model)
+    return bool(getattr(getattr(object_type, "_meta", None), "cache_results", False))
+
+
+def cache_results(queryset: QuerySet[TModel]) -> QuerySet[TModel]:
+    """
+    Cache the rows fetched for the given queryset in the result cache, so that the same SQL query
+    with the same parameters reuses the rows until any of the tables used in the query are modified.
+    Model instances are created from the cached rows like they would be from rows fetched from the database.
+    """
+    if queryset._iterable_class is ModelIterable:
+        queryset._iterable_class = CachedModelIterable
+    return queryset
+
+
+class CachedModelIterable(ModelIterable):
+    """Iterable that creates model instances from rows in the result cache, if they exist there."""
+
+    def __iter__(self) -> Iterator[Model]:
+        queryset = self.queryset
+        # Uncommitted changes in a transaction should not be visible to other requests.
+        if connections[queryset.db].in_atomic_block:
+            yield from ModelIterable(queryset, self.chunked_fetch, self.chunk_size)
+            return
+
+        # Use a copy of the query, so that the compiler used for fetching the rows can be replaced.
+        queryset = queryset._chain()
+        get_compiler = queryset.query.get_compiler
+
+        def get_caching_compiler(*args: Any, **kwargs: Any) -> SQLCompiler:
+            compiler = get_compiler(*args, **kwargs)
+            compiler.execute_sql = partial(_execute_cached_sql, compiler, compiler.execute_sql)
+            return compiler
+
+        queryset.query.get_compiler = get_caching_compiler
+        yield from ModelIterable(queryset, self.chunked_fetch, self.chunk_size)
+
+
+def _execute_cached_sql(
+    compiler: SQLCompiler,
+    execute_sql: Callable[..., Any],
+    result_type: Optional[str] = MULTI,
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    if result_type != MULTI:  # pragma: no cover
+        return execute_sql(result_type, *args, **kwargs)
+
+    try:
+        # Also sets up the compiler for creating model instances from the rows.
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return iter([])
+
+    cache = get_result_cache()
+    key = get_cache_key(cache, compiler.using, compiler.query, sql, params)
+    rows = cache.get(key)
+    if rows is None:
+        with compiler.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = [tuple(row) for row in cursor.fetchall()]
+        if compiler.has_extra_select:
+            rows = [row[: compiler.col_count] for row in rows]
+        cache.set(key, rows)
+
+    return [rows]
+
+
+def cached_count(queryset: QuerySet, *, approximate: bool = False) -> int:
+    """
+    Count the number of items in the given queryset, reusing the count from the result cache
+    if the same query has been counted before, and none of the tables used in it have been modified since.
+
+    :param queryset: QuerySet to count.
+    :param approximate: If the queryset is not filtered, use the row count estimate from the database's
+                        planner statistics instead of counting the rows. Only supported on PostgreSQL.
+    """
+    # Uncommitted changes in a transaction should not be visible to other requests.
+    if connections[queryset.db].in_atomic_block:
+        return queryset.count()
+
+    # Compile a copy of the query, since compiling sets up the joins (and tables) used in it.
+    query = queryset.query.chain()
+    try:
+        sql, params = query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:
+        return 0
+
+    cache = get_result_cache()
+    key = get_cache_key(cache, queryset.db, query, f"COUNT({sql})", params, approximate)
+    rows = cache.get(key)
+    if rows is None:
+        count = estimate_count(queryset) if approximate else None
+        rows = [(count if count is not None else queryset.count(),)]
+        cache.set(key, rows)
+
+    return rows[0][0]
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Estimate the number of items in the given queryset from the planner statistics of its table.
+
+    :return: The estimate, or None if the queryset is filtered, or the database doesn't have statistics for it.
+    """
+    query = queryset.query
+    if query.where or query.distinct or query.combinator or query.is_sliced:
+        return None
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:  # pragma: no cover
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [query.model._meta.db_table])
+        row = cursor.fetchone()
+
+    # Tables that have not been analyzed yet have a negative estimate.
+    return row[0] if row is not None and row[0] >= 0 else None  # pragma: no cover
+
+
+def get_cache_key(cache: ResultCache, using: str, query: Query, *parts: Any) -> str:
+    """
+    Get the key for storing the results of the given query in the given result cache.
+    Includes the versions of all tables used in the query, so that the key changes when they are modified.
+
+    :param cache: Result cache the results are stored in.
+    :param using: Database alias the query is made to.
+    :param query: Query the results are for.
+    :param parts: Other parts of the key, e.g., the compiled SQL and its parameters.
+    """
+    tables = sorted(get_query_tables(query))
+    versions = cache.get_versions(tables)
+    return hashlib.sha256(repr((using, *parts, tables, versions)).encode()).hexdigest()
+
+
+def get_query_tables(query: Query) -> set[str]:
+    """Get the names of all the database tables used by the given query, including its subqueries."""
+    tables = {join.table_name for join in query.alias_map.values()}
+    expressions: list[Any] = [*query.annotations.values(), query.where]
+    while expressions:
+        expression = expressions.pop()
+        if isinstance(expression, Query):
+            tables |= get_query_tables(expression)
+            continue
+        if hasattr(expression, "get_source_expressions"):
+            expressions.extend(item for item in expression.get_source_expressions() if item is not None)
+    return tables
+
+
+def invalidate_model(model: type[Model]) -> None:
+    """Make the rows cached for the tables of the given model (and its parent models) unused."""
+    # Saving a model with multi-table inheritance also saves the rows of its parents.
+    for item in (model, *model._meta.get_parent_list()):
+        get_result_cache().invalidate(item._meta.db_table)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_on_change(sender: type[Model], **kwargs: Any) -> None:  # noqa: ARG001
+    """Invalidate the rows cached for a model's tables when an instance of it is saved or deleted."""
+    if _is_result_cache_used():
+        invalidate_model(sender)
+
+
+@receiver(m2m_changed)
+def invalidate_on_m2m_change(sender: type[Model], action: str, **kwargs: Any) -> None:  # noqa: ARG001
+    """Invalidate the rows cached for a many-to-many relation's through table when the relation changes."""
+    if action.startswith("post_") and _is_result_cache_used():
+        invalidate_model(sender)
+
+
+def _is_result_cache_used() -> bool:
+    # Invalidations are needed even if this process hasn't cached any rows, if the cache is shared.
+    return _RESULT_CACHE is not None or optimizer_settings.RESULT_CACHE_BACKEND != LOCAL_RESULT_CACHE
+
+
+LOCAL_RESULT_CACHE = f"{LocalResultCache.__module__}.{LocalResultCache.__qualname__}"
+
+
+@receiver(setting_changed)
+def clear_result_cache(**kwargs: Any) -> None:
+    """Result cache should be recreated with the new settings after the optimizer settings have changed."""
+    global _RESULT_CACHE  # noqa: PLW0603
+    if kwargs["setting"] == SETTING_NAME:
+        with _RESULT_CACHE_LOCK:
+            _RESULT_CACHE = None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from copy import copy
+from typing import TYPE_CHECKING
+
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from graphql import OperationType
+
+from .settings import optimizer_settings
+
+if TYPE_CHECKING:
+    from django.db.models import Model, QuerySet
+
+    from .typing import Any, GQLInfo, Iterable, Optional, TModel, Union
+
+
+__all__ = [
+    "get_read_database",
+    "use_database",
+    "use_primary_database",
+]
+
+
+def get_read_database(model: type[Model], info: GQLInfo) -> Optional[str]:
+    """
+    Get the database alias the optimized querysets for the given model should be read from,
+    based on the `READ_DATABASE` and `READ_DATABASE_CHOOSER` settings.
+
+    Mutations always read from the primary database, as do all operations
+    after them in the same request (e.g. in batched requests), so that they can see
+    the changes made by the mutation even if the read database is a lagging replica.
+
+    :return: The database alias, or None if Django's database routers should choose the database.
+    """
+    if info.operation.operation == OperationType.MUTATION:
+        use_primary_database(info.context)
+    if getattr(info.context, "optimizer_use_primary_database", False):
+        return None
+
+    if optimizer_settings.READ_DATABASE_CHOOSER is not None:
+        chooser = import_string(optimizer_settings.READ_DATABASE_CHOOSER)
+        return chooser(model, info)
+    return optimizer_settings.READ_DATABASE
+
+
+def use_primary_database(context: Any) -> None:
+    """
+    Make the optimizer read from the primary database instead of the `READ_DATABASE`
+    for the rest of the request with the given context, e.g., after data has been modified.
+    """
+    if context is not None:
+        context.optimizer_use_primary_database = True
+
+
+def use_database(queryset: QuerySet[TModel], using: str) -> QuerySet[TModel]:
+    """
+    Read the given queryset from the given database, along with all the prefetch querysets
+    that don't have a database set yet, so that related objects are read from the same database.
+    """
+    queryset = queryset.using(using)
+    queryset._prefetch_related_lookups = tuple(use_database_for_lookups(queryset._prefetch_related_lookups, using))
+    return queryset
+
+
+def use_database_for_lookups(lookups: Iterable[Union[Prefetch, str]], using: str) -> list[Union[Prefetch, str]]:
+    """Read the querysets of the given prefetch lookups from the given database, if they don't have one set yet."""
+    results: list[Union[Prefetch, str]] = []
+    for lookup in lookups:
+        if isinstance(lookup, Prefetch) and lookup.queryset is not None and lookup.queryset._db is None:
+            lookup = copy(lookup)  # noqa: PLW2901
+            lookup.queryset = use_database(lookup.queryset, using)
+        results.append(lookup)
+    return results
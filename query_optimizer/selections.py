@@ -23,7 +23,12 @@
 
 
 def get_field_selections(info: GQLInfo, model: Optional[type[models.Model]] = None) -> list[Any]:
-    """Compile filter information included in the GraphQL query."""
+    """
+    Compile field selections included in the GraphQL query.
+
+    Only the selections are collected, without compiling the optimizations for the field,
+    so this is cheap enough to call from resolvers.
+    """
     compiler = FieldSelectionCompiler(info, model)
     compiler.run()
     return compiler.field_selections[0][to_snake_case(info.field_name)]
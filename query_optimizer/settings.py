@@ -5,7 +5,7 @@
 from django.test.signals import setting_changed  # type: ignore[attr-defined]
 from settings_holder import SettingsHolder, reload_settings
 
-from .typing import NamedTuple
+from .typing import Literal, NamedTuple, Optional
 
 if TYPE_CHECKING:
     from .typing import Any, Union
@@ -26,6 +26,9 @@ class DefaultSettings(NamedTuple):
     PREFETCH_COUNT_KEY: str = "_optimizer_count"
     """Name used for annotating the prefetched queryset total count."""
 
+    PREFETCH_HAS_NEXT_KEY: str = "_optimizer_has_next"
+    """Name prefix used for annotating whether nested connections that only select `hasNextPage` have a next page."""
+
     PREFETCH_SLICE_START: str = "_optimizer_slice_start"
     """Name used for aliasing the prefetched queryset slice start."""
 
@@ -35,6 +38,12 @@ class DefaultSettings(NamedTuple):
     PREFETCH_PARTITION_INDEX: str = "_optimizer_partition_index"
     """Name used for aliasing the prefetched queryset partition index."""
 
+    PREFETCH_PARTITION_KEY: str = "_optimizer_partition"
+    """Name used for aliasing the field the prefetched queryset is partitioned by for lateral pagination."""
+
+    KEYSET_VALUE_KEY: str = "_optimizer_keyset"
+    """Name prefix used for annotating the ordering key values used in keyset pagination cursors."""
+
     DISABLE_ONLY_FIELDS_OPTIMIZATION: bool = False
     """Disable optimizing fetched fields with `queryset.only()`."""
 
@@ -50,6 +59,112 @@ class DefaultSettings(NamedTuple):
     TOTAL_COUNT_FIELD: str = "totalCount"
     """The field name to use for fetching total count in connection fields."""
 
+    WINDOW_TOTAL_COUNT: bool = False
+    """
+    Fetch the total count of top-level connection fields with a window function in the same query
+    as the page of results, instead of making a separate count query. Falls back to a separate count
+    query when the page is empty, when `last` is used, or when the database doesn't support window functions.
+    """
+
+    NESTED_PAGINATION_STRATEGY: Literal["window", "lateral"] = "window"
+    """
+    How nested connection fields are limited. "window" filters the prefetched rows by their index
+    in their partition calculated with a window function. "lateral" fetches each partition with
+    a lateral subquery that is limited separately, so that only the rows on the requested page
+    need to be read. "lateral" is only used on PostgreSQL, and only when the total count of the partitions
+    is not needed for determining the page. Can be overridden with `pagination_strategy` on the field.
+    """
+
+    PLAN_CACHE_MAX_SIZE: int = 0
+    """
+    Maximum number of compiled optimization plans to cache between requests.
+    Plans are cached per operation, field path, and variable values. Set to 0 to disable the cache.
+    """
+
+    PLAN_CACHE_TTL: Optional[int] = 3600
+    """Number of seconds compiled optimization plans are cached for. Set to None to never expire plans."""
+
+    TO_ONE_FETCH_STRATEGY: Literal["select_related", "prefetch", "auto"] = "select_related"
+    """
+    How related objects of to-one relations are fetched. "select_related" joins them to the query
+    for their parent. "prefetch" fetches them with a separate query. "auto" prefetches foreign keys
+    when the planner estimates that joining them would transfer more data than prefetching them,
+    e.g., when many rows point to a few wide related rows. Can be overridden with `fetch_strategy`
+    on the `RelatedField`.
+    """
+
+    PLANNER_ROUND_TRIP_COST: int = 8192
+    """
+    Estimated cost of making an extra prefetch query, in bytes of row data, used by the "auto" to-one
+    fetch strategy. Higher values make the planner prefer joins.
+    """
+
+    PLANNER_STATISTICS_TTL: Optional[int] = 3600
+    """
+    Number of seconds the row counts sampled from the database statistics for the "auto" to-one
+    fetch strategy are cached for. Set to None to never sample them again.
+    """
+
+    CONCURRENCY_MAX_WORKERS: int = 4
+    """
+    Maximum number of threads used for running independent database queries concurrently.
+    Each thread uses its own database connection. Set to 0 to disable all concurrent queries.
+    """
+
+    CONCURRENT_PREFETCH: bool = False
+    """
+    Run the prefetch queries for different relations of a queryset concurrently in a thread pool,
+    instead of one after another. Not used inside transactions, since the queries are made
+    on other database connections, which cannot see the transaction's uncommitted changes.
+    """
+
+    CONCURRENT_COUNT: bool = False
+    """
+    Count the total number of items in a top-level connection field in a thread pool at the same time as
+    the page is fetched, instead of before it. Not used when `last` is given, since the page depends on the count,
+    or inside transactions, since the count is made on another database connection.
+    """
+
+    IDENTITY_MAP: bool = False
+    """
+    Keep track of the model instances fetched during an operation, so that nodes fetched by their IDs
+    can be reused from other parts of the operation if they have already been fetched with the needed fields.
+    """
+
+    READ_DATABASE: Optional[str] = None
+    """
+    Database alias the optimized querysets are read from, e.g., a read replica. Related objects
+    are prefetched from the same database. Mutations, and operations after them in the same request,
+    read from the primary database. If None, Django's database routers choose the database.
+    """
+
+    READ_DATABASE_CHOOSER: Optional[str] = None
+    """
+    Dot import path to a function that chooses the database alias the optimized querysets are read from,
+    given the model of the queryset and the GraphQLResolveInfo. Used instead of `READ_DATABASE` if set.
+    The function can return None to let Django's database routers choose the database.
+    """
+
+    RESULT_CACHE_BACKEND: str = "query_optimizer.result_cache.LocalResultCache"
+    """
+    Dot import path to the result cache backend used for caching the rows of object types
+    with the `cache_results` Meta option. Use `query_optimizer.result_cache.DjangoCacheResultCache`
+    to share the cached rows between processes using the Django cache set in `RESULT_CACHE_ALIAS`.
+    """
+
+    RESULT_CACHE_MAX_SIZE: int = 1000
+    """Maximum number of queries whose rows are kept in the in-process result cache."""
+
+    RESULT_CACHE_TTL: Optional[float] = 300
+    """
+    Number of seconds rows are kept in the result cache. Limits how long the rows can be stale
+    after changes that don't send model signals, e.g., `QuerySet.update()` or raw SQL.
+    None means that rows never expire.
+    """
+
+    RESULT_CACHE_ALIAS: str = "default"
+    """Alias of the Django cache used by the `DjangoCacheResultCache` result cache backend."""
+
     ALLOW_CONNECTION_AS_DEFAULT_NESTED_TO_MANY_FIELD: bool = False
     """
     Should DjangoConnectionField be allowed to be generated for nested to-many fields
@@ -7,7 +7,8 @@
 from django_filters.constants import ALL_FIELDS
 from graphene_django.utils import is_valid_django_model
 
-from .compiler import optimize_single
+from .batching import aload_batched_node, load_batched_node
+from .compiler import aoptimize_many, aoptimize_single, optimize_many, optimize_single
 from .settings import optimizer_settings
 from .typing import PK, OptimizedDjangoOptions
 
@@ -38,6 +39,8 @@ def __init_subclass_with_meta__(
         model: Optional[type[Model]] = None,
         fields: Union[list[str], Literal["__all__"], None] = "__all__",
         max_complexity: Optional[int] = None,
+        cache_results: bool = False,  # noqa: FBT001,FBT002
+        row_count_hint: Optional[int] = None,
         **options: Any,
     ) -> None:
         if not is_valid_django_model(model):  # pragma: no cover
@@ -60,6 +63,8 @@ def __init_subclass_with_meta__(
             options["filterset_class"] = create_filterset(model, filter_fields)
 
         _meta.max_complexity = max_complexity or optimizer_settings.MAX_COMPLEXITY
+        _meta.cache_results = cache_results
+        _meta.row_count_hint = row_count_hint
         super().__init_subclass_with_meta__(_meta=_meta, model=model, fields=fields, **options)
 
     @classmethod
@@ -78,12 +83,53 @@ def get_queryset(cls, queryset: QuerySet[TModel], info: GQLInfo) -> QuerySet[TMo
 
     @classmethod
     def get_node(cls, info: GQLInfo, pk: PK) -> Optional[TModel]:
-        queryset = cls._meta.model._default_manager.all()
-        maybe_instance = optimize_single(queryset, info, pk=pk, max_complexity=cls._meta.max_complexity)
+        # Nodes for sibling root fields with the same selections are fetched together.
+        batched, maybe_instance = load_batched_node(info, cls, pk, lambda pks: cls.fetch_nodes(info, pks))
+        if not batched:
+            queryset = cls._meta.model._default_manager.all()
+            maybe_instance = optimize_single(queryset, info, pk=pk, max_complexity=cls._meta.max_complexity)
         if maybe_instance is not None:  # pragma: no cover
             cls.run_instance_checks(maybe_instance, info)
         return maybe_instance
 
+    @classmethod
+    async def aget_node(cls, info: GQLInfo, pk: PK) -> Optional[TModel]:
+        """Async version of `get_node`. For use with async execution."""
+        batched, maybe_instance = await aload_batched_node(info, cls, pk, lambda pks: cls.afetch_nodes(info, pks))
+        if not batched:
+            queryset = cls._meta.model._default_manager.all()
+            maybe_instance = await aoptimize_single(queryset, info, pk=pk, max_complexity=cls._meta.max_complexity)
+        if maybe_instance is not None:  # pragma: no cover
+            cls.run_instance_checks(maybe_instance, info)
+        return maybe_instance
+
+    @classmethod
+    def get_nodes(cls, info: GQLInfo, pks: list[PK]) -> list[Optional[TModel]]:
+        """
+        Get multiple nodes by their primary keys with a single query.
+
+        :return: The instances in the same order as the given primary keys,
+                 with None for the ones that don't exist.
+        """
+        instances = {str(instance.pk): instance for instance in cls.fetch_nodes(info, pks)}
+        maybe_instances = [instances.get(str(pk)) for pk in pks]
+        for maybe_instance in maybe_instances:
+            if maybe_instance is not None:
+                cls.run_instance_checks(maybe_instance, info)
+        return maybe_instances
+
+    @classmethod
+    def fetch_nodes(cls, info: GQLInfo, pks: list[PK]) -> list[TModel]:
+        """Fetch the instances for the given primary keys in an optimized query."""
+        queryset = cls._meta.model._default_manager.all()
+        return optimize_many(queryset, info, pks=pks, max_complexity=cls._meta.max_complexity)
+
+    @classmethod
+    async def afetch_nodes(cls, info: GQLInfo, pks: list[PK]) -> list[TModel]:
+        """Async version of `fetch_nodes`."""
+        queryset = cls._meta.model._default_manager.all()
+        return await aoptimize_many(queryset, info, pks=pks, max_complexity=cls._meta.max_complexity)
+
     @classmethod
     def run_instance_checks(cls, instance: TModel, info: GQLInfo) -> None:
         """A hook for running checks after getting a single instance."""
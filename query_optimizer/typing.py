@@ -161,6 +161,8 @@ class GQLInfo(GraphQLResolveInfo):
 
 class OptimizedDjangoOptions(DjangoObjectTypeOptions):
     max_complexity: int
+    cache_results: bool
+    row_count_hint: Optional[int]
 
 
 class GraphQLFilterInfo(TypedDict, total=False):
@@ -171,6 +173,9 @@ class GraphQLFilterInfo(TypedDict, total=False):
     is_connection: bool
     is_node: bool
     max_limit: Optional[int]
+    keyset: bool
+    pagination_strategy: Optional[Literal["window", "lateral"]]
+    prefetch_strategy: Literal["prefetch", "json"]
 
 
 class ExpressionKind(Protocol):
@@ -3,12 +3,16 @@
 import logging
 from typing import TYPE_CHECKING
 
-from django.db import models
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
 
 from .settings import optimizer_settings
 
 if TYPE_CHECKING:
-    from .typing import Any, Optional, ParamSpec, TypeVar, Union
+    from django.db.backends.base.base import BaseDatabaseWrapper
+    from django.db.models.sql.compiler import SQLCompiler
+
+    from .typing import Any, Optional, ParamSpec, ToManyField, TypeVar, Union
 
     T = TypeVar("T")
     P = ParamSpec("P")
@@ -16,13 +20,17 @@
 
 
 __all__ = [
+    "LateralPartitionSlice",
     "SubqueryCount",
     "add_slice_to_queryset",
     "calculate_slice_for_queryset",
+    "can_use_window_count",
+    "get_related_lookup",
     "is_optimized",
     "mark_optimized",
     "optimizer_logger",
     "remove_optimized_mark",
+    "supports_lateral_join",
     "swappable_by_subclassing",
 ]
 
@@ -188,6 +196,125 @@ def add_slice_to_queryset(
     )
 
 
+def can_use_window_count(queryset: models.QuerySet, *, last: Optional[int]) -> bool:
+    """
+    Can the total count of the given queryset be fetched with a window function
+    in the same query as a page of its rows, instead of a separate count query?
+
+    :param queryset: The queryset to paginate.
+    :param last: The number of items to return from the end. If this is given,
+                 the total count is needed before the page can be determined.
+    """
+    query = queryset.query
+    return (
+        last is None
+        # Window functions are evaluated before DISTINCT, so the count would include duplicates.
+        and not query.distinct
+        and not query.combinator
+        and not query.is_sliced
+        and connections[queryset.db].features.supports_over_clause
+    )
+
+
+def supports_lateral_join(using: str) -> bool:
+    """Does the given database support lateral joins with a VALUES list as the left side?"""
+    return connections[using].vendor == "postgresql"
+
+
+def get_related_lookup(field: ToManyField) -> Optional[dict[str, models.OuterRef]]:
+    """
+    Get the lookup for filtering the related objects of the given to-many field
+    to the ones related to the instance in an outer query.
+
+    :return: The lookup, or None for generic relations, which cannot be correlated with a simple lookup.
+    """
+    if isinstance(field, models.ManyToManyRel):
+        return {field.field.name: models.OuterRef("pk")}
+    if isinstance(field, models.ManyToOneRel):
+        # The foreign key might point to a field other than the primary key.
+        return {field.field.name: models.OuterRef(field.field.target_field.attname)}
+    if isinstance(field, models.ManyToManyField):
+        return {field.related_query_name(): models.OuterRef("pk")}
+    return None
+
+
+class LateralPartitionSlice(models.Expression):
+    """
+    Filter for the rows of a queryset that fall into a slice of their partition,
+    so that each partition is sliced by a lateral subquery which is limited separately.
+    For example:
+
+    ```sql
+    ("child"."id", "child"."parent_id") IN (
+        SELECT "_lateral"."pk", "_partition"."value"
+        FROM (VALUES (1), (2)) AS "_partition" ("value")
+        CROSS JOIN LATERAL (
+            SELECT "child"."id" AS "pk" FROM "child"
+            WHERE "child"."parent_id" = "_partition"."value"
+            ORDER BY ... LIMIT 10 OFFSET 0
+        ) AS "_lateral"
+    )
+    ```
+
+    Unlike filtering on a window function, this only needs to read the rows in the slice
+    from each partition, if the ordering can be read from an index.
+    """
+
+    template = (
+        "(%(pk)s, %(partition)s) IN ("
+        'SELECT "_lateral"."_lateral_pk", "_partition"."value" '
+        'FROM (VALUES %(values)s) AS "_partition" ("value") '
+        'CROSS JOIN LATERAL (%(subquery)s) AS "_lateral"'
+        ")"
+    )
+    conditional = True
+    output_field = models.BooleanField()
+
+    def __init__(
+        self,
+        queryset: models.QuerySet,
+        *,
+        partition_by: str,
+        partitions: list[Any],
+        start: int,
+        stop: int,
+    ) -> None:
+        """
+        Create a lateral slice filter for the given queryset.
+
+        :param queryset: The queryset to slice. Used as the lateral subquery for each partition.
+        :param partition_by: Name of the field or alias the queryset is partitioned by.
+        :param partitions: Values of the partition field for the partitions to fetch.
+        :param start: Start of the slice for each partition.
+        :param stop: End of the slice for each partition.
+        """
+        super().__init__(output_field=models.BooleanField())
+        self.subquery = queryset.filter(**{partition_by: RawSQL('"_partition"."value"', ())}).values(
+            _lateral_pk=models.F("pk"),
+        )[start:stop]
+        self.partitions = partitions
+        self.pk = models.F("pk")
+        self.partition = models.F(partition_by)
+
+    def get_source_expressions(self) -> list[models.Expression]:
+        return [self.pk, self.partition]
+
+    def set_source_expressions(self, exprs: list[models.Expression]) -> None:
+        self.pk, self.partition = exprs
+
+    def as_sql(self, compiler: SQLCompiler, connection: BaseDatabaseWrapper) -> tuple[str, tuple[Any, ...]]:
+        pk_sql, pk_params = compiler.compile(self.pk)
+        partition_sql, partition_params = compiler.compile(self.partition)
+        subquery_sql, subquery_params = self.subquery.query.get_compiler(connection=connection).as_sql()
+        sql = self.template % {
+            "pk": pk_sql,
+            "partition": partition_sql,
+            "values": ", ".join(["(%s)"] * len(self.partitions)),
+            "subquery": subquery_sql,
+        }
+        return sql, (*pk_params, *partition_params, *self.partitions, *subquery_params)
+
+
 class SubqueryCount(models.Subquery):
     template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
     output_field = models.BigIntegerField()
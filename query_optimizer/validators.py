@@ -3,9 +3,11 @@
 from graphene_django.settings import graphene_settings
 from graphql_relay import cursor_to_offset
 
-from .typing import Optional, TypedDict
+from .keyset import cursor_to_keyset
+from .typing import Any, Optional, TypedDict
 
 __all__ = [
+    "validate_keyset_pagination_args",
     "validate_pagination_args",
 ]
 
@@ -18,7 +20,15 @@ class PaginationArgs(TypedDict):
     size: Optional[int]
 
 
-def validate_pagination_args(  # noqa: C901, PLR0912
+class KeysetPaginationArgs(TypedDict):
+    after: Optional[list[Any]]
+    before: Optional[list[Any]]
+    first: Optional[int]
+    last: Optional[int]
+    offset: int
+
+
+def validate_pagination_args(
     first: Optional[int],
     last: Optional[int],
     offset: Optional[int],
@@ -40,30 +50,7 @@ def validate_pagination_args(  # noqa: C901, PLR0912
     after = cursor_to_offset(after) if after is not None else None
     before = cursor_to_offset(before) if before is not None else None
 
-    if graphene_settings.RELAY_CONNECTION_ENFORCE_FIRST_OR_LAST and not (first or last):  # pragma: no cover
-        msg = "You must provide a `first` or `last` for pagination."
-        raise ValueError(msg)
-
-    if first is not None:
-        if not isinstance(first, int) or first <= 0:
-            msg = "Argument 'first' must be a positive integer."
-            raise ValueError(msg)
-
-        if isinstance(max_limit, int) and first > max_limit:
-            msg = f"Requesting first {first} records exceeds the limit of {max_limit}."
-            raise ValueError(msg)
-
-    if last is not None:
-        if not isinstance(last, int) or last <= 0:
-            msg = "Argument 'last' must be a positive integer."
-            raise ValueError(msg)
-
-        if isinstance(max_limit, int) and last > max_limit:
-            msg = f"Requesting last {last} records exceeds the limit of {max_limit}."
-            raise ValueError(msg)
-
-    if isinstance(max_limit, int) and first is None and last is None:
-        first = max_limit
+    first = validate_limit_args(first=first, last=last, max_limit=max_limit)
 
     if offset is not None:
         if after is not None or before is not None:
@@ -98,3 +85,90 @@ def validate_pagination_args(  # noqa: C901, PLR0912
     # Size is changed later with `queryset.count()`.
     size = max_limit if isinstance(max_limit, int) else None
     return PaginationArgs(after=after, before=before, first=first, last=last, size=size)
+
+
+def validate_keyset_pagination_args(
+    first: Optional[int],
+    last: Optional[int],
+    offset: Optional[int],
+    after: Optional[str],
+    before: Optional[str],
+    max_limit: Optional[int] = None,
+) -> KeysetPaginationArgs:
+    """
+    Validate the pagination arguments for keyset pagination and return a dictionary with the validated values.
+
+    :param first: Number of records to return from the beginning.
+    :param last: Number of records to return from the end.
+    :param offset: Number of records to skip from the beginning.
+    :param after: Keyset cursor for the last record in the previous page.
+    :param before: Keyset cursor for the first record in the next page.
+    :param max_limit: Maximum limit for the number of records that can be requested.
+    :raises ValueError: Validation error.
+    """
+    first = validate_limit_args(first=first, last=last, max_limit=max_limit)
+
+    after_values = cursor_to_keyset(after) if after is not None else None
+    if after is not None and after_values is None:
+        msg = "The node pointed with `after` does not exist."
+        raise ValueError(msg)
+
+    before_values = cursor_to_keyset(before) if before is not None else None
+    if before is not None and before_values is None:
+        msg = "The node pointed with `before` does not exist."
+        raise ValueError(msg)
+
+    if offset is not None:
+        if after is not None or before is not None:
+            msg = "Can only use either `offset` or `before`/`after` for pagination."
+            raise ValueError(msg)
+        if not isinstance(offset, int) or offset < 0:
+            msg = "Argument `offset` must be a positive integer."
+            raise ValueError(msg)
+        # The page is fetched from the end of the ordering when only `last` is given.
+        if offset > 0 and first is None and last is not None:
+            msg = "Argument `offset` cannot be used with only `last` in keyset pagination."
+            raise ValueError(msg)
+
+    return KeysetPaginationArgs(
+        after=after_values,
+        before=before_values,
+        first=first,
+        last=last,
+        offset=offset or 0,
+    )
+
+
+def validate_limit_args(first: Optional[int], last: Optional[int], max_limit: Optional[int]) -> Optional[int]:
+    """
+    Validate the `first` and `last` pagination arguments against the given maximum limit.
+
+    :return: The value for `first`, which is set to the maximum limit if neither `first` nor `last` is given.
+    :raises ValueError: Validation error.
+    """
+    if graphene_settings.RELAY_CONNECTION_ENFORCE_FIRST_OR_LAST and not (first or last):  # pragma: no cover
+        msg = "You must provide a `first` or `last` for pagination."
+        raise ValueError(msg)
+
+    if first is not None:
+        if not isinstance(first, int) or first <= 0:
+            msg = "Argument 'first' must be a positive integer."
+            raise ValueError(msg)
+
+        if isinstance(max_limit, int) and first > max_limit:
+            msg = f"Requesting first {first} records exceeds the limit of {max_limit}."
+            raise ValueError(msg)
+
+    if last is not None:
+        if not isinstance(last, int) or last <= 0:
+            msg = "Argument 'last' must be a positive integer."
+            raise ValueError(msg)
+
+        if isinstance(max_limit, int) and last > max_limit:
+            msg = f"Requesting last {last} records exceeds the limit of {max_limit}."
+            raise ValueError(msg)
+
+    if isinstance(max_limit, int) and first is None and last is None:
+        first = max_limit
+
+    return first
@@ -7,7 +7,13 @@
 from graphene_django.debug import DjangoDebug
 
 from query_optimizer import optimize
-from query_optimizer.fields import DjangoConnectionField, DjangoListField
+from query_optimizer.fields import (
+    AsyncDjangoConnectionField,
+    AsyncDjangoListField,
+    DjangoConnectionField,
+    DjangoListField,
+    DjangoNodesField,
+)
 from query_optimizer.selections import get_field_selections
 from query_optimizer.typing import GQLInfo, Iterable, Union
 
@@ -69,6 +75,17 @@ def resolve_all_apartments(root: None, info: GQLInfo, **kwargs) -> models.QueryS
             info,
         )
 
+    listed_apartments = DjangoListField(ApartmentType)
+    evaluated_apartments = DjangoListField(ApartmentType)
+
+    def resolve_listed_apartments(root: None, info: GQLInfo, **kwargs) -> list[Apartment]:
+        return list(Apartment.objects.all())
+
+    def resolve_evaluated_apartments(root: None, info: GQLInfo, **kwargs) -> models.QuerySet[Apartment]:
+        queryset = Apartment.objects.all()
+        list(queryset)
+        return queryset
+
     housing_company_by_name = graphene.List(HousingCompanyType, name=graphene.String(required=True))
 
     def resolve_housing_company_by_name(root: None, info: GQLInfo, name: str) -> models.QuerySet[HousingCompany]:
@@ -77,10 +94,15 @@ def resolve_housing_company_by_name(root: None, info: GQLInfo, name: str) -> mod
 
     developer = relay.Node.Field(DeveloperNode)
     paged_developers = DjangoConnectionField(DeveloperNode)
+    approximate_count_developers = DjangoConnectionField(DeveloperNode, count_mode="approximate")
     apartment = relay.Node.Field(ApartmentNode)
+    apartment_nodes = DjangoNodesField(ApartmentNode)
     paged_apartments = DjangoConnectionField(ApartmentNode)
+    keyset_apartments = DjangoConnectionField(ApartmentNode, keyset=True)
+    cached_count_apartments = DjangoConnectionField(ApartmentNode, count_mode="cached")
     building = relay.Node.Field(BuildingNode)
     paged_buildings = DjangoConnectionField(BuildingNode)
+    keyset_buildings = DjangoConnectionField(BuildingNode, keyset=True)
     real_estate = relay.Node.Field(RealEstateNode)
     paged_real_estates = DjangoConnectionField(RealEstateNode)
     housing_company = relay.Node.Field(HousingCompanyNode)
@@ -125,4 +147,17 @@ def resolve_plain(root, info: GQLInfo) -> dict[str, str]:
         }
 
 
+class AsyncQuery(graphene.ObjectType):
+    all_apartments = AsyncDjangoListField(ApartmentType)
+    all_housing_companies = AsyncDjangoListField(HousingCompanyType)
+    paged_apartments = AsyncDjangoConnectionField(ApartmentNode)
+    paged_buildings = AsyncDjangoConnectionField(BuildingNode)
+    developer = graphene.Field(DeveloperNode, pk=graphene.Int(required=True))
+    apartment = relay.Node.Field(ApartmentNode)
+
+    async def resolve_developer(root: None, info: GQLInfo, pk: int):
+        return await DeveloperNode.aget_node(info, pk)
+
+
 schema = graphene.Schema(query=Query)
+async_schema = graphene.Schema(query=AsyncQuery)
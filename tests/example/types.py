@@ -114,6 +114,11 @@ class Meta:
 
 class DeveloperType(DjangoObjectType):
     housingcompany_set = DjangoListField("tests.example.types.HousingCompanyType")
+    aggregated_housing_companies = DjangoListField(
+        "tests.example.types.HousingCompanyType",
+        field_name="housingcompany_set",
+        prefetch_strategy="json",
+    )
 
     class Meta:
         model = Developer
@@ -166,8 +171,21 @@ def resolve_greeting(root: HousingCompany, info: GQLInfo) -> str:
     def resolve_alias_greeting(root: HousingCompany, info: GQLInfo) -> str:
         return f"Hello {root.alias_greeting}!"
 
+    aggregated_developers = DjangoListField(DeveloperType, field_name="developers", prefetch_strategy="json")
+    aggregated_real_estates = DjangoListField(
+        "tests.example.types.RealEstateType",
+        field_name="real_estates",
+        prefetch_strategy="json",
+    )
+
 
 class RealEstateType(DjangoObjectType):
+    aggregated_buildings = DjangoListField(
+        "tests.example.types.BuildingType",
+        field_name="building_set",
+        prefetch_strategy="json",
+    )
+
     class Meta:
         model = RealEstate
         field = [
@@ -180,6 +198,11 @@ class Meta:
 
 class BuildingType(DjangoObjectType):
     real_estate_name = AnnotatedField(graphene.String, F("real_estate__name"))
+    aggregated_apartments = DjangoListField(
+        "tests.example.types.ApartmentType",
+        field_name="apartments",
+        prefetch_strategy="json",
+    )
 
     class Meta:
         model = Building
@@ -217,6 +240,8 @@ class Meta:
 
     completion_year = AnnotatedField(graphene.Int, ExtractYear("completion_date"))
 
+    prefetched_building = RelatedField(lambda: BuildingType, field_name="building", fetch_strategy="prefetch")
+
     share_range = MultiField(graphene.String, fields=["shares_start", "shares_end"])
 
     def resolve_share_range(root: Apartment, info: GQLInfo) -> str:
@@ -392,6 +417,7 @@ class Meta:
 
 class BuildingNode(IsTypeOfProxyPatch, DjangoObjectType):
     apartments = DjangoConnectionField(ApartmentNode)
+    keyset_apartments = DjangoConnectionField(ApartmentNode, keyset=True, field_name="apartments")
 
     class Meta:
         model = BuildingProxy
@@ -401,6 +427,8 @@ class Meta:
 
 class RealEstateNode(IsTypeOfProxyPatch, DjangoObjectType):
     building_set = DjangoConnectionField(BuildingNode)
+    keyset_buildings = DjangoConnectionField(BuildingNode, keyset=True, field_name="building_set")
+    aggregated_buildings = DjangoListField(BuildingNode, field_name="building_set", prefetch_strategy="json")
 
     class Meta:
         model = RealEstateProxy
@@ -65,6 +65,13 @@
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "project" / "testdb",
     },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "project" / "testdb",
+        "TEST": {
+            "MIRROR": "default",
+        },
+    },
 }
 
 CACHES = {
@@ -3,8 +3,12 @@
 from django.urls import include, path
 from graphene_django.views import GraphQLView
 
+from query_optimizer.execution import ConcurrentExecutionContext, OptimizationExecutionContext
+
 urlpatterns = [
     path("graphql/", GraphQLView.as_view(graphiql=True)),
+    path("graphql/optimized/", GraphQLView.as_view(execution_context_class=OptimizationExecutionContext)),
+    path("graphql/concurrent/", GraphQLView.as_view(execution_context_class=ConcurrentExecutionContext)),
     path("admin/", admin.site.urls),
 ]
 
@@ -0,0 +1,276 @@
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test.client import RequestFactory
+from django.utils.asyncio import async_unsafe
+from graphql_relay import to_global_id
+
+from tests.example.schema import async_schema
+from tests.example.types import ApartmentNode
+from tests.example.utils import capture_database_queries
+from tests.factories import ApartmentFactory, BuildingFactory, DeveloperFactory, HousingCompanyFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def async_graphql_client():
+    def func(query, variables=None):
+        context = RequestFactory().post("/graphql")
+        with capture_database_queries() as queries:
+            # Executed in a new event loop. Database access with `sync_to_async` happens in the current thread.
+            result = async_to_sync(async_schema.execute_async)(query, variable_values=variables, context_value=context)
+        return result, queries
+
+    return func
+
+
+def test_async__list_field(async_graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+    ApartmentFactory.create(street_address="2", building__name="bar")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    result, queries = async_graphql_client(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching apartments and related buildings.
+    assert queries.count == 1, queries.log
+    assert queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+    )
+
+    assert result.data == {
+        "allApartments": [
+            {"streetAddress": "1", "building": {"name": "foo"}},
+            {"streetAddress": "2", "building": {"name": "bar"}},
+        ]
+    }
+
+
+def test_async__list_field__auto_fetch_strategy(async_graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"TO_ONE_FETCH_STRATEGY": "auto"}
+    ApartmentFactory.create(street_address="1", building__name="foo")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    # Table statistics cannot be sampled in the event loop, so the relation is joined without them.
+    estimate_count = async_unsafe(lambda queryset: 10)
+    with patch("query_optimizer.planner.estimate_count", side_effect=estimate_count) as mock:
+        result, queries = async_graphql_client(query)
+
+    assert result.errors is None, result.errors
+    assert mock.call_count == 0
+
+    # 1 query for fetching apartments and related buildings.
+    assert queries.count == 1, queries.log
+    assert queries[0] == has('INNER JOIN "example_building"')
+    assert result.data == {"allApartments": [{"streetAddress": "1", "building": {"name": "foo"}}]}
+
+
+def test_async__list_field__prefetch(async_graphql_client):
+    HousingCompanyFactory.create(name="1", developers__name="foo")
+    HousingCompanyFactory.create(name="2", developers__name="bar")
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+          }
+        }
+    """
+
+    result, queries = async_graphql_client(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    assert queries.count == 2, queries.log
+
+    assert result.data == {
+        "allHousingCompanies": [
+            {"name": "1", "developers": [{"name": "foo"}]},
+            {"name": "2", "developers": [{"name": "bar"}]},
+        ]
+    }
+
+
+def test_async__connection_field(async_graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query {
+          pagedApartments(first: 2) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    result, queries = async_graphql_client(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments.
+    assert queries.count == 2, queries.log
+
+    assert result.data == {
+        "pagedApartments": {
+            "totalCount": 3,
+            "edges": [
+                {"node": {"streetAddress": "1"}},
+                {"node": {"streetAddress": "2"}},
+            ],
+        }
+    }
+
+
+def test_async__connection_field__nested(async_graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+    ApartmentFactory.create(street_address="3", building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+                apartments(first: 2) {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    result, queries = async_graphql_client(query)
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    # Nested connection is resolved from the prefetched apartments without database access.
+    assert queries.count == 2, queries.log
+
+    assert result.data == {
+        "pagedBuildings": {
+            "edges": [
+                {
+                    "node": {
+                        "name": "1",
+                        "apartments": {
+                            "edges": [
+                                {"node": {"streetAddress": "1"}},
+                                {"node": {"streetAddress": "2"}},
+                            ],
+                        },
+                    },
+                },
+            ],
+        }
+    }
+
+
+def test_async__node(async_graphql_client):
+    developer = DeveloperFactory.create(name="foo")
+    HousingCompanyFactory.create(name="1", developers=[developer])
+
+    query = """
+        query ($pk: Int!) {
+          developer(pk: $pk) {
+            name
+            housingcompanySet {
+              edges {
+                node {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    result, queries = async_graphql_client(query, variables={"pk": developer.pk})
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching the developer.
+    # 1 query for fetching housing companies.
+    assert queries.count == 2, queries.log
+
+    assert result.data == {
+        "developer": {
+            "name": "foo",
+            "housingcompanySet": {"edges": [{"node": {"name": "1"}}]},
+        }
+    }
+
+
+def test_async__node__aliases_are_batched(async_graphql_client):
+    apartment_1 = ApartmentFactory.create(street_address="1")
+    apartment_2 = ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          first: apartment(id: "%s") {
+            streetAddress
+          }
+          second: apartment(id: "%s") {
+            streetAddress
+          }
+        }
+    """ % (
+        to_global_id(str(ApartmentNode), apartment_1.pk),
+        to_global_id(str(ApartmentNode), apartment_2.pk),
+    )
+
+    # Relay node fields call `get_node`, which can return the coroutine from `aget_node`.
+    with patch.object(ApartmentNode, "get_node", classmethod(lambda cls, info, pk: cls.aget_node(info, pk))):
+        result, queries = async_graphql_client(query)
+
+    assert result.errors is None, result.errors
+
+    # 1 query for fetching both apartments.
+    assert queries.count == 1, queries.log
+
+    assert result.data == {
+        "first": {"streetAddress": "1"},
+        "second": {"streetAddress": "2"},
+    }
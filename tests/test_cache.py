@@ -0,0 +1,154 @@
+from unittest.mock import patch
+
+import pytest
+
+from query_optimizer.cache import LRUCache, get_plan_cache
+from tests.factories import ApartmentFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def _enable_plan_cache(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"PLAN_CACHE_MAX_SIZE": 100}
+
+
+def test_lru_cache__evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.info() == (3, 1, 2, 2)
+
+
+def test_lru_cache__ttl():
+    cache = LRUCache(max_size=2, ttl=10)
+
+    with patch("query_optimizer.cache.time.monotonic", return_value=0):
+        cache.set("a", 1)
+
+    with patch("query_optimizer.cache.time.monotonic", return_value=5):
+        assert cache.get("a") == 1
+
+    with patch("query_optimizer.cache.time.monotonic", return_value=11):
+        assert cache.get("a") is None
+
+    assert len(cache) == 0
+
+
+def test_lru_cache__disabled():
+    cache = LRUCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+@pytest.mark.usefixtures("_enable_plan_cache")
+def test_plan_cache(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+    ApartmentFactory.create(street_address="2", building__name="bar")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response_1 = graphql_client(query)
+    assert response_1.no_errors, response_1.errors
+    assert get_plan_cache().info().misses == 1
+    assert get_plan_cache().info().hits == 0
+
+    response_2 = graphql_client(query)
+    assert response_2.no_errors, response_2.errors
+    assert get_plan_cache().info().misses == 1
+    assert get_plan_cache().info().hits == 1
+
+    # The cached plan produces the same optimizations.
+    assert response_2.queries.count == 1, response_2.queries.log
+    assert response_2.queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+    )
+    assert response_2.content == response_1.content
+
+
+@pytest.mark.usefixtures("_enable_plan_cache")
+def test_plan_cache__variables_are_part_of_the_key(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query ($address: String) {
+          pagedApartments(streetAddress: $address) {
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"address": "1"})
+    assert response.no_errors, response.errors
+    assert response.content == {"edges": [{"node": {"streetAddress": "1"}}]}
+
+    response = graphql_client(query, variables={"address": "2"})
+    assert response.no_errors, response.errors
+    assert response.content == {"edges": [{"node": {"streetAddress": "2"}}]}
+    assert get_plan_cache().info().hits == 0
+
+    response = graphql_client(query, variables={"address": "1"})
+    assert response.no_errors, response.errors
+    assert response.content == {"edges": [{"node": {"streetAddress": "1"}}]}
+    assert get_plan_cache().info().hits == 1
+
+
+def test_plan_cache__cleared_when_settings_change(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"PLAN_CACHE_MAX_SIZE": 100}
+    ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert len(get_plan_cache()) == 1
+
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"PLAN_CACHE_MAX_SIZE": 100, "MAX_COMPLEXITY": 5}
+    assert len(get_plan_cache()) == 0
+
+
+def test_plan_cache__disabled_by_default(graphql_client):
+    ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert len(get_plan_cache()) == 0
@@ -0,0 +1,260 @@
+from unittest.mock import patch
+
+import pytest
+
+from query_optimizer.concurrency import can_run_concurrently, submit
+from query_optimizer.keyset import keyset_to_cursor
+from tests.factories import ApartmentFactory, HousingCompanyFactory, RealEstateFactory
+from tests.helpers import has
+
+
+@pytest.fixture()
+def _concurrent_prefetch(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_PREFETCH": True}
+
+
+@pytest.fixture()
+def _concurrent_count(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"CONCURRENT_COUNT": True}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_can_run_concurrently__not_in_worker_thread():
+    assert can_run_concurrently("default") is True
+    # Tasks in the thread pool cannot wait for other tasks in the same pool.
+    assert submit(can_run_concurrently, "default").result() is False
+
+
+# Queries made in other threads can only see committed data.
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("_concurrent_prefetch")
+def test_concurrent_prefetch(graphql_client):
+    housing_company_1 = HousingCompanyFactory.create(name="1", developers__name="foo")
+    housing_company_2 = HousingCompanyFactory.create(name="2", developers__name="bar")
+    RealEstateFactory.create(name="a", housing_company=housing_company_1)
+    RealEstateFactory.create(name="b", housing_company=housing_company_2)
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+            realEstates {
+              name
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.concurrency.submit", side_effect=submit) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies in the current thread.
+    # Developers and real estates are prefetched in other threads.
+    assert response.queries.count == 1, response.queries.log
+    assert mock.call_count == 2
+
+    assert response.content == [
+        {"name": "1", "developers": [{"name": "foo"}], "realEstates": [{"name": "a"}]},
+        {"name": "2", "developers": [{"name": "bar"}], "realEstates": [{"name": "b"}]},
+    ]
+
+
+@pytest.mark.django_db()
+@pytest.mark.usefixtures("_concurrent_prefetch")
+def test_concurrent_prefetch__not_used_in_transaction(graphql_client):
+    housing_company = HousingCompanyFactory.create(name="1", developers__name="foo")
+    RealEstateFactory.create(name="a", housing_company=housing_company)
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            developers {
+              name
+            }
+            realEstates {
+              name
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.concurrency.submit", side_effect=submit) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    # 1 query for fetching real estates.
+    assert response.queries.count == 3, response.queries.log
+    assert mock.call_count == 0
+
+    assert response.content == [
+        {"name": "1", "developers": [{"name": "foo"}], "realEstates": [{"name": "a"}]},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("_concurrent_count")
+def test_concurrent_count(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query {
+          pagedApartments(first: 2) {
+            totalCount
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.fields.submit", side_effect=submit) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the current thread.
+    # Apartments are counted in another thread.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('FROM "example_apartment"', "LIMIT 2")
+    assert mock.call_count == 1
+
+    assert response.content == {
+        "totalCount": 3,
+        "pageInfo": {"hasNextPage": True, "endCursor": "YXJyYXljb25uZWN0aW9uOjE="},
+        "edges": [
+            {"node": {"streetAddress": "1"}},
+            {"node": {"streetAddress": "2"}},
+        ],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("_concurrent_count")
+def test_concurrent_count__total_count_smaller_than_window(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query {
+          pagedApartments(first: 5, after: "YXJyYXljb25uZWN0aW9uOjA=") {
+            totalCount
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+              startCursor
+              endCursor
+            }
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Slice is recalculated for the cursors with the total count.
+    assert response.content == {
+        "totalCount": 3,
+        "pageInfo": {
+            "hasNextPage": False,
+            "hasPreviousPage": True,
+            "startCursor": "YXJyYXljb25uZWN0aW9uOjE=",
+            "endCursor": "YXJyYXljb25uZWN0aW9uOjI=",
+        },
+        "edges": [
+            {"node": {"streetAddress": "2"}},
+            {"node": {"streetAddress": "3"}},
+        ],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("_concurrent_count")
+def test_concurrent_count__keyset(graphql_client):
+    apartment = ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query ($after: String) {
+          keysetApartments(first: 1, after: $after) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.fields.submit", side_effect=submit) as mock:
+        response = graphql_client(query, variables={"after": keyset_to_cursor([apartment.pk])})
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the current thread.
+    # Apartments are counted in another thread.
+    assert response.queries.count == 1, response.queries.log
+    assert mock.call_count == 1
+
+    assert response.content == {
+        "totalCount": 3,
+        "edges": [
+            {"node": {"streetAddress": "2"}},
+        ],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("_concurrent_count")
+def test_concurrent_count__not_used_with_last(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          pagedApartments(last: 1) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.fields.submit", side_effect=submit) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert mock.call_count == 0
+
+    assert response.content == {"totalCount": 2, "edges": [{"node": {"streetAddress": "2"}}]}
@@ -0,0 +1,132 @@
+import pytest
+from django.db import transaction
+
+from query_optimizer.result_cache import estimate_count
+from tests.example.models import Developer
+from tests.factories import ApartmentFactory, DeveloperFactory
+from tests.helpers import has
+
+pytestmark = [
+    # Counts are not cached inside transactions.
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture(autouse=True)
+def _new_result_cache(settings):
+    # Changing the settings creates a new result cache, so counts cached in earlier tests are not used.
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"RESULT_CACHE_MAX_SIZE": 100}
+
+
+QUERY = """
+    query {
+      cachedCountApartments(first: 1) {
+        totalCount
+        edges {
+          node {
+            streetAddress
+          }
+        }
+      }
+    }
+"""
+
+
+def test_count_cache(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting apartments.
+    # 1 query for fetching the page.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] == has("COUNT(*)")
+    assert response.content == {"totalCount": 2, "edges": [{"node": {"streetAddress": "1"}}]}
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+
+    # The count is reused from the first request.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] != has("COUNT(*)")
+    assert response.content == {"totalCount": 2, "edges": [{"node": {"streetAddress": "1"}}]}
+
+
+def test_count_cache__invalidated_on_save(graphql_client):
+    ApartmentFactory.create(street_address="1")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.content["totalCount"] == 1
+
+    ApartmentFactory.create(street_address="2")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 2, response.queries.log
+    assert response.content["totalCount"] == 2
+
+
+def test_count_cache__filters(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          cachedCountApartments(streetAddress: "1") {
+            totalCount
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.content == {"totalCount": 1}
+
+    # Differently filtered connections are counted separately.
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 2, response.queries.log
+    assert response.content["totalCount"] == 2
+
+
+def test_count_cache__not_used_in_transaction(graphql_client):
+    ApartmentFactory.create(street_address="1")
+
+    with transaction.atomic():
+        response = graphql_client(QUERY)
+        assert response.no_errors, response.errors
+        assert response.queries.count == 2, response.queries.log
+
+    # Count made in the transaction was not cached.
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 2, response.queries.log
+
+
+def test_count_cache__approximate(graphql_client):
+    DeveloperFactory.create(name="1")
+
+    query = """
+        query {
+          approximateCountDevelopers {
+            totalCount
+          }
+        }
+    """
+
+    # Planner statistics are not available on SQLite, so the count is made exactly, and cached.
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.content == {"totalCount": 1}
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == {"totalCount": 1}
+
+
+def test_estimate_count__filtered():
+    assert estimate_count(Developer.objects.filter(name="1")) is None
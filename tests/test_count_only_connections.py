@@ -0,0 +1,228 @@
+import pytest
+
+from tests.factories import ApartmentFactory, BuildingFactory, RealEstateFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_count_only_connection(graphql_client):
+    building_1 = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building_1)
+    ApartmentFactory.create(building=building_1)
+    BuildingFactory.create(name="2")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+                apartments {
+                  totalCount
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings, with the apartments counted in a subquery.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('FROM "example_building"', "COUNT(*)", 'FROM "example_apartment"')
+
+    # Parents without any related objects are counted too.
+    assert response.content == {
+        "edges": [
+            {"node": {"name": "1", "apartments": {"totalCount": 2}}},
+            {"node": {"name": "2", "apartments": {"totalCount": 0}}},
+        ],
+    }
+
+
+def test_count_only_connection__filtered(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building, street_address="1")
+    ApartmentFactory.create(building=building, street_address="2")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments(streetAddress: "1") {
+                  totalCount
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == {"edges": [{"node": {"apartments": {"totalCount": 1}}}]}
+
+
+def test_count_only_connection__page_info(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments(first: 1, offset: 1) {
+                  totalCount
+                  pageInfo {
+                    hasNextPage
+                    hasPreviousPage
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "apartments": {
+                        "totalCount": 3,
+                        "pageInfo": {"hasNextPage": True, "hasPreviousPage": True},
+                    },
+                },
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize(("first", "has_next_page"), [(1, True), (2, False)])
+def test_count_only_connection__has_next_page(graphql_client, first, has_next_page):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query ($first: Int!) {
+          pagedBuildings {
+            edges {
+              node {
+                apartments(first: $first) {
+                  pageInfo {
+                    hasNextPage
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"first": first})
+    assert response.no_errors, response.errors
+
+    # If only `hasNextPage` is needed, the related objects are not counted,
+    # just checked for existence past the end of the page.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has("EXISTS")
+    assert response.queries[0] != has("COUNT(*)")
+    assert response.content == {"edges": [{"node": {"apartments": {"pageInfo": {"hasNextPage": has_next_page}}}}]}
+
+
+def test_count_only_connection__edges(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building, street_address="1")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments {
+                  totalCount
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Edges are needed, so the apartments are prefetched.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert response.content == {
+        "edges": [
+            {"node": {"apartments": {"totalCount": 1, "edges": [{"node": {"streetAddress": "1"}}]}}},
+        ],
+    }
+
+
+def test_count_only_connection__nested_in_prefetch(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    building = BuildingFactory.create(name="1", real_estate=real_estate)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          pagedRealEstates {
+            edges {
+              node {
+                buildingSet {
+                  edges {
+                    node {
+                      name
+                      apartments {
+                        totalCount
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings, with the apartments counted in a subquery.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[1] == has('FROM "example_building"', "COUNT(*)", 'FROM "example_apartment"')
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "buildingSet": {
+                        "edges": [{"node": {"name": "1", "apartments": {"totalCount": 2}}}],
+                    },
+                },
+            },
+        ],
+    }
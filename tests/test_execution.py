@@ -0,0 +1,282 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+
+from query_optimizer.compiler import OptimizationCompiler
+from query_optimizer.concurrency import submit
+from query_optimizer.execution import OptimizationExecutionContext
+from tests.example.schema import schema
+from tests.example.types import ApartmentType
+from tests.factories import ApartmentFactory, BuildingFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+GRAPHQL_URL = "/graphql/optimized/"
+CONCURRENT_GRAPHQL_URL = "/graphql/concurrent/"
+
+
+def test_execution_context__root_fields_compiled_before_execution(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+    ApartmentFactory.create(street_address="2", building__name="bar")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+          pagedApartments {
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    events: list[str] = []
+    original_run = OptimizationCompiler.run
+
+    def run(self):
+        events.append("compile")
+        return original_run(self)
+
+    def record_query(execute, sql, params, many, context):
+        events.append("query")
+        return execute(sql, params, many, context)
+
+    with patch.object(OptimizationCompiler, "run", run), connection.execute_wrapper(record_query):
+        response = graphql_client(query, graphql_url=GRAPHQL_URL)
+
+    assert response.no_errors, response.errors
+
+    # Both root fields are compiled once, before any database queries are made.
+    assert events[:2] == ["compile", "compile"]
+    assert events.count("compile") == 2
+
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+    )
+    assert response.full_content["data"] == graphql_client(query).full_content["data"]
+
+
+def test_execution_context__max_complexity_reached(graphql_client):
+    ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            building {
+              apartments {
+                building {
+                  apartments {
+                    building {
+                      apartments {
+                        building {
+                          apartments {
+                            building {
+                              apartments {
+                                 building {
+                                  name
+                                }
+                              }
+                            }
+                          }
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, graphql_url=GRAPHQL_URL)
+
+    # Error is still reported for the field when it's resolved.
+    assert response.errors[0]["message"] == "Query complexity exceeds the maximum allowed of 10"
+    assert response.errors[0]["path"] == ["allApartments"]
+    assert response.queries.count == 0, response.queries.log
+
+
+def test_execution_context__plans_not_shared_between_operations():
+    ApartmentFactory.create(street_address="1", building__name="foo")
+    context = RequestFactory().post("/graphql")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+        }
+    """
+
+    # Plan is left to the context, e.g., because the field's resolver didn't use it.
+    with patch("query_optimizer.compiler.get_operation_plan", return_value=None):
+        result = schema.execute(query, context_value=context, execution_context_class=OptimizationExecutionContext)
+    assert result.errors is None, result.errors
+
+    query = """
+        query {
+          allApartments {
+            building {
+              apartments {
+                building {
+                  apartments {
+                    building {
+                      apartments {
+                        building {
+                          apartments {
+                            building {
+                              apartments {
+                                 building {
+                                  name
+                                }
+                              }
+                            }
+                          }
+                        }
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # Plan compiled for the first operation is not used for the second one, which cannot be compiled.
+    result = schema.execute(query, context_value=context, execution_context_class=OptimizationExecutionContext)
+    assert result.errors is not None
+    assert result.errors[0].message == "Query complexity exceeds the maximum allowed of 10"
+
+
+# Queries made in other threads can only see committed data.
+@pytest.mark.django_db(transaction=True)
+def test_execution_context__concurrent_root_fields(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+    BuildingFactory.create(name="bar")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+          allBuildings {
+            name
+          }
+          plain {
+            foo
+          }
+        }
+    """
+
+    with patch("query_optimizer.execution.submit", side_effect=submit) as mock:
+        response = graphql_client(query, graphql_url=CONCURRENT_GRAPHQL_URL)
+
+    assert response.no_errors, response.errors
+
+    # Both model root fields are fetched in other threads.
+    assert mock.call_count == 2
+    assert response.queries.count == 0, response.queries.log
+
+    # Results are in the order of the fields in the operation.
+    assert list(response.full_content["data"]) == ["allApartments", "allBuildings", "plain"]
+    assert response.full_content["data"] == {
+        "allApartments": [{"streetAddress": "1", "building": {"name": "foo"}}],
+        "allBuildings": [{"name": "foo"}, {"name": "bar"}],
+        "plain": {"foo": "1"},
+    }
+
+
+def test_execution_context__concurrent_root_fields__in_transaction(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+        }
+    """
+
+    with patch("query_optimizer.execution.submit", side_effect=submit) as mock:
+        response = graphql_client(query, graphql_url=CONCURRENT_GRAPHQL_URL)
+
+    assert response.no_errors, response.errors
+
+    # Other threads cannot see the test's transaction, so the fields are executed in the current thread.
+    assert mock.call_count == 0
+    assert response.queries.count == 2, response.queries.log
+    assert response.full_content["data"] == {
+        "allApartments": [{"streetAddress": "1"}],
+        "allBuildings": [{"name": "foo"}],
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_execution_context__concurrent_root_fields__error(graphql_client):
+    BuildingFactory.create(name="foo")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+        }
+    """
+
+    error = ValueError("foo")
+    with patch("query_optimizer.execution.submit", side_effect=submit) as mock:  # noqa: SIM117
+        with patch.object(ApartmentType, "filter_queryset", side_effect=error):
+            response = graphql_client(query, graphql_url=CONCURRENT_GRAPHQL_URL)
+
+    # Errors raised in other threads are reported for the field that raised them.
+    assert mock.call_count == 2
+    assert len(response.errors) == 1
+    assert response.errors[0]["message"] == "foo"
+    assert response.errors[0]["path"] == ["allApartments"]
+    assert response.full_content["data"] == {"allApartments": None, "allBuildings": [{"name": "foo"}]}
+
+
+def test_execution_context__unexpected_compilation_error(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"SKIP_OPTIMIZATION_ON_ERROR": False}
+    ApartmentFactory.create()
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+        }
+    """
+
+    with patch.object(OptimizationCompiler, "run", side_effect=RuntimeError("foo")) as mock:
+        response = graphql_client(query, graphql_url=GRAPHQL_URL)
+
+    # Unexpected errors are not suppressed, so the field is not compiled again by the resolver.
+    assert mock.call_count == 1
+    assert response.errors[0]["message"] == "foo"
@@ -0,0 +1,125 @@
+import pytest
+
+from query_optimizer.planner import estimate_row_width
+from tests.example.models import Building
+from tests.example.types import ApartmentType, BuildingType
+from tests.factories import ApartmentFactory, BuildingFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+QUERY = """
+    query {
+      allApartments {
+        streetAddress
+        building {
+          name
+        }
+      }
+    }
+"""
+
+
+@pytest.fixture()
+def _auto_strategy(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"TO_ONE_FETCH_STRATEGY": "auto", "PLANNER_ROUND_TRIP_COST": 1000}
+
+
+def _set_row_count_hints(monkeypatch, apartments: int, buildings: int) -> None:
+    # Options are frozen after the type has been created.
+    monkeypatch.setitem(ApartmentType._meta.__dict__, "row_count_hint", apartments)
+    monkeypatch.setitem(BuildingType._meta.__dict__, "row_count_hint", buildings)
+
+
+def test_fetch_planner__select_related_by_default(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments with their buildings.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('INNER JOIN "example_building"')
+    assert response.content == [{"streetAddress": "1", "building": {"name": "1"}}]
+
+
+def test_fetch_planner__prefetch_strategy(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            prefetchedBuilding {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching the building once for all apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] != has("JOIN")
+    assert response.queries[1] == has('FROM "example_building"')
+    assert response.content == [
+        {"streetAddress": "1", "prefetchedBuilding": {"name": "1"}},
+        {"streetAddress": "2", "prefetchedBuilding": {"name": "1"}},
+    ]
+
+
+@pytest.mark.usefixtures("_auto_strategy")
+def test_fetch_planner__auto__repeated_targets(graphql_client, monkeypatch):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+
+    # Thousands of apartments point to a handful of buildings, so the buildings are prefetched.
+    _set_row_count_hints(monkeypatch, apartments=100_000, buildings=5)
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments.
+    # 1 query for fetching buildings.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] != has("JOIN")
+    assert response.content == [{"streetAddress": "1", "building": {"name": "1"}}]
+
+
+@pytest.mark.usefixtures("_auto_strategy")
+def test_fetch_planner__auto__unique_targets(graphql_client, monkeypatch):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+
+    # Each apartment points to a different building, so joining them is cheaper.
+    _set_row_count_hints(monkeypatch, apartments=100_000, buildings=100_000)
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('INNER JOIN "example_building"')
+
+
+@pytest.mark.usefixtures("_auto_strategy")
+def test_fetch_planner__auto__no_statistics(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+
+    # SQLite doesn't have table statistics, so without hints the relation is joined.
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('INNER JOIN "example_building"')
+
+
+def test_estimate_row_width():
+    assert estimate_row_width(Building, ["name"]) < estimate_row_width(Building, [])
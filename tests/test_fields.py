@@ -120,7 +120,7 @@ def test_fields__annotated_field__in_relations(graphql_client):
     ]
 
 
-def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_client):
+def test_fields__annotated_field__select_related(graphql_client):
     SaleFactory.create(
         purchase_date=datetime.date(2024, 1, 1),
         apartment__completion_date=datetime.date(2020, 1, 1),
@@ -148,16 +148,13 @@ def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_cl
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for all sales.
-    # 1 query for all related apartments.
-    assert response.queries.count == 2, response.queries.log
+    # 1 query for all sales, with the annotated apartments joined.
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
         'FROM "example_sale"',
-    )
-    assert response.queries[1] == has(
-        'FROM "example_apartment"',
-        'django_date_extract(year, "example_apartment"."completion_date") AS "completion_year"',
+        'INNER JOIN "example_apartment"',
+        'django_date_extract(year, "example_apartment"."completion_date")',
     )
 
     assert response.content == [
@@ -176,7 +173,7 @@ def test_fields__annotated_field__select_related_promoted_to_prefetch(graphql_cl
     ]
 
 
-def test_fields__annotated_field__select_related_promoted_to_prefetch__in_related(graphql_client):
+def test_fields__annotated_field__select_related__in_related(graphql_client):
     OwnershipFactory.create(
         percentage=1,
         sale__purchase_date=datetime.date(2024, 1, 1),
@@ -210,17 +207,14 @@ def test_fields__annotated_field__select_related_promoted_to_prefetch__in_relate
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for all ownerships with sales
-    # 1 query for all apartments on sales with the annotated field.
-    assert response.queries.count == 2, response.queries.log
+    # 1 query for all ownerships, with sales and their annotated apartments joined.
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
         'FROM "example_ownership"',
         'INNER JOIN "example_sale"',
-    )
-    assert response.queries[1] == has(
-        'FROM "example_apartment"',
-        'django_date_extract(year, "example_apartment"."completion_date") AS "completion_year"',
+        'INNER JOIN "example_apartment"',
+        'django_date_extract(year, "example_apartment"."completion_date")',
     )
 
     assert response.content == [
@@ -301,15 +295,10 @@ def test_fields__alternate_field__to_one_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies and related property managers.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
         'INNER JOIN "example_propertymanager"',
     )
@@ -351,19 +340,14 @@ def test_fields__alternate_field__one_to_many_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
     # 1 query for fetching housing companies
     # 1 query for fetching nested developers (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_realestate"',
     )
 
@@ -425,19 +409,14 @@ def test_fields__alternate_field__many_to_many_related(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
     # 1 query for fetching housing companies
     # 1 query for fetching nested developers (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_developer"',
     )
 
@@ -501,19 +480,14 @@ def test_fields__alternate_field__many_to_many_related__reverse(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers
     # 1 query for fetching developers
     # 1 query for fetching nested housing companies (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_developer"',
     )
     assert response.queries[1] == has(
-        'FROM "example_developer"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
     )
 
@@ -586,23 +560,18 @@ def test_fields__alternate_field__many_to_many_related__with_original(graphql_cl
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies
     # 1 query for fetching housing companies
     # 1 query for fetching nested developers
     # 1 query for fetching nested developers (to the alternate field)
-    assert response.queries.count == 4, response.queries.log
+    assert response.queries.count == 3, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_developer"',
     )
-    assert response.queries[3] == has(
+    assert response.queries[2] == has(
         'FROM "example_developer"',
         (
             "ROW_NUMBER() OVER "
@@ -700,23 +669,18 @@ def test_fields__alternate_field__many_to_many_related__reverse__with_original(g
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers
     # 1 query for fetching developers
     # 1 query for fetching nested housing companies
     # 1 query for fetching nested housing companies (to the alternate field)
-    assert response.queries.count == 4, response.queries.log
+    assert response.queries.count == 3, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_developer"',
     )
     assert response.queries[1] == has(
-        'FROM "example_developer"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
     )
-    assert response.queries[3] == has(
+    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -804,19 +768,14 @@ def test_fields__alternate_field__connection(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers
     # 1 query for fetching property managers
     # 1 query for fetching nested housing companies (to the alternate field)
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
     )
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
     )
 
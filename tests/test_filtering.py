@@ -34,15 +34,10 @@ def test_filter__to_one_relation(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
     )
 
@@ -73,15 +68,10 @@ def test_filter__to_many_relation(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
     )
 
@@ -112,15 +102,10 @@ def test_filter__custom_filter(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
     )
 
@@ -151,15 +136,10 @@ def test_filter__order_by(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_housingcompany"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
     )
 
@@ -266,21 +246,16 @@ def test_filter__nested_connection(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
     # 1 query for fetching related housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_propertymanager"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_propertymanager"',
-        "LIMIT 3",
+        "LIMIT 100",
     )
     # Check that the filter is actually applied
-    assert response.queries[2] == has(
+    assert response.queries[1] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -329,28 +304,23 @@ def test_filter__nested_connection__deep(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
     # 1 query for fetching housing companies.
     # 1 query for fetching real estates.
-    assert response.queries.count == 4, response.queries.log
+    assert response.queries.count == 3, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
             '(PARTITION BY "example_housingcompany"."property_manager_id" ORDER BY "example_housingcompany"."id")'
         ),
     )
-    assert response.queries[3] == has(
+    assert response.queries[2] == has(
         'FROM "example_realestate"',
         (
             "ROW_NUMBER() OVER "
@@ -440,20 +410,15 @@ def test_filter__nested_connection__fragment_spread(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -599,4 +564,4 @@ def test_filter__aliased_queries(graphql_client):
         }
     }
 
-    assert response.queries.count == 6, response.queries.log
+    assert response.queries.count == 4, response.queries.log
@@ -0,0 +1,128 @@
+import pytest
+from graphql_relay import to_global_id
+
+from query_optimizer.identity import IdentityMap
+from tests.example.models import Apartment, Building
+from tests.example.types import BuildingNode
+from tests.factories import ApartmentFactory, BuildingFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def _identity_map(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"IDENTITY_MAP": True}
+
+
+def test_identity_map__related_instances():
+    ApartmentFactory.create(building__name="1")
+    apartment = Apartment.objects.select_related("building").get()
+
+    identity_map = IdentityMap()
+    identity_map.add([apartment])
+
+    assert len(identity_map) == 2
+    assert identity_map.get(Apartment, apartment.pk) is apartment
+    assert identity_map.get(Building, apartment.building.pk) is apartment.building
+
+
+def test_identity_map__keeps_instance_with_more_fields():
+    building = BuildingFactory.create(name="1")
+    partial = Building.objects.only("name").get()
+    full = Building.objects.get()
+
+    identity_map = IdentityMap()
+    identity_map.add([full])
+    identity_map.add([partial])
+
+    assert identity_map.get(Building, building.pk) is full
+
+
+@pytest.mark.usefixtures("_identity_map")
+def test_identity_map__node_reused(graphql_client):
+    building = BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+              }
+            }
+          }
+          building(id: "%s") {
+            name
+          }
+        }
+    """ % (to_global_id(str(BuildingNode), building.pk),)
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # The building node has already been fetched with the needed fields.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('FROM "example_building"')
+
+    assert response.full_content["data"]["building"] == {"name": "1"}
+
+
+@pytest.mark.usefixtures("_identity_map")
+def test_identity_map__node_missing_fields(graphql_client):
+    building = BuildingFactory.create(name="1", street_address="foo")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+              }
+            }
+          }
+          building(id: "%s") {
+            name
+            streetAddress
+          }
+        }
+    """ % (to_global_id(str(BuildingNode), building.pk),)
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching the building node, since the street address hasn't been fetched.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.full_content["data"]["building"] == {"name": "1", "streetAddress": "foo"}
+
+
+def test_identity_map__disabled_by_default(graphql_client):
+    building = BuildingFactory.create(name="1")
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                name
+              }
+            }
+          }
+          building(id: "%s") {
+            name
+          }
+        }
+    """ % (to_global_id(str(BuildingNode), building.pk),)
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching the building node.
+    assert response.queries.count == 2, response.queries.log
@@ -0,0 +1,224 @@
+import datetime
+
+import pytest
+from django.db import connection
+
+from tests.factories import ApartmentFactory, BuildingFactory, HousingCompanyFactory, RealEstateFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture(autouse=True)
+def _check_json_support():
+    # SQLite checks if it supports JSON with a query the first time it's needed.
+    assert connection.features.has_json_object_function
+
+
+def test_json_prefetch(graphql_client):
+    real_estate = RealEstateFactory.create(name="1", housing_company__name="1")
+    BuildingFactory.create(name="1", real_estate=real_estate)
+    BuildingFactory.create(name="2", real_estate=real_estate)
+    HousingCompanyFactory.create(name="2")
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            aggregatedRealEstates {
+              name
+              aggregatedBuildings {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies, with their real estates and buildings aggregated into JSON.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_housingcompany"',
+        "JSON_GROUP_ARRAY",
+        'FROM "example_realestate"',
+        'FROM "example_building"',
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "aggregatedRealEstates": [
+                {
+                    "name": "1",
+                    "aggregatedBuildings": [{"name": "1"}, {"name": "2"}],
+                },
+            ],
+        },
+        {
+            "name": "2",
+            "aggregatedRealEstates": [],
+        },
+    ]
+
+
+def test_json_prefetch__field_values(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(
+        building=building,
+        street_address="1",
+        completion_date=datetime.date(2020, 1, 1),
+        surface_area="12.50",
+        rooms=2,
+    )
+
+    query = """
+        query {
+          allBuildings {
+            aggregatedApartments {
+              streetAddress
+              completionDate
+              surfaceArea
+              rooms
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+    # Values are converted to their Python types like they would be when fetched normally.
+    assert response.content == [
+        {
+            "aggregatedApartments": [
+                {
+                    "streetAddress": "1",
+                    "completionDate": "2020-01-01",
+                    "surfaceArea": "12.50",
+                    "rooms": 2,
+                },
+            ],
+        },
+    ]
+
+
+def test_json_prefetch__ordering(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create(name="b", real_estate=real_estate)
+    BuildingFactory.create(name="c", real_estate=real_estate)
+    BuildingFactory.create(name="a", real_estate=real_estate)
+
+    query = """
+        query {
+          pagedRealEstates {
+            edges {
+              node {
+                aggregatedBuildings(orderBy: "-name") {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+    # Aggregated objects keep the ordering of their queryset.
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "aggregatedBuildings": [{"name": "c"}, {"name": "b"}, {"name": "a"}],
+                },
+            },
+        ],
+    }
+
+
+def test_json_prefetch__filtered(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building, street_address="1")
+    ApartmentFactory.create(building=building, street_address="2")
+
+    query = """
+        query {
+          allBuildings {
+            aggregatedApartments(streetAddress: "2") {
+              streetAddress
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"aggregatedApartments": [{"streetAddress": "2"}]}]
+
+
+def test_json_prefetch__nested_prefetch(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building, street_address="1")
+
+    query = """
+        query {
+          allBuildings {
+            aggregatedApartments {
+              streetAddress
+              sales {
+                purchasePrice
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Apartments have a related lookup that cannot be aggregated into JSON, so they are prefetched.
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments.
+    # 1 query for fetching sales.
+    assert response.queries.count == 3, response.queries.log
+    assert response.content == [{"aggregatedApartments": [{"streetAddress": "1", "sales": []}]}]
+
+
+def test_json_prefetch__parent_selected_related(graphql_client):
+    real_estate = RealEstateFactory.create(name="1")
+    BuildingFactory.create(name="1", real_estate=real_estate)
+
+    query = """
+        query {
+          allApartments {
+            building {
+              realEstate {
+                aggregatedBuildings {
+                  name
+                }
+              }
+            }
+          }
+        }
+    """
+
+    ApartmentFactory.create(building=real_estate.building_set.first())
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Aggregates for models joined with `select_related` are prefetched instead.
+    # 1 query for fetching apartments with their buildings and real estates.
+    # 1 query for fetching the buildings of the real estates.
+    assert response.queries.count == 2, response.queries.log
+    assert response.content == [{"building": {"realEstate": {"aggregatedBuildings": [{"name": "1"}]}}}]
+
@@ -0,0 +1,562 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db.models import Case, DateTimeField, Value, When
+
+from query_optimizer.keyset import (
+    annotate_keyset_values,
+    cursor_to_keyset,
+    get_keyset_ordering,
+    get_keyset_values,
+    keyset_filter,
+    keyset_to_cursor,
+    reverse_ordering,
+)
+from tests.example.models import Apartment, Building
+from tests.factories import ApartmentFactory, BuildingFactory, RealEstateFactory
+from tests.helpers import has, like
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_keyset_cursor():
+    cursor = keyset_to_cursor(["foo", 1])
+    assert cursor_to_keyset(cursor) == ["foo", 1]
+
+
+def test_keyset_cursor__lossless():
+    values = [
+        datetime.datetime(2024, 1, 1, 1, 1, 1, 123456, tzinfo=datetime.timezone.utc),
+        datetime.date(2024, 1, 1),
+        datetime.time(1, 1, 1, 123456),
+        datetime.timedelta(microseconds=1),
+        Decimal("1.10"),
+        None,
+    ]
+    assert cursor_to_keyset(keyset_to_cursor(values)) == values
+
+
+def test_keyset_cursor__offset_cursor_is_not_valid():
+    assert cursor_to_keyset("YXJyYXljb25uZWN0aW9uOjE=") is None
+
+
+def test_keyset_pagination__first(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="3")
+
+    query = """
+        query {
+          keysetBuildings(first: 2) {
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              cursor
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings. One extra building is fetched to check if there is a next page.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        "LIMIT 3",
+    )
+    assert response.queries[0] != has("OFFSET")
+
+    assert response.content == {
+        "pageInfo": {
+            "hasNextPage": True,
+            "hasPreviousPage": False,
+        },
+        "edges": [
+            {"cursor": keyset_to_cursor([1]), "node": {"name": "1"}},
+            {"cursor": keyset_to_cursor([2]), "node": {"name": "2"}},
+        ],
+    }
+
+
+def test_keyset_pagination__after(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="3")
+    BuildingFactory.create(name="4")
+
+    query = """
+        query ($after: String) {
+          keysetBuildings(first: 2, after: $after) {
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"after": keyset_to_cursor([2])})
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings after the cursor.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        'WHERE "example_building"."id" > 2',
+        "LIMIT 3",
+    )
+    assert response.queries[0] != has("OFFSET")
+
+    assert response.content == {
+        "pageInfo": {
+            "hasNextPage": False,
+            "hasPreviousPage": True,
+        },
+        "edges": [
+            {"node": {"name": "3"}},
+            {"node": {"name": "4"}},
+        ],
+    }
+
+
+def test_keyset_pagination__order_by(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="2 duplicate")
+    BuildingFactory.create(name="3")
+    Building.objects.filter(name="2 duplicate").update(name="2")
+
+    query = """
+        query ($after: String) {
+          keysetBuildings(first: 2, after: $after, orderBy: "-name") {
+            pageInfo {
+              endCursor
+            }
+            edges {
+              node {
+                pk
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Primary key is added to the ordering, so that buildings with the same name have a unique ordering.
+    assert response.content == {
+        "pageInfo": {
+            "endCursor": keyset_to_cursor(["2", 2]),
+        },
+        "edges": [
+            {"node": {"pk": 4, "name": "3"}},
+            {"node": {"pk": 2, "name": "2"}},
+        ],
+    }
+
+    response = graphql_client(query, variables={"after": response.content["pageInfo"]["endCursor"]})
+    assert response.no_errors, response.errors
+
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        ('WHERE ("example_building"."name" < 2 ' 'OR ("example_building"."name" = 2 AND "example_building"."id" > 2))'),
+        'ORDER BY "example_building"."name" DESC, "example_building"."id" ASC',
+    )
+
+    assert response.content == {
+        "pageInfo": {
+            "endCursor": keyset_to_cursor(["1", 1]),
+        },
+        "edges": [
+            {"node": {"pk": 3, "name": "2"}},
+            {"node": {"pk": 1, "name": "1"}},
+        ],
+    }
+
+
+def test_keyset_pagination__last__before(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="3")
+    BuildingFactory.create(name="4")
+
+    query = """
+        query ($before: String) {
+          keysetBuildings(last: 2, before: $before) {
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"before": keyset_to_cursor([4])})
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings in reverse order from the cursor.
+    # The total count is not needed for paginating from the end.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        'WHERE "example_building"."id" < 4',
+        'ORDER BY "example_building"."id" DESC',
+        "LIMIT 3",
+    )
+
+    assert response.content == {
+        "pageInfo": {
+            "hasNextPage": True,
+            "hasPreviousPage": True,
+        },
+        "edges": [
+            {"node": {"name": "2"}},
+            {"node": {"name": "3"}},
+        ],
+    }
+
+
+def test_keyset_pagination__total_count(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query ($after: String) {
+          keysetApartments(first: 1, after: $after) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"after": keyset_to_cursor([1])})
+    assert response.no_errors, response.errors
+
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] == has("COUNT(*)")
+    assert response.queries[0] != has('"example_apartment"."id" > 1')
+
+    # Total count is for the whole connection, not just the items after the cursor.
+    assert response.content == {
+        "totalCount": 3,
+        "edges": [
+            {"node": {"streetAddress": "2"}},
+        ],
+    }
+
+
+def test_keyset_pagination__invalid_cursor(graphql_client):
+    query = """
+        query {
+          keysetBuildings(first: 1, after: "YXJyYXljb25uZWN0aW9uOjE=") {
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.errors[0]["message"] == "The node pointed with `after` does not exist."
+
+
+def test_keyset_pagination__cursor_for_different_ordering(graphql_client):
+    BuildingFactory.create(name="1")
+
+    query = """
+        query ($after: String) {
+          keysetBuildings(first: 1, after: $after, orderBy: "name") {
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"after": keyset_to_cursor([1])})
+    assert response.errors[0]["message"] == "The cursor is not valid for the ordering of this connection."
+
+
+def test_keyset_pagination__nested__first(graphql_client):
+    real_estate_1 = RealEstateFactory.create(name="1")
+    real_estate_2 = RealEstateFactory.create(name="2")
+    BuildingFactory.create(name="1", real_estate=real_estate_1)
+    BuildingFactory.create(name="2", real_estate=real_estate_1)
+    BuildingFactory.create(name="3", real_estate=real_estate_1)
+    BuildingFactory.create(name="4", real_estate=real_estate_2)
+
+    query = """
+        query ($after: String) {
+          pagedRealEstates {
+            edges {
+              node {
+                name
+                keysetBuildings(first: 1, after: $after) {
+                  pageInfo {
+                    hasNextPage
+                    hasPreviousPage
+                  }
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"after": keyset_to_cursor([1])})
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    assert response.queries.count == 2, response.queries.log
+
+    # Rows before the cursor are removed with a seek predicate, and each partition
+    # is only limited by the number of requested items (plus one for the next page check).
+    assert response.queries[1] == has(
+        'FROM "example_building"',
+        '"example_building"."id" > 1',
+        '"qual0" >= 0',
+        '"qual0" < 2',
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "name": "1",
+                    "keysetBuildings": {
+                        "pageInfo": {"hasNextPage": True, "hasPreviousPage": True},
+                        "edges": [{"node": {"name": "2"}}],
+                    },
+                },
+            },
+            {
+                "node": {
+                    "name": "2",
+                    "keysetBuildings": {
+                        "pageInfo": {"hasNextPage": False, "hasPreviousPage": True},
+                        "edges": [{"node": {"name": "4"}}],
+                    },
+                },
+            },
+        ],
+    }
+
+
+def test_keyset_pagination__nested__last(graphql_client):
+    real_estate_1 = RealEstateFactory.create(name="1")
+    real_estate_2 = RealEstateFactory.create(name="2")
+    BuildingFactory.create(name="1", real_estate=real_estate_1)
+    BuildingFactory.create(name="2", real_estate=real_estate_1)
+    BuildingFactory.create(name="3", real_estate=real_estate_1)
+    BuildingFactory.create(name="4", real_estate=real_estate_2)
+
+    query = """
+        query {
+          pagedRealEstates {
+            edges {
+              node {
+                name
+                keysetBuildings(last: 2) {
+                  pageInfo {
+                    hasNextPage
+                    hasPreviousPage
+                  }
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching real estates.
+    # 1 query for fetching buildings.
+    assert response.queries.count == 2, response.queries.log
+
+    # Partition index is counted from the end, so no count is needed.
+    assert response.queries[1] == has(
+        'ORDER BY "example_building"."id" DESC',
+        '"qual0" < 3',
+    )
+    assert response.queries[1] != has("COUNT(*)")
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "name": "1",
+                    "keysetBuildings": {
+                        "pageInfo": {"hasNextPage": False, "hasPreviousPage": True},
+                        "edges": [{"node": {"name": "2"}}, {"node": {"name": "3"}}],
+                    },
+                },
+            },
+            {
+                "node": {
+                    "name": "2",
+                    "keysetBuildings": {
+                        "pageInfo": {"hasNextPage": False, "hasPreviousPage": False},
+                        "edges": [{"node": {"name": "4"}}],
+                    },
+                },
+            },
+        ],
+    }
+
+
+def test_keyset_pagination__nested__total_count(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+    ApartmentFactory.create(street_address="3", building=building)
+
+    query = """
+        query ($after: String) {
+          pagedBuildings {
+            edges {
+              node {
+                keysetApartments(first: 1, after: $after) {
+                  totalCount
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"after": keyset_to_cursor([1])})
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching apartments, with the total count for each building.
+    assert response.queries.count == 2, response.queries.log
+
+    # Since the rows are filtered with the cursor, the total count is calculated in a subquery.
+    assert response.queries[1] == like(
+        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_apartment" .*\) _count\) AS "_optimizer_count".*'
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "keysetApartments": {
+                        "totalCount": 3,
+                        "edges": [{"node": {"streetAddress": "2"}}],
+                    },
+                },
+            },
+        ],
+    }
+
+
+def fetch_pages(queryset, size, *, backwards=False):
+    """Fetch all pages of the given queryset with keyset cursors, and return the primary keys on each page."""
+    ordering = get_keyset_ordering(queryset.query.order_by, queryset.model)
+    if backwards:
+        ordering = reverse_ordering(ordering)
+    queryset = annotate_keyset_values(queryset, ordering).order_by(*ordering)
+
+    pages = []
+    cursor = None
+    while True:
+        page_queryset = queryset
+        if cursor is not None:
+            values = cursor_to_keyset(cursor)
+            # Going backwards is the same as going forwards with the reversed ordering,
+            # but this checks that the `before` predicate is the mirror of the `after` predicate.
+            ordering_ = reverse_ordering(ordering) if backwards else ordering
+            seek = keyset_filter(ordering_, values, model=queryset.model, using=queryset.db, before=backwards)
+            page_queryset = queryset.filter(seek)
+
+        page = list(page_queryset[:size])
+        if not page:
+            return pages
+        pages.append([item.pk for item in page])
+        cursor = keyset_to_cursor(get_keyset_values(page[-1]))
+
+
+def test_keyset_pagination__sub_millisecond_timestamps():
+    timestamp = datetime.datetime(2024, 1, 1, 1, 1, 1, 123000, tzinfo=datetime.timezone.utc)
+    apartments = [ApartmentFactory.create() for _ in range(4)]
+    timestamps = [timestamp + datetime.timedelta(microseconds=index) for index in (3, 1, 2, 0)]
+
+    queryset = Apartment.objects.annotate(
+        timestamp=Case(
+            *(When(pk=apartment.pk, then=Value(value)) for apartment, value in zip(apartments, timestamps)),
+            output_field=DateTimeField(),
+        ),
+    ).order_by("timestamp")
+
+    # Timestamps are compared with full precision, so no row is repeated or skipped.
+    expected = [apartments[3].pk, apartments[1].pk, apartments[2].pk, apartments[0].pk]
+    assert fetch_pages(queryset, 1) == [[pk] for pk in expected]
+    assert fetch_pages(queryset, 1, backwards=True) == [[pk] for pk in reversed(expected)]
+
+
+@pytest.mark.parametrize("order_by", ["floor", "-floor"])
+def test_keyset_pagination__nullable_ordering(order_by):
+    for floor in (2, None, 1, None, 3):
+        ApartmentFactory.create(floor=floor)
+
+    queryset = Apartment.objects.order_by(order_by)
+    expected = list(queryset.order_by(order_by, "pk").values_list("pk", flat=True))
+
+    # Rows with null values are found from both sides of the non-null values.
+    for size in (1, 2, 3):
+        pages = fetch_pages(queryset, size)
+        assert [pk for page in pages for pk in page] == expected
+
+        pages = fetch_pages(queryset, size, backwards=True)
+        assert [pk for page in pages for pk in page] == list(reversed(expected))
@@ -0,0 +1,169 @@
+import pytest
+
+from tests.factories import ApartmentFactory, SaleFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_optimize_instances__to_one(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="1")
+    ApartmentFactory.create(street_address="2", building__name="2")
+    ApartmentFactory.create(street_address="3", building__name="3")
+
+    query = """
+        query {
+          listedApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the custom resolver.
+    # 1 query for fetching the buildings for all apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[1] == has(
+        'FROM "example_building"',
+        '"example_building"."id" IN',
+    )
+
+    assert response.content == [
+        {"streetAddress": "1", "building": {"name": "1"}},
+        {"streetAddress": "2", "building": {"name": "2"}},
+        {"streetAddress": "3", "building": {"name": "3"}},
+    ]
+
+
+def test_optimize_instances__to_many(graphql_client):
+    apartment_1 = ApartmentFactory.create(street_address="1")
+    apartment_2 = ApartmentFactory.create(street_address="2")
+    SaleFactory.create(apartment=apartment_1, purchase_price=1)
+    SaleFactory.create(apartment=apartment_1, purchase_price=2)
+    SaleFactory.create(apartment=apartment_2, purchase_price=3)
+
+    query = """
+        query {
+          listedApartments {
+            streetAddress
+            sales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the custom resolver.
+    # 1 query for fetching the sales for all apartments.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[1] == has(
+        'FROM "example_sale"',
+        '"example_sale"."apartment_id" IN',
+    )
+
+    assert response.content == [
+        {"streetAddress": "1", "sales": [{"purchasePrice": "1.00"}, {"purchasePrice": "2.00"}]},
+        {"streetAddress": "2", "sales": [{"purchasePrice": "3.00"}]},
+    ]
+
+
+def test_optimize_instances__annotations(graphql_client):
+    ApartmentFactory.create(completion_date="2020-01-01")
+    ApartmentFactory.create(completion_date="2021-01-01")
+
+    query = """
+        query {
+          listedApartments {
+            completionYear
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the custom resolver.
+    # 1 query for fetching the annotations for all apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.content == [
+        {"completionYear": 2020},
+        {"completionYear": 2021},
+    ]
+
+
+def test_optimize_instances__evaluated_queryset(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="1")
+    ApartmentFactory.create(street_address="2", building__name="2")
+
+    query = """
+        query {
+          evaluatedApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the custom resolver.
+    # 1 query for fetching the buildings for all apartments.
+    # The apartments are not fetched again.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] == has('FROM "example_apartment"')
+    assert response.queries[1] == has('FROM "example_building"')
+
+    assert response.content == [
+        {"streetAddress": "1", "building": {"name": "1"}},
+        {"streetAddress": "2", "building": {"name": "2"}},
+    ]
+
+
+def test_optimize_instances__nested(graphql_client):
+    apartment = ApartmentFactory.create(street_address="1", building__real_estate__name="1")
+    SaleFactory.create(apartment=apartment, purchase_price=1)
+
+    query = """
+        query {
+          listedApartments {
+            building {
+              realEstate {
+                name
+              }
+            }
+            sales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments in the custom resolver.
+    # 1 query for fetching buildings with their real estates.
+    # 1 query for fetching sales.
+    assert response.queries.count == 3, response.queries.log
+    assert response.queries[1] == has(
+        'FROM "example_building"',
+        'INNER JOIN "example_realestate"',
+    )
+
+    assert response.content == [
+        {"building": {"realEstate": {"name": "1"}}, "sales": [{"purchasePrice": "1.00"}]},
+    ]
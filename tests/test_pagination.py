@@ -1,4 +1,7 @@
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
 
 from tests.factories import (
     ApartmentFactory,
@@ -36,16 +39,10 @@ def test_pagination__first(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_building"',
-    )
-
-    assert response.queries[1] == has(
         'FROM "example_building"',
         "LIMIT 2",
     )
@@ -124,26 +121,317 @@ def test_pagination__offset(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        "LIMIT 100 OFFSET 2",
+    )
+
+    assert response.content == {
+        "edges": [
+            {"node": {"name": "3"}},
+            {"node": {"name": "4"}},
+            {"node": {"name": "5"}},
+        ]
+    }
+
+
+@pytest.fixture()
+def _window_total_count(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"WINDOW_TOTAL_COUNT": True}
+
+
+@pytest.mark.usefixtures("_window_total_count")
+def test_pagination__window_total_count(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+    ApartmentFactory.create(street_address="4")
+    ApartmentFactory.create(street_address="5")
+
+    query = """
+        query {
+          pagedApartments(first: 2, offset: 1) {
+            totalCount
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments and counting them with a window function.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*) OVER ()",
+        'FROM "example_apartment"',
+        "LIMIT 2 OFFSET 1",
+    )
+
+    assert response.content == {
+        "totalCount": 5,
+        "pageInfo": {
+            "hasNextPage": True,
+            "hasPreviousPage": True,
+        },
+        "edges": [
+            {"node": {"streetAddress": "2"}},
+            {"node": {"streetAddress": "3"}},
+        ],
+    }
+
+
+@pytest.mark.usefixtures("_window_total_count")
+def test_pagination__window_total_count__empty_page(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          pagedApartments(offset: 5) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments, which returns no rows.
+    # 1 query for counting apartments, since the window function value is not available.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*) OVER ()",
+        'FROM "example_apartment"',
+        "OFFSET 5",
+    )
+    assert response.queries[1] == has(
+        "COUNT(*)",
+        'FROM "example_apartment"',
+    )
+
+    assert response.content == {"totalCount": 2, "edges": []}
+
+
+@pytest.mark.usefixtures("_window_total_count")
+def test_pagination__window_total_count__last(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+    ApartmentFactory.create(street_address="3")
+
+    query = """
+        query {
+          pagedApartments(last: 2) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for counting apartments, since `last` needs the total count for slicing.
+    # 1 query for fetching apartments.
     assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
         "COUNT(*)",
+        'FROM "example_apartment"',
+    )
+    assert response.queries[1] != has("COUNT(*) OVER ()")
+
+    assert response.content == {
+        "totalCount": 3,
+        "edges": [
+            {"node": {"streetAddress": "2"}},
+            {"node": {"streetAddress": "3"}},
+        ],
+    }
+
+
+def test_pagination__no_count__has_next_page(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="3")
+
+    query = """
+        query {
+          pagedBuildings(first: 2) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings. One extra building is fetched to check if there is a next page.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
         'FROM "example_building"',
+        "LIMIT 3",
     )
+    assert response.queries[0] != has("COUNT(*)")
 
-    assert response.queries[1] == has(
+    assert response.content == {
+        "pageInfo": {
+            "hasNextPage": True,
+            "endCursor": "YXJyYXljb25uZWN0aW9uOjE=",
+        },
+        "edges": [
+            {"node": {"name": "1"}},
+            {"node": {"name": "2"}},
+        ],
+    }
+
+
+def test_pagination__no_count__last_page(graphql_client):
+    BuildingFactory.create(name="1")
+    BuildingFactory.create(name="2")
+    BuildingFactory.create(name="3")
+
+    query = """
+        query {
+          pagedBuildings(first: 2, offset: 1) {
+            pageInfo {
+              hasNextPage
+              hasPreviousPage
+            }
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    assert response.queries.count == 1, response.queries.log
+
+    assert response.queries[0] == has(
         'FROM "example_building"',
-        "LIMIT 3 OFFSET 2",
+        "LIMIT 3 OFFSET 1",
     )
 
     assert response.content == {
+        "pageInfo": {
+            "hasNextPage": False,
+            "hasPreviousPage": True,
+        },
         "edges": [
+            {"node": {"name": "2"}},
             {"node": {"name": "3"}},
-            {"node": {"name": "4"}},
-            {"node": {"name": "5"}},
-        ]
+        ],
+    }
+
+
+def test_pagination__no_count__empty_page__has_previous_page(graphql_client):
+    query = """
+        query {
+          pagedBuildings(offset: 1) {
+            pageInfo {
+              hasPreviousPage
+            }
+            edges {
+              node {
+                name
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings, which returns no rows.
+    # 1 query for counting buildings, since there is no way to know if there are buildings before the offset.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[1] == has(
+        "COUNT(*)",
+        'FROM "example_building"',
+    )
+
+    assert response.content == {
+        "pageInfo": {
+            "hasPreviousPage": False,
+        },
+        "edges": [],
+    }
+
+
+def test_pagination__no_count__other_connection_fields(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          pagedApartments(first: 1) {
+            edgeCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Other fields on the connection might use the total count, so it's still counted.
+    # 1 query for counting apartments.
+    # 1 query for fetching apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    assert response.queries[0] == has(
+        "COUNT(*)",
+        'FROM "example_apartment"',
+    )
+
+    assert response.content == {
+        "edgeCount": 1,
+        "edges": [
+            {"node": {"streetAddress": "1"}},
+        ],
     }
 
 
@@ -178,22 +466,16 @@ def test_pagination__nested__one_to_many__first(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
         '0 AS "qual2"',
@@ -266,22 +548,16 @@ def test_pagination__nested__one_to_many__last(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
         # Since the last argument is used, the total count needs to be calculated for each partition.
@@ -289,8 +565,8 @@ def test_pagination__nested__one_to_many__last(graphql_client):
     )
 
     # The offset needs to be calculated for each partition for last.
-    assert response.queries[2] == like(
-        r".*CASE WHEN.*SELECT COUNT\(\*\).*THEN 0 ELSE.*SELECT COUNT\(\*\).*END.*",
+    assert response.queries[1] == like(
+        r".*CASE WHEN.*COUNT\(\*\) OVER \(PARTITION BY.*THEN 0 ELSE.*COUNT\(\*\) OVER \(PARTITION BY.*END.*",
     )
 
     assert response.content == {
@@ -359,22 +635,16 @@ def test_pagination__nested__one_to_many__offset(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
     )
@@ -439,20 +709,15 @@ def test_pagination__nested__many_to_many(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting housing companies.
     # 1 query for fetching housing companies.
     # 1 query for fetching real estates.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_developer"',
         (
             "ROW_NUMBER() OVER "
@@ -526,20 +791,15 @@ def test_pagination__nested__many_to_many__reverse(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers.
     # 1 query for fetching developers.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_developer"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_developer"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -612,20 +872,15 @@ def test_pagination__nested__custom_ordering__asc(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-        "LIMIT 2",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -688,20 +943,15 @@ def test_pagination__nested__custom_ordering__desc(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-        "LIMIT 2",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -764,22 +1014,16 @@ def test_pagination__nested__implicit_limit(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
         '1 AS "qual0"',
@@ -825,29 +1069,23 @@ def test_pagination__nested__limit_first(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
     )
 
     # The actual total count is calculated for the nested connection.
-    assert response.queries[2] == like(
-        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_apartment" .*\) _count\) AS "_optimizer_count".*'
+    assert response.queries[1] == has(
+        'COUNT(*) OVER (PARTITION BY "example_apartment"."building_id") AS "_optimizer_count"',
     )
 
     assert response.content == {
@@ -890,33 +1128,27 @@ def test_pagination__nested__limit__total_count(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting buildings.
     # 1 query for fetching buildings.
     # 1 query for fetching nested apartments.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_building"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_building"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_apartment"',
     )
 
     # Since max_limit=None, and there is no limit arguments, don't limit the connection with the window function.
-    assert response.queries[2] != has(
+    assert response.queries[1] != has(
         'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
     )
 
     # The actual total count is calculated for the nested connection.
-    assert response.queries[2] == like(
-        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_apartment" .*\) _count\) AS "_optimizer_count".*'
+    assert response.queries[1] == has(
+        'COUNT(*) OVER (PARTITION BY "example_apartment"."building_id") AS "_optimizer_count"',
     )
 
     assert response.content == {
@@ -955,3 +1187,195 @@ def test_pagination__nested__limit__total_count(graphql_client):
             },
         ]
     }
+
+
+@pytest.mark.usefixtures("_remove_apartment_node_apartments_max_limit")
+def test_pagination__nested__limit__total_count__no_window_support(graphql_client):
+    building = BuildingFactory.create()
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments {
+                  totalCount
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    with patch.object(connection.features, "supports_over_clause", new=False):
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching nested apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    # If the database doesn't support window functions, the count is calculated in a subquery for each partition.
+    assert response.queries[1] == like(
+        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_apartment" .*\) _count\) AS "_optimizer_count".*'
+    )
+
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "apartments": {
+                        "edges": [
+                            {"node": {"streetAddress": "1"}},
+                            {"node": {"streetAddress": "2"}},
+                        ],
+                        "totalCount": 2,
+                    }
+                }
+            },
+        ],
+    }
+
+
+@pytest.fixture()
+def _lateral_pagination(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"NESTED_PAGINATION_STRATEGY": "lateral"}
+
+
+@pytest.mark.usefixtures("_lateral_pagination")
+def test_pagination__nested__lateral(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+    ApartmentFactory.create(street_address="3", building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments(first: 1, offset: 1) {
+                  totalCount
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # SQLite doesn't support lateral joins, so only the generated SQL can be checked.
+    with patch("query_optimizer.optimizer.supports_lateral_join", return_value=True):
+        response = graphql_client(query)
+
+    # 1 query for fetching buildings.
+    # 1 query for fetching nested apartments.
+    assert response.queries.count == 2, response.queries.log
+
+    # Each partition is sliced in a lateral subquery instead of filtering on a window function.
+    assert response.queries[1] == has(
+        '("example_apartment"."id", "example_apartment"."building_id") IN',
+        'FROM (VALUES (1)) AS "_partition" ("value") CROSS JOIN LATERAL',
+        '"example_apartment"."building_id" = ("_partition"."value")',
+        "LIMIT 1 OFFSET 1",
+    )
+    assert response.queries[1] != has("ROW_NUMBER()")
+
+    # Rows outside the page are not selected, so the total count is calculated in a subquery.
+    assert response.queries[1] == like(
+        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_apartment" .*\) _count\) AS "_optimizer_count".*'
+    )
+
+
+@pytest.mark.usefixtures("_lateral_pagination")
+def test_pagination__nested__lateral__many_to_many(graphql_client):
+    DeveloperFactory.create(housingcompany_set__name="1")
+
+    query = """
+        query {
+          pagedDevelopers {
+            edges {
+              node {
+                housingcompanySet(first: 2) {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # SQLite doesn't support lateral joins, so only the generated SQL can be checked.
+    with patch("query_optimizer.optimizer.supports_lateral_join", return_value=True):
+        response = graphql_client(query)
+
+    # 1 query for fetching developers.
+    # 1 query for fetching nested housing companies.
+    assert response.queries.count == 2, response.queries.log
+
+    # The slicing filter uses the same join to the through table as the prefetch filter.
+    assert response.queries[1] == has(
+        (
+            '("example_housingcompany"."id", "example_housingcompany_developers"."developer_id") IN '
+            '(SELECT "_lateral"."_lateral_pk", "_partition"."value"'
+        ),
+        "CROSS JOIN LATERAL",
+        "LIMIT 2",
+    )
+    assert response.queries[1].count('JOIN "example_housingcompany_developers"') == 2  # outer query + lateral subquery
+
+
+@pytest.mark.usefixtures("_lateral_pagination")
+def test_pagination__nested__lateral__not_supported(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(street_address="1", building=building)
+    ApartmentFactory.create(street_address="2", building=building)
+
+    query = """
+        query {
+          pagedBuildings {
+            edges {
+              node {
+                apartments(first: 1) {
+                  edges {
+                    node {
+                      streetAddress
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # If the database doesn't support lateral joins, the window function is used instead.
+    assert response.queries[1] == has(
+        'ROW_NUMBER() OVER (PARTITION BY "example_apartment"."building_id" ORDER BY "example_apartment"."id")',
+    )
+    assert response.queries[1] != has("LATERAL")
+
+    assert response.content == {
+        "edges": [
+            {"node": {"apartments": {"edges": [{"node": {"streetAddress": "1"}}]}}},
+        ],
+    }
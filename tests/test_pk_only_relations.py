@@ -0,0 +1,261 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+
+from query_optimizer.ast import is_pk_only_selection
+
+from tests.factories import ApartmentFactory, BuildingFactory, DeveloperFactory, HousingCompanyFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture(autouse=True)
+def _check_json_support():
+    # SQLite checks if it supports JSON with a query the first time it's needed.
+    assert connection.features.has_json_object_function
+
+
+def test_pk_only_relations__foreign_key(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allApartments {
+            building {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching apartments. Buildings are created from the foreign key values.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] != has('FROM "example_building"')
+    assert response.queries[0] != has("JOIN")
+    assert response.content == [{"building": {"pk": building.pk}}]
+
+
+def test_pk_only_relations__foreign_key__typename(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          pagedApartments {
+            edges {
+              node {
+                building {
+                  __typename
+                  pk
+                }
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] != has("JOIN")
+    assert response.content == {
+        "edges": [
+            {
+                "node": {
+                    "building": {
+                        "__typename": "BuildingType",
+                        "pk": building.pk,
+                    },
+                },
+            },
+        ],
+    }
+
+
+def test_pk_only_relations__foreign_key__other_fields(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allApartments {
+            building {
+              pk
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Other fields of the related object are needed, so it's joined.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('INNER JOIN "example_building"')
+    assert response.content == [{"building": {"pk": building.pk, "name": "1"}}]
+
+
+def test_pk_only_relations__foreign_key__custom_resolver(graphql_client):
+    HousingCompanyFactory.create(name="1", postal_code__code="00001")
+
+    query = """
+        query {
+          allHousingCompanies {
+            postalCode {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Fields with custom resolvers might need other fields of the related object, so it's joined.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('JOIN "example_postalcode"')
+
+
+def test_pk_only_relations__many_to_many(graphql_client):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    housing_company = HousingCompanyFactory.create(name="1")
+    housing_company.developers.add(developer_2, developer_1)
+    HousingCompanyFactory.create(name="2")
+
+    query = """
+        query {
+          allHousingCompanies {
+            aggregatedDevelopers {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies, with the developer primary keys
+    # aggregated from the through table without joining the developers.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has('FROM "example_housingcompany_developers"')
+    assert response.queries[0] != has('"example_developer"')
+    assert response.content == [
+        {"aggregatedDevelopers": [{"pk": developer_1.pk}, {"pk": developer_2.pk}]},
+        {"aggregatedDevelopers": []},
+    ]
+
+
+def test_pk_only_relations__many_to_many__not_aggregated(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+    housing_company = HousingCompanyFactory.create(name="1")
+    housing_company.developers.add(developer)
+
+    query = """
+        query {
+          allHousingCompanies {
+            developers {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Through tables are only aggregated for fields using the "json" prefetch strategy.
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    assert response.queries.count == 2, response.queries.log
+    assert response.content == [{"developers": [{"pk": developer.pk}]}]
+
+
+def test_pk_only_relations__many_to_many__reverse(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+    housing_company_1 = HousingCompanyFactory.create(name="1")
+    housing_company_2 = HousingCompanyFactory.create(name="2")
+    developer.housingcompany_set.add(housing_company_1, housing_company_2)
+
+    query = """
+        query {
+          allDevelopers {
+            aggregatedHousingCompanies {
+              pk
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] != has('"example_housingcompany"."id"')
+    assert response.content == [
+        {"aggregatedHousingCompanies": [{"pk": housing_company_1.pk}, {"pk": housing_company_2.pk}]},
+    ]
+
+
+def test_pk_only_relations__many_to_many__other_fields(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+    housing_company = HousingCompanyFactory.create(name="1")
+    housing_company.developers.add(developer)
+
+    query = """
+        query {
+          allHousingCompanies {
+            developers {
+              pk
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching housing companies.
+    # 1 query for fetching developers.
+    assert response.queries.count == 2, response.queries.log
+    assert response.content == [{"developers": [{"pk": developer.pk, "name": "1"}]}]
+
+
+def test_pk_only_relations__foreign_key__selection_checked_once(graphql_client):
+    building = BuildingFactory.create(name="1")
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+    ApartmentFactory.create(building=building)
+
+    query = """
+        query {
+          allApartments {
+            building {
+              buildingPk: pk
+            }
+          }
+        }
+    """
+
+    # Field nodes of other operations with the same selections can share the cached result,
+    # so the alias keeps this operation's field nodes from matching those of earlier tests.
+    with patch("query_optimizer.fields.is_pk_only_selection", side_effect=is_pk_only_selection) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # The selection is the same for every apartment, so it's only checked for the first one.
+    assert mock.call_count == 1
+    assert response.content == [{"building": {"buildingPk": building.pk}}] * 3
@@ -0,0 +1,148 @@
+import contextvars
+import threading
+
+import pytest
+from django.db.models.fields import related_descriptors
+
+from query_optimizer.prefetch_hack import (
+    _PREFETCH_HACK_ACTIVE,
+    _PREFETCH_HACK_CACHE,
+    _install_prefetch_hack,
+    _register_for_prefetch_hack,
+    fetch_context,
+    prefetch_hack_scope,
+)
+from tests.example.models import HousingCompany
+from tests.factories import DeveloperFactory, HousingCompanyFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_prefetch_hack__installed_once():
+    hook = related_descriptors._filter_prefetch_queryset
+    assert hook.__optimizer_hack__ is True
+
+    _install_prefetch_hack()
+
+    assert related_descriptors._filter_prefetch_queryset is hook
+
+
+def test_prefetch_hack__registration_is_context_local():
+    field = HousingCompany._meta.get_field("developers")
+
+    def register():
+        _register_for_prefetch_hack(field)
+
+    context = contextvars.copy_context()
+    context.run(register)
+
+    # Registrations made in another context are not visible in this one.
+    assert context[_PREFETCH_HACK_CACHE] == {
+        "example_developer": {"housingcompany": {"example_housingcompany_developers"}}
+    }
+    assert _PREFETCH_HACK_CACHE.get() is None
+
+    seen_in_thread = []
+    thread = threading.Thread(target=lambda: seen_in_thread.append(_PREFETCH_HACK_CACHE.get()))
+    context.run(thread.start)
+    thread.join()
+
+    # New threads start from an empty context.
+    assert seen_in_thread == [None]
+
+
+def test_prefetch_hack__fetch_context__consumes_registrations():
+    field = HousingCompany._meta.get_field("developers")
+
+    def fetch():
+        _register_for_prefetch_hack(field)
+        with fetch_context():
+            outer = _PREFETCH_HACK_ACTIVE.get()
+            assert outer is not None
+            assert _PREFETCH_HACK_CACHE.get() is None
+
+            # Nested fetches don't see registrations of the outer fetch,
+            # and the outer fetch's registrations are restored after them.
+            with fetch_context():
+                assert _PREFETCH_HACK_ACTIVE.get() is None
+
+            assert _PREFETCH_HACK_ACTIVE.get() is outer
+
+        assert _PREFETCH_HACK_ACTIVE.get() is None
+
+    contextvars.copy_context().run(fetch)
+
+
+def test_prefetch_hack__scope__discards_unconsumed_registrations():
+    field = HousingCompany._meta.get_field("developers")
+
+    def optimize_without_fetching():
+        with prefetch_hack_scope():
+            _register_for_prefetch_hack(field)
+            assert _PREFETCH_HACK_CACHE.get() is not None
+
+        # The queryset that registered was never fetched, so the registration is discarded.
+        assert _PREFETCH_HACK_CACHE.get() is None
+
+        # Registrations made outside the scope are restored after it.
+        _register_for_prefetch_hack(field)
+        outer = _PREFETCH_HACK_CACHE.get()
+        with prefetch_hack_scope():
+            assert _PREFETCH_HACK_CACHE.get() is None
+            _register_for_prefetch_hack(field)
+            with fetch_context():
+                pass
+        assert _PREFETCH_HACK_CACHE.get() is outer
+
+    contextvars.copy_context().run(optimize_without_fetching)
+
+
+def test_prefetch_hack__other_context_registrations_not_used(graphql_client):
+    developer_1 = DeveloperFactory.create(name="1")
+    developer_2 = DeveloperFactory.create(name="2")
+    developer_3 = DeveloperFactory.create(name="3")
+    HousingCompanyFactory.create(developers=[developer_1, developer_2, developer_3])
+
+    query = """
+        query {
+          pagedHousingCompanies {
+            edges {
+              node {
+                developers(first:2) {
+                  edges {
+                    node {
+                      name
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    """
+
+    # A request in another context doesn't leave registrations behind for this one.
+    contextvars.copy_context().run(_register_for_prefetch_hack, HousingCompany._meta.get_field("developers"))
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 2, response.queries.log
+    # The through table is joined only once for the partition.
+    assert response.queries[1] == has(
+        'FROM "example_developer"',
+        'PARTITION BY "example_housingcompany_developers"."housingcompany_id"',
+    )
+    assert response.queries[1].count('JOIN "example_housingcompany_developers"') == 1
+
+    assert response.content == {
+        "edges": [
+            {"node": {"developers": {"edges": [{"node": {"name": "1"}}, {"node": {"name": "2"}}]}}},
+        ]
+    }
+
+    assert _PREFETCH_HACK_CACHE.get() is None
+    assert _PREFETCH_HACK_ACTIVE.get() is None
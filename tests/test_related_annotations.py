@@ -0,0 +1,140 @@
+import datetime
+
+import pytest
+from django.db.models import Count, F, Subquery
+
+from query_optimizer.related_annotations import can_join_annotations
+from tests.example.models import Apartment, Building
+from tests.factories import ApartmentFactory, BuildingFactory, SaleFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_related_annotations__nested(graphql_client):
+    BuildingFactory.create(
+        name="1",
+        real_estate__name="1",
+        real_estate__housing_company__name="foo",
+    )
+
+    query = """
+        query {
+          allBuildings {
+            name
+            realEstate {
+              name
+              housingCompany {
+                greeting
+                aliasGreeting
+              }
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching buildings, with their real estates and annotated housing companies joined.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_building"',
+        'INNER JOIN "example_realestate"',
+        'INNER JOIN "example_housingcompany"',
+    )
+
+    assert response.content == [
+        {
+            "name": "1",
+            "realEstate": {
+                "name": "1",
+                "housingCompany": {"greeting": "Hello foo!", "aliasGreeting": "Hello foo!"},
+            },
+        },
+    ]
+
+
+def test_related_annotations__related_lookup(graphql_client):
+    ApartmentFactory.create(street_address="1", building__real_estate__name="foo")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              realEstateName
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Lookups in the annotations of joined models are rewritten to go through the join.
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"streetAddress": "1", "building": {"realEstateName": "foo"}}]
+
+
+def test_related_annotations__null_values(graphql_client):
+    SaleFactory.create(purchase_date=datetime.date(2024, 1, 1), apartment__completion_date=None)
+    SaleFactory.create(purchase_date=datetime.date(2024, 1, 2), apartment__completion_date=datetime.date(2020, 1, 1))
+
+    query = """
+        query {
+          allSales {
+            purchaseDate
+            apartment {
+              completionYear
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [
+        {"purchaseDate": "2024-01-01", "apartment": {"completionYear": None}},
+        {"purchaseDate": "2024-01-02", "apartment": {"completionYear": 2020}},
+    ]
+
+
+def test_related_annotations__planner_prefetch(graphql_client):
+    ApartmentFactory.create(street_address="1", building__real_estate__name="foo")
+
+    query = """
+        query {
+          allApartments {
+            prefetchedBuilding {
+              realEstateName
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    # Relations that should be prefetched keep their annotations in the prefetch queryset.
+    # 1 query for fetching apartments.
+    # 1 query for fetching buildings with the annotation.
+    assert response.queries.count == 2, response.queries.log
+    assert response.content == [{"prefetchedBuilding": {"realEstateName": "foo"}}]
+
+
+def test_can_join_annotations():
+    assert can_join_annotations(Building, {"name_": F("name")})
+    assert can_join_annotations(Building, {"real_estate_name": F("real_estate__name")})
+    assert can_join_annotations(Building, {"alias": F("name"), "annotation": F("alias")})
+
+
+def test_can_join_annotations__row_dependent():
+    # Aggregates and subqueries must be calculated in a query of their own.
+    assert not can_join_annotations(Building, {"count": Count("apartments")})
+    assert not can_join_annotations(Building, {"sub": Subquery(Apartment.objects.values("pk")[:1])})
+    # Lookups over to-many relations would multiply the rows of the joining query.
+    assert not can_join_annotations(Building, {"address": F("apartments__street_address")})
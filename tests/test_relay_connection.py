@@ -35,17 +35,12 @@ def test_relay__connection(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting apartments.
     # 1 query for fetching apartments.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
-        'FROM "example_apartment"',
-    )
-    assert response.queries[1] == has(
         'FROM "example_apartment"',
-        "LIMIT 3",
+        "LIMIT 100",
     )
 
     assert response.content == {
@@ -83,24 +78,19 @@ def test_relay__connection__deep(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting apartments.
     # 1 query for fetching apartments.
     # 1 query for fetching sales.
     # 1 query for fetching ownerships and related owners.
-    assert response.queries.count == 4, response.queries.log
+    assert response.queries.count == 3, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_apartment"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_apartment"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_sale"',
     )
-    assert response.queries[3] == has(
+    assert response.queries[2] == has(
         'FROM "example_ownership"',
         'INNER JOIN "example_owner"',
     )
@@ -196,17 +186,12 @@ def test_relay__connection__only_cursor(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting apartments.
     # 1 query for fetching apartments (still made even if nothing is returned from it).
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_apartment"',
-    )
-    assert response.queries[1] == has(
-        'FROM "example_apartment"',
-        "LIMIT 3",
+        "LIMIT 100",
     )
 
     assert response.content == {
@@ -239,17 +224,12 @@ def test_relay__connection__cursor_before_node(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting apartments.
     # 1 query for fetching apartments.
-    assert response.queries.count == 2, response.queries.log
+    assert response.queries.count == 1, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_apartment"',
-    )
-    assert response.queries[1] == has(
-        'FROM "example_apartment"',
-        "LIMIT 3",
+        "LIMIT 100",
     )
 
     assert response.content == {
@@ -327,20 +307,15 @@ def test_relay__connection__nested__one_to_many(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query to count housing companies.
     # 1 query to fetch housing companies.
     # 1 query to fetch related real estates.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_realestate"',
         # Nested connections are limited via a window function.
         (
@@ -384,20 +359,15 @@ def test_relay__connection__nested__many_to_many(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query to count housing companies.
     # 1 query to fetch housing companies.
     # 1 query to fetch related real estates.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_developer"',
         # Nested connections are limited via a window function.
         (
@@ -441,20 +411,15 @@ def test_relay__connection__nested__many_to_many__reverse(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting developers.
     # 1 query for fetching developers.
     # 1 query for fetching housing companies.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_developer"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_developer"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         # Nested connections are limited via a window function.
         (
@@ -498,20 +463,15 @@ def test_relay__connection__nested__no_related_name(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query to count real estates.
     # 1 query to fetch real estates.
     # 1 query to fetch related buildings.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_realestate"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_realestate"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_building"',
         # Nested connections are limited via a window function.
         'ROW_NUMBER() OVER (PARTITION BY "example_building"."real_estate_id" ORDER BY "example_building"."id")',
@@ -559,20 +519,15 @@ def test_relay__connection__nested__many_to_many__shared_entities(graphql_client
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query to count housing companies.
     # 1 query to fetch housing companies.
     # 1 query to fetch related real estates.
-    assert response.queries.count == 3, response.queries.log
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_housingcompany"',
+        "LIMIT 100",
     )
     assert response.queries[1] == has(
-        'FROM "example_housingcompany"',
-        "LIMIT 3",
-    )
-    assert response.queries[2] == has(
         'FROM "example_developer"',
         # Nested connections are limited via a window function.
         (
@@ -649,22 +604,16 @@ def test_relay__connection__nested__counts(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
-    # 1 query for fetching housing companies (and counting them in a subquery).
-    assert response.queries.count == 3, response.queries.log
+    # 1 query for fetching housing companies (and counting them for each property manager).
+    assert response.queries.count == 2, response.queries.log
 
     assert response.queries[0] == has(
-        "COUNT(*)",
         'FROM "example_propertymanager"',
+        "LIMIT 100",
     )
 
     assert response.queries[1] == has(
-        'FROM "example_propertymanager"',
-        "LIMIT 3",
-    )
-
-    assert response.queries[2] == has(
         'FROM "example_housingcompany"',
         (
             "ROW_NUMBER() OVER "
@@ -673,8 +622,8 @@ def test_relay__connection__nested__counts(graphql_client):
     )
 
     # Check that total count is calculated if selected in the query.
-    assert response.queries[2] == like(
-        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_housingcompany" .*\) _count\) AS "_optimizer_count".*'
+    assert response.queries[1] == has(
+        'COUNT(*) OVER (PARTITION BY "example_housingcompany"."property_manager_id") AS "_optimizer_count"',
     )
 
 
@@ -704,12 +653,9 @@ def test_relay__connection__nested__no_counts(graphql_client):
     response = graphql_client(query)
     assert response.no_errors, response.errors
 
-    # 1 query for counting property managers.
     # 1 query for fetching property managers.
-    # 1 query for fetching housing companies (and counting them in a subquery).
-    assert response.queries.count == 3, response.queries.log
+    # 1 query for fetching housing companies.
+    assert response.queries.count == 2, response.queries.log
 
     # Check that total count is not calculated if not selected in the query.
-    assert response.queries[2] != like(
-        r'.*\(SELECT COUNT\(\*\) FROM \(SELECT .* FROM "example_housingcompany" .*\) _count\) AS "_optimizer_count".*'
-    )
+    assert response.queries[1] != has('AS "_optimizer_count"')
@@ -1,6 +1,10 @@
+from unittest.mock import patch
+
 import pytest
+from django.test.client import RequestFactory
 from graphql_relay import to_global_id
 
+from tests.example.schema import schema
 from tests.example.types import ApartmentNode, BuildingNode
 from tests.factories import ApartmentFactory, BuildingFactory
 from tests.helpers import has
@@ -150,3 +154,164 @@ def test_relay__node__doesnt_mess_up_filterset__nested_filtering(graphql_client)
 
     # Check that the nested filter is actually applied
     assert response.content == {"apartments": {"edges": [{"node": {"streetAddress": "1"}}]}}
+
+
+def test_relay__node__aliases_are_batched(graphql_client):
+    apartment_1 = ApartmentFactory.create(street_address="1", building__name="a")
+    apartment_2 = ApartmentFactory.create(street_address="2", building__name="b")
+    apartment_3 = ApartmentFactory.create(street_address="3", building__name="c")
+
+    query = """
+        query ($id: ID!) {
+          first: apartment(id: "%s") {
+            streetAddress
+            building { name }
+          }
+          second: apartment(id: $id) {
+            streetAddress
+            building { name }
+          }
+          third: apartment(id: "%s") {
+            streetAddress
+          }
+        }
+    """ % (
+        to_global_id(str(ApartmentNode), apartment_1.pk),
+        to_global_id(str(ApartmentNode), apartment_3.pk),
+    )
+
+    response = graphql_client(query, variables={"id": to_global_id(str(ApartmentNode), apartment_2.pk)})
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching the apartments with the same selections, and their buildings.
+    # 1 query for fetching the apartment with different selections.
+    assert response.queries.count == 2, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+        f'"example_apartment"."id" IN ({apartment_1.pk}, {apartment_2.pk})',
+    )
+
+    assert response.full_content["data"] == {
+        "first": {"streetAddress": "1", "building": {"name": "a"}},
+        "second": {"streetAddress": "2", "building": {"name": "b"}},
+        "third": {"streetAddress": "3"},
+    }
+
+
+def test_relay__node__aliases_are_batched__missing(graphql_client):
+    apartment = ApartmentFactory.create(street_address="1")
+
+    query = """
+        query {
+          first: apartment(id: "%s") {
+            streetAddress
+          }
+          second: apartment(id: "%s") {
+            streetAddress
+          }
+        }
+    """ % (
+        to_global_id(str(ApartmentNode), apartment.pk),
+        to_global_id(str(ApartmentNode), apartment.pk + 1),
+    )
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 1, response.queries.log
+    assert response.full_content["data"] == {"first": {"streetAddress": "1"}, "second": None}
+
+
+def test_relay__node__batches_not_shared_between_operations():
+    apartment_1 = ApartmentFactory.create(street_address="1")
+    apartment_2 = ApartmentFactory.create(street_address="2")
+
+    query = """
+        query ($first: ID!, $second: ID!) {
+          first: apartment(id: $first) {
+            streetAddress
+          }
+          second: apartment(id: $second) {
+            streetAddress
+          }
+        }
+    """
+
+    # Operations in batched requests are executed with the same context.
+    context = RequestFactory().post("/graphql")
+    variables = {
+        "first": to_global_id(str(ApartmentNode), apartment_1.pk),
+        "second": to_global_id(str(ApartmentNode), apartment_1.pk),
+    }
+    result = schema.execute(query, variable_values=variables, context_value=context)
+    assert result.errors is None, result.errors
+    assert result.data == {"first": {"streetAddress": "1"}, "second": {"streetAddress": "1"}}
+
+    apartment_1.street_address = "changed"
+    apartment_1.save()
+
+    # The second operation loads its own batch, instead of using the one from the first operation.
+    variables["second"] = to_global_id(str(ApartmentNode), apartment_2.pk)
+    result = schema.execute(query, variable_values=variables, context_value=context)
+    assert result.errors is None, result.errors
+    assert result.data == {"first": {"streetAddress": "changed"}, "second": {"streetAddress": "2"}}
+
+
+def test_relay__nodes(graphql_client):
+    apartment_1 = ApartmentFactory.create(street_address="1", building__name="a")
+    apartment_2 = ApartmentFactory.create(street_address="2", building__name="b")
+
+    query = """
+        query ($ids: [ID!]!) {
+          apartmentNodes(ids: $ids) {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    ids = [
+        to_global_id(str(ApartmentNode), apartment_2.pk),
+        to_global_id(str(ApartmentNode), apartment_2.pk + apartment_1.pk),
+        to_global_id(str(ApartmentNode), apartment_1.pk),
+    ]
+
+    with patch.object(ApartmentNode, "run_instance_checks") as checks:
+        response = graphql_client(query, variables={"ids": ids})
+
+    assert response.no_errors, response.errors
+
+    # 1 query for fetching the apartments and their buildings.
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+    )
+
+    # Nodes are returned in the order of the IDs, with null for missing nodes.
+    assert response.content == [
+        {"streetAddress": "2", "building": {"name": "b"}},
+        None,
+        {"streetAddress": "1", "building": {"name": "a"}},
+    ]
+
+    # Instance checks are run for each found node.
+    assert checks.call_count == 2
+
+
+def test_relay__nodes__wrong_type(graphql_client):
+    building = BuildingFactory.create()
+
+    query = """
+        query ($ids: [ID!]!) {
+          apartmentNodes(ids: $ids) {
+            streetAddress
+          }
+        }
+    """
+
+    response = graphql_client(query, variables={"ids": [to_global_id(str(BuildingNode), building.pk)]})
+    assert response.errors[0]["message"] == "Must receive a ApartmentNode id."
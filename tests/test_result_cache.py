@@ -0,0 +1,181 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import transaction
+
+from query_optimizer.result_cache import get_result_cache
+from tests.example.models import HousingCompany
+from tests.example.types import DeveloperType
+from tests.factories import DeveloperFactory, HousingCompanyFactory
+
+pytestmark = [
+    # Rows are not cached inside transactions.
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def _cache_developers(settings, monkeypatch):
+    # Changing the settings creates a new result cache, so rows cached in earlier tests are not used.
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"RESULT_CACHE_MAX_SIZE": 100}
+    # Options are frozen after the type has been created.
+    monkeypatch.setitem(DeveloperType._meta.__dict__, "cache_results", True)
+
+
+@pytest.fixture()
+def _cache_developers_in_django_cache(settings, _cache_developers):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {
+        "RESULT_CACHE_BACKEND": "query_optimizer.result_cache.DjangoCacheResultCache",
+    }
+
+
+QUERY = """
+    query {
+      allDevelopers {
+        name
+      }
+    }
+"""
+
+
+@pytest.mark.usefixtures("_cache_developers")
+def test_result_cache(graphql_client):
+    DeveloperFactory.create(name="1")
+    DeveloperFactory.create(name="2")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"name": "1"}, {"name": "2"}]
+
+    # Second request uses the cached rows.
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 0, response.queries.log
+    assert response.content == [{"name": "1"}, {"name": "2"}]
+
+
+@pytest.mark.usefixtures("_cache_developers")
+def test_result_cache__invalidated_on_save(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+    developer.name = "2"
+    developer.save()
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"name": "2"}]
+
+
+@pytest.mark.usefixtures("_cache_developers")
+def test_result_cache__invalidated_on_delete(graphql_client):
+    DeveloperFactory.create(name="1")
+    developer = DeveloperFactory.create(name="2")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+    developer.delete()
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"name": "1"}]
+
+
+@pytest.mark.usefixtures("_cache_developers")
+def test_result_cache__invalidated_on_m2m_change(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+    housing_company = HousingCompanyFactory.create(name="1")
+
+    query = """
+        query {
+          allDevelopers {
+            name
+            housingcompanySet {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.content == [{"name": "1", "housingcompanySet": []}]
+
+    through_table = HousingCompany.developers.through._meta.db_table
+    versions = get_result_cache().get_versions([through_table])
+
+    housing_company.developers.add(developer)
+
+    assert get_result_cache().get_versions([through_table]) != versions
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+    assert response.content == [{"name": "1", "housingcompanySet": [{"name": "1"}]}]
+
+
+@pytest.mark.usefixtures("_cache_developers")
+def test_result_cache__not_used_in_transaction(graphql_client):
+    DeveloperFactory.create(name="1")
+
+    with transaction.atomic():
+        response = graphql_client(QUERY)
+        assert response.no_errors, response.errors
+        assert response.queries.count == 1, response.queries.log
+
+    # Rows fetched in the transaction were not cached.
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+
+@pytest.mark.usefixtures("_cache_developers_in_django_cache")
+def test_result_cache__django_cache(graphql_client):
+    developer = DeveloperFactory.create(name="1")
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 0, response.queries.log
+    assert response.content == [{"name": "1"}]
+
+    developer.name = "2"
+    developer.save()
+
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
+    assert response.content == [{"name": "2"}]
+
+
+@pytest.mark.usefixtures("_cache_developers_in_django_cache")
+def test_result_cache__django_cache__version_evicted_during_invalidation():
+    cache = get_result_cache()
+    table = HousingCompany._meta.db_table
+    cache.cache.delete(f"{cache.prefix}:table:{table}")
+    versions = cache.get_versions([table])
+
+    # Version is evicted from the cache by another process after this process tried to add it.
+    with patch.object(cache.cache, "add", return_value=False):
+        cache.invalidate(table)
+
+    assert cache.get_versions([table]) != versions
+
+
+def test_result_cache__not_enabled(graphql_client):
+    DeveloperFactory.create(name="1")
+
+    graphql_client(QUERY)
+    response = graphql_client(QUERY)
+    assert response.no_errors, response.errors
+    assert response.queries.count == 1, response.queries.log
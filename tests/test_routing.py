@@ -0,0 +1,257 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.db import connections, transaction
+from graphql import OperationType
+
+from query_optimizer.concurrency import submit
+from query_optimizer.routing import get_read_database, use_primary_database
+from tests.example.models import Apartment
+from tests.factories import ApartmentFactory, DeveloperFactory, SaleFactory
+
+pytestmark = [
+    # Queries made on the replica connection can only see committed data.
+    pytest.mark.django_db(transaction=True, databases=["default", "replica"]),
+]
+
+
+@pytest.fixture(autouse=True)
+def _reset_debug_cursor():
+    # graphene-django's debug middleware wraps the cursor method of the connection it first sees,
+    # which is the one blocked by earlier tests that don't allow queries to the replica.
+    connection = connections["replica"]
+    if hasattr(connection, "_graphene_cursor"):
+        del connection._graphene_cursor
+        del connection.cursor
+
+
+@pytest.fixture()
+def _read_database(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"READ_DATABASE": "replica"}
+
+
+def choose_database(model, info):
+    return "replica" if model is Apartment else None
+
+
+@pytest.fixture()
+def _read_database_chooser(settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"READ_DATABASE_CHOOSER": "tests.test_routing.choose_database"}
+
+
+def capture_replica_queries():
+    replica_queries: list[str] = []
+
+    def record_query(execute, sql, params, many, context):
+        replica_queries.append(sql)
+        return execute(sql, params, many, context)
+
+    return replica_queries, connections["replica"].execute_wrapper(record_query)
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_read_database(graphql_client):
+    apartment = ApartmentFactory.create(street_address="1", building__name="1")
+    SaleFactory.create(apartment=apartment, purchase_price=1)
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+            sales {
+              purchasePrice
+            }
+          }
+        }
+    """
+
+    replica_queries, wrapper = capture_replica_queries()
+    with wrapper:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Apartments and their prefetched sales are both read from the replica.
+    assert response.queries.count == 0, response.queries.log
+    assert len(replica_queries) == 2, replica_queries
+
+    assert response.content == [
+        {"streetAddress": "1", "building": {"name": "1"}, "sales": [{"purchasePrice": "1.00"}]},
+    ]
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_read_database__connection(graphql_client):
+    ApartmentFactory.create(street_address="1")
+    ApartmentFactory.create(street_address="2")
+
+    query = """
+        query {
+          pagedApartments(first: 1) {
+            totalCount
+            edges {
+              node {
+                streetAddress
+              }
+            }
+          }
+        }
+    """
+
+    replica_queries, wrapper = capture_replica_queries()
+    with wrapper:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Count and page are both read from the replica.
+    assert response.queries.count == 0, response.queries.log
+    assert len(replica_queries) == 2, replica_queries
+
+    assert response.content == {
+        "totalCount": 2,
+        "edges": [{"node": {"streetAddress": "1"}}],
+    }
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_read_database__json_prefetch_not_supported(graphql_client, monkeypatch):
+    DeveloperFactory.create(name="1", housingcompany_set__name="1")
+    # Aggregation support is checked for the database the instances are read from.
+    monkeypatch.setattr(connections["replica"], "vendor", "unknown")
+
+    query = """
+        query {
+          allHousingCompanies {
+            name
+            aggregatedDevelopers {
+              name
+            }
+          }
+        }
+    """
+
+    replica_queries, wrapper = capture_replica_queries()
+    with wrapper:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Developers are prefetched from the replica instead of being aggregated into JSON.
+    assert response.queries.count == 0, response.queries.log
+    assert len(replica_queries) == 2, replica_queries
+    assert all("JSON_GROUP_ARRAY" not in sql for sql in replica_queries), replica_queries
+
+    assert response.content == [{"name": "1", "aggregatedDevelopers": [{"name": "1"}]}]
+
+
+def test_read_database__fetch_planner_statistics(graphql_client, settings):
+    settings.GRAPHQL_QUERY_OPTIMIZER = {"READ_DATABASE": "replica", "TO_ONE_FETCH_STRATEGY": "auto"}
+    ApartmentFactory.create(street_address="1", building__name="1")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    with patch("query_optimizer.planner.estimate_count", return_value=None) as mock:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Statistics are sampled from the database the apartments are read from.
+    assert [call.args[0].db for call in mock.call_args_list] == ["replica", "replica"]
+
+
+@pytest.mark.usefixtures("_read_database_chooser")
+def test_read_database__chooser(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="1")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+        }
+    """
+
+    replica_queries, wrapper = capture_replica_queries()
+    with wrapper:
+        response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Only apartments are read from the replica.
+    assert len(replica_queries) == 1, replica_queries
+    assert response.queries.count == 1, response.queries.log
+    assert response.full_content["data"] == {
+        "allApartments": [{"streetAddress": "1"}],
+        "allBuildings": [{"name": "1"}],
+    }
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_read_database__mutation_uses_primary():
+    context = SimpleNamespace()
+    query_info = SimpleNamespace(operation=SimpleNamespace(operation=OperationType.QUERY), context=context)
+    mutation_info = SimpleNamespace(operation=SimpleNamespace(operation=OperationType.MUTATION), context=context)
+
+    assert get_read_database(Apartment, query_info) == "replica"
+    assert get_read_database(Apartment, mutation_info) is None
+    # Operations after the mutation in the same request also use the primary database.
+    assert get_read_database(Apartment, query_info) is None
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_read_database__use_primary_database():
+    context = SimpleNamespace()
+    info = SimpleNamespace(operation=SimpleNamespace(operation=OperationType.QUERY), context=context)
+
+    use_primary_database(context)
+    assert get_read_database(Apartment, info) is None
+
+
+def test_read_database__not_set():
+    info = SimpleNamespace(operation=SimpleNamespace(operation=OperationType.QUERY), context=SimpleNamespace())
+    assert get_read_database(Apartment, info) is None
+
+
+@pytest.mark.usefixtures("_read_database")
+def test_routing__concurrent_execution_in_read_database_transaction(graphql_client):
+    ApartmentFactory.create(street_address="1", building__name="foo")
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+          }
+          allBuildings {
+            name
+          }
+        }
+    """
+
+    with patch("query_optimizer.execution.submit", side_effect=submit) as mock, transaction.atomic(using="replica"):
+        response = graphql_client(query, graphql_url="/graphql/concurrent/")
+
+    assert response.no_errors, response.errors
+
+    # The read database has a transaction open, so the root fields are executed in the current thread.
+    assert mock.call_count == 0
+    assert response.full_content["data"] == {
+        "allApartments": [{"streetAddress": "1"}],
+        "allBuildings": [{"name": "foo"}],
+    }
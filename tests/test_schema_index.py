@@ -0,0 +1,83 @@
+import pytest
+
+from query_optimizer.ast import SchemaIndex, get_schema_index, warm_up_schema_index
+from tests.example.models import Apartment, Building
+from tests.example.schema import schema
+from tests.factories import ApartmentFactory
+from tests.helpers import has
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def test_schema_index__warm_up():
+    index = warm_up_schema_index(schema)
+
+    assert index is get_schema_index(schema.graphql_schema)
+
+    apartment_type = schema.graphql_schema.type_map["ApartmentType"]
+    descriptor = index.fields[("ApartmentType", "building")]
+    assert descriptor.kind == "model_field"
+    assert descriptor.name == "building"
+    assert descriptor.graphql_field is apartment_type.fields["building"]
+    assert descriptor.graphene_type.name == "BuildingType"
+    assert descriptor.model_field.kind == "to_one"
+    assert descriptor.model_field.field == Apartment._meta.get_field("building")
+    assert descriptor.model_field.related_model == Building
+    assert descriptor.model_field.cache_name == "building"
+    assert descriptor.model_field.attname == "building_id"
+
+    descriptor = index.fields[("ApartmentType", "streetAddress")]
+    assert descriptor.kind == "model_field"
+    assert descriptor.name == "street_address"
+    assert descriptor.model_field.kind == "normal"
+    assert descriptor.model_field.attname == "street_address"
+
+    descriptor = index.fields[("BuildingType", "apartments")]
+    assert descriptor.model_field.kind == "to_many"
+    assert descriptor.model_field.cache_name == "apartments"
+
+    descriptor = index.fields[("BuildingType", "realEstateName")]
+    assert descriptor.model_field.kind == "custom"
+
+
+def test_schema_index__built_lazily(graphql_client):
+    ApartmentFactory.create(building__name="foo")
+
+    index = get_schema_index(schema.graphql_schema)
+    index.fields.clear()
+    index.model_fields.clear()
+
+    query = """
+        query {
+          allApartments {
+            streetAddress
+            building {
+              name
+            }
+          }
+        }
+    """
+
+    response = graphql_client(query)
+    assert response.no_errors, response.errors
+
+    assert response.queries.count == 1, response.queries.log
+    assert response.queries[0] == has(
+        'FROM "example_apartment"',
+        'INNER JOIN "example_building"',
+    )
+
+    assert ("ApartmentType", "streetAddress") in index.fields
+    assert ("ApartmentType", "building") in index.fields
+    assert ("BuildingType", "name") in index.fields
+    assert ("ApartmentType", "floor") not in index.fields
+
+
+def test_schema_index__separate_index_per_schema():
+    assert isinstance(get_schema_index(schema.graphql_schema), SchemaIndex)
+    assert get_schema_index(schema.graphql_schema) is get_schema_index(schema.graphql_schema)
+
+    other_schema = type(schema)(query=schema.query)
+    assert get_schema_index(other_schema.graphql_schema) is not get_schema_index(schema.graphql_schema)
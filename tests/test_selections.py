@@ -3,6 +3,7 @@
 
 import pytest
 
+from query_optimizer.compiler import OptimizationCompiler
 from query_optimizer.selections import get_field_selections
 from query_optimizer.typing import GQLInfo
 from tests.factories import HousingCompanyFactory
@@ -149,3 +150,30 @@ def test_get_field_selections__plain_object_type__nested(graphql_client):
     assert response.no_errors, response.errors
 
     assert selections == ["foo", {"bar": ["x"]}]
+
+
+def test_get_field_selections__does_not_compile_optimizations(graphql_client):
+    HousingCompanyFactory.create(name="foo")
+
+    query = """
+        query {
+          housingCompanyByName(name:"foo") {
+            name
+            developers {
+              name
+            }
+          }
+        }
+    """
+
+    original = OptimizationCompiler.compile
+    with mock_selections() as selections:  # noqa: SIM117
+        with patch.object(OptimizationCompiler, "compile", autospec=True, side_effect=original) as compile_:
+            response = graphql_client(query)
+
+    assert response.no_errors, response.errors
+
+    # Selections are collected without compiling the optimizations for the field,
+    # so optimizations are only compiled when the queryset is optimized.
+    assert selections == ["name", {"developers": ["name"]}]
+    assert compile_.call_count == 1
@@ -2,7 +2,13 @@
 from graphql_relay import offset_to_cursor
 
 from query_optimizer.typing import Any, NamedTuple, Optional
-from query_optimizer.validators import PaginationArgs, validate_pagination_args
+from query_optimizer.keyset import keyset_to_cursor
+from query_optimizer.validators import (
+    KeysetPaginationArgs,
+    PaginationArgs,
+    validate_keyset_pagination_args,
+    validate_pagination_args,
+)
 from tests.helpers import parametrize_helper
 
 
@@ -149,3 +155,27 @@ def test_validate_pagination_args(pagination_input, output, errors):
         if errors is not None:
             pytest.fail(f"Expected error: {errors}")
         assert args == output
+
+
+def test_validate_keyset_pagination_args():
+    args = validate_keyset_pagination_args(
+        first=1,
+        last=None,
+        offset=None,
+        after=keyset_to_cursor(["foo", 1]),
+        before=None,
+        max_limit=10,
+    )
+    assert args == KeysetPaginationArgs(after=["foo", 1], before=None, first=1, last=None, offset=0)
+
+
+def test_validate_keyset_pagination_args__offset_cursor():
+    msg = "The node pointed with `before` does not exist."
+    with pytest.raises(ValueError, match=msg):
+        validate_keyset_pagination_args(first=None, last=None, offset=None, after=None, before=offset_to_cursor(0))
+
+
+def test_validate_keyset_pagination_args__offset_with_only_last():
+    msg = "Argument `offset` cannot be used with only `last` in keyset pagination."
+    with pytest.raises(ValueError, match=msg):
+        validate_keyset_pagination_args(first=None, last=1, offset=1, after=None, before=None)